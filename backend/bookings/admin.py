@@ -2,7 +2,7 @@ from django.contrib import admin
 from .models import (
     Booking, Car, Driver, Trip, ReviewRating, 
     UsedCarInquiry, Complaint, MaintenanceLog, 
-    Payment, Invoice, Refund
+    Payment, Invoice, Refund, PaymentWebhookEvent, DailyBookingStats, PlatformSetting
 )
 
 
@@ -234,3 +234,25 @@ class RefundAdmin(admin.ModelAdmin):
     list_filter = ['status', 'requested_date']
     search_fields = ['booking__id', 'refund_reason']
     readonly_fields = ['created_at', 'updated_at', 'requested_date']
+
+
+@admin.register(DailyBookingStats)
+class DailyBookingStatsAdmin(admin.ModelAdmin):
+    list_display = ['date', 'total_bookings', 'pending_bookings', 'confirmed_bookings', 'confirmed_revenue', 'failed_payments']
+    date_hierarchy = 'date'
+    readonly_fields = ['updated_at']
+
+
+@admin.register(PlatformSetting)
+class PlatformSettingAdmin(admin.ModelAdmin):
+    list_display = ['key', 'value', 'updated_by', 'updated_at']
+    search_fields = ['key']
+    readonly_fields = ['created_at', 'updated_at', 'updated_by']
+
+
+@admin.register(PaymentWebhookEvent)
+class PaymentWebhookEventAdmin(admin.ModelAdmin):
+    list_display = ['event_id', 'event_type', 'status', 'attempts', 'received_at', 'processed_at']
+    list_filter = ['status', 'event_type']
+    search_fields = ['event_id']
+    readonly_fields = ['event_id', 'event_type', 'payload', 'attempts', 'received_at', 'processed_at']
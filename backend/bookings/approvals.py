@@ -0,0 +1,123 @@
+"""
+Bulk review of pending bookings
+Managers approve or reject many pending bookings in one request: the
+selected rows are locked, the ones still pending move with a single
+conditional UPDATE, and the side effects a save() would trigger (cache
+namespace bump, daily stats rollup) run once for the whole batch.
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from config.cache import bump_namespace
+from .models import Booking
+
+logger = logging.getLogger(__name__)
+
+# action -> (new booking status, per-id outcome)
+REVIEW_ACTIONS = {
+    'approve': ('confirmed', 'approved'),
+    'reject': ('cancelled', 'rejected'),
+}
+
+
+class ReviewResult:
+    """Per-id outcomes of one bulk review, in request order"""
+
+    def __init__(self, action):
+        self.action = action
+        self.results = []
+        self.has_more = False
+
+    def add(self, booking_id, outcome, current_status=None):
+        row = {'id': booking_id, 'result': outcome}
+        if current_status is not None:
+            row['status'] = current_status
+        self.results.append(row)
+
+    @property
+    def counts(self):
+        counts = {}
+        for row in self.results:
+            counts[row['result']] = counts.get(row['result'], 0) + 1
+        return counts
+
+    @property
+    def updated(self):
+        return self.counts.get(REVIEW_ACTIONS[self.action][1], 0)
+
+    def as_dict(self):
+        return {
+            'action': self.action,
+            'counts': self.counts,
+            'has_more': self.has_more,
+            'results': self.results,
+        }
+
+
+def max_bulk_review():
+    return getattr(settings, 'BULK_REVIEW_MAX_BOOKINGS', 500)
+
+
+def pending_booking_ids(conditions=None, limit=None):
+    """
+    Ids of the oldest pending bookings matching `conditions`, at most `limit`,
+    plus whether more remain. Served by the (status, ...) indexes.
+    """
+    limit = limit or max_bulk_review()
+    ids = list(
+        Booking.objects.filter(status='pending', **(conditions or {}))
+        .order_by('created_at', 'id')
+        .values_list('id', flat=True)[:limit + 1]
+    )
+    return ids[:limit], len(ids) > limit
+
+
+def review_bookings(ids, action):
+    """
+    Approve or reject the given bookings.
+
+    Only bookings that are still pending change; the others are reported
+    as 'not_pending' with their current status, or 'not_found'. The rows
+    are locked first, so the outcomes match what the UPDATE did even when
+    payments or the expiry sweeper move bookings concurrently.
+    """
+    new_status, outcome = REVIEW_ACTIONS[action]
+    ids = list(dict.fromkeys(ids))
+    result = ReviewResult(action)
+
+    with transaction.atomic():
+        # Lock in primary key order so concurrent bulk reviews can't deadlock
+        rows = {
+            booking_id: (current_status, created_at)
+            for booking_id, current_status, created_at in (
+                Booking.objects.select_for_update()
+                .filter(id__in=ids)
+                .order_by('id')
+                .values_list('id', 'status', 'created_at')
+            )
+        }
+        pending = [booking_id for booking_id in ids if rows.get(booking_id, (None,))[0] == 'pending']
+        if pending:
+            Booking.objects.filter(id__in=pending, status='pending').update(
+                status=new_status,
+                updated_at=timezone.now(),
+            )
+
+    for booking_id in ids:
+        if booking_id not in rows:
+            result.add(booking_id, 'not_found')
+        elif rows[booking_id][0] == 'pending':
+            result.add(booking_id, outcome)
+        else:
+            result.add(booking_id, 'not_pending', rows[booking_id][0])
+
+    # update() skips model signals, so refresh the derived data here
+    if pending:
+        bump_namespace('bookings')
+        if getattr(settings, 'BOOKING_STATS_ROLLUP', False):
+            from .stats import refresh_daily_stats
+            refresh_daily_stats({timezone.localtime(rows[booking_id][1]).date() for booking_id in pending})
+    return result
@@ -3,3 +3,12 @@ from django.apps import AppConfig
 class BookingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'bookings'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from config.cache import invalidate_on_change
+
+        invalidate_on_change(self.get_model('Booking'), 'bookings')
+        invalidate_on_change(self.get_model('Driver'), 'drivers')
+        invalidate_on_change(self.get_model('Trip'), 'trips')
+        invalidate_on_change(self.get_model('PlatformSetting'), 'settings')
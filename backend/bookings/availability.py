@@ -0,0 +1,107 @@
+"""
+Driver availability engine
+Answers "which drivers are free between two dates" with set-based queries
+instead of one Trip lookup per driver.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import DateField, Exists, F, Func, OuterRef
+from django.utils import timezone
+
+from .models import Booking, Driver, Trip
+from .platform_settings import get_platform_setting
+
+# Trips and bookings in these states still hold the driver's time
+ACTIVE_TRIP_STATUSES = ('pending', 'started')
+ACTIVE_BOOKING_STATUSES = ('pending', 'confirmed')
+
+
+def booking_window(pickup_date, number_of_days):
+    """Return the [start, end) date window covered by a booking"""
+    return pickup_date, pickup_date + timedelta(days=number_of_days)
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def overlapping_trips(start_date, end_date):
+    """Active trips that overlap the [start_date, end_date) window"""
+    # Bare datetime bounds instead of __date lookups so the (driver, status,
+    # start_time) index can range-scan start_time
+    return Trip.objects.filter(
+        driver__isnull=False,
+        status__in=ACTIVE_TRIP_STATUSES,
+        start_time__lt=_start_of_day(end_date),
+        end_time__gte=_start_of_day(start_date),
+    )
+
+
+class AddDays(Func):
+    """date + a whole number of days, as a DATE (PostgreSQL/Oracle syntax by default)"""
+    arity = 2
+    output_field = DateField()
+    template = '(%(expressions)s)'
+    arg_joiner = ' + '
+
+    def _compile_args(self, compiler):
+        (date_sql, date_params), (days_sql, days_params) = (
+            compiler.compile(expression) for expression in self.get_source_expressions()
+        )
+        return date_sql, days_sql, (*date_params, *days_params)
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        date_sql, days_sql, params = self._compile_args(compiler)
+        return f'DATE_ADD({date_sql}, INTERVAL {days_sql} DAY)', params
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        date_sql, days_sql, params = self._compile_args(compiler)
+        return f"DATE({date_sql}, ({days_sql}) || ' days')", params
+
+
+def overlapping_reservations(start_date, end_date, exclude_booking_id=None):
+    """
+    Active driver bookings that overlap the [start_date, end_date) window.
+
+    A booking ends at pickup_date + number_of_days, annotated in SQL. The
+    max_booking_days platform setting still bounds how far back pickup_date
+    can be, which keeps the scan a range on the indexed
+    (assigned_driver, pickup_date) columns.
+    """
+    max_days = get_platform_setting('max_booking_days')
+    reservations = Booking.objects.filter(
+        assigned_driver__isnull=False,
+        status__in=ACTIVE_BOOKING_STATUSES,
+        pickup_date__lt=end_date,
+        pickup_date__gte=start_date - timedelta(days=max_days),
+    ).alias(
+        end_date=AddDays(F('pickup_date'), F('number_of_days')),
+    ).filter(end_date__gt=start_date)
+    if exclude_booking_id is not None:
+        reservations = reservations.exclude(id=exclude_booking_id)
+    return reservations
+
+
+def reserved_driver_ids(start_date, end_date, exclude_booking_id=None):
+    """IDs of drivers already reserved through Booking.assigned_driver in the window"""
+    reservations = overlapping_reservations(start_date, end_date, exclude_booking_id)
+    return set(reservations.order_by().values_list('assigned_driver_id', flat=True).distinct())
+
+
+def available_drivers(start_date, end_date, drivers=None, exclude_booking_id=None):
+    """
+    Return a Driver queryset of drivers free for the whole [start_date, end_date) window.
+
+    A single query regardless of fleet size: busy drivers are excluded with
+    correlated EXISTS subqueries over overlapping trips and reservations.
+    `exclude_booking_id` leaves that booking's own reservation out, so the
+    driver it already has still counts as free when reassigning it.
+    """
+    if drivers is None:
+        drivers = Driver.objects.all()
+
+    busy_trips = overlapping_trips(start_date, end_date).filter(driver=OuterRef('pk'))
+    reservations = overlapping_reservations(start_date, end_date, exclude_booking_id).filter(
+        assigned_driver=OuterRef('pk'),
+    )
+    return drivers.exclude(Exists(busy_trips)).exclude(Exists(reservations))
@@ -0,0 +1,282 @@
+"""
+Bulk driver onboarding
+Imports driver accounts from CSV or JSON rows: every row is validated up
+front (duplicate emails, usernames and license numbers are found with one
+set-based query each), temporary passwords are hashed in a thread pool,
+and users and driver profiles are written with bulk_create in batches.
+"""
+import csv
+import io
+import json
+import logging
+import os
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from config.cache import bump_namespace
+from users.models import User
+from .models import Driver
+
+logger = logging.getLogger(__name__)
+
+# Same field names as ManagerDriverViewSet.create
+COLUMNS = ('email', 'firstName', 'lastName', 'licenseNumber', 'licenseExpiry', 'experienceYears', 'phone', 'password')
+REQUIRED = ('email', 'firstName', 'licenseNumber', 'licenseExpiry')
+
+
+class DriverImportError(Exception):
+    """The upload as a whole can't be imported (bad format, too many rows)"""
+
+
+class ImportRow:
+    """One input row: cleaned values, or the errors found in it"""
+
+    def __init__(self, number, raw):
+        self.number = number
+        self.raw = raw
+        self.errors = {}
+        self.email = str(raw.get('email') or '').strip()
+        self.first_name = str(raw.get('firstName') or '').strip()
+        self.last_name = str(raw.get('lastName') or '').strip()
+        self.license_number = str(raw.get('licenseNumber') or '').strip()
+        self.phone_number = str(raw.get('phone') or '').strip()
+        self.password = str(raw.get('password') or '')
+        self.generated_password = not self.password
+        self.license_expiry = None
+        self.experience_years = 0
+        self.username = None
+        self.user_id = None
+        self.driver_id = None
+
+    def as_result(self):
+        if self.errors:
+            return {'row': self.number, 'email': self.email, 'status': 'error', 'errors': self.errors}
+        result = {'row': self.number, 'email': self.email, 'status': 'created' if self.driver_id else 'valid'}
+        if self.driver_id:
+            result.update(id=self.driver_id, userId=self.user_id)
+            if self.generated_password:
+                result['temporaryPassword'] = self.password
+        return result
+
+
+def parse_upload(content, filename=''):
+    """List of row dicts from a CSV or JSON upload (bytes or str)"""
+    if isinstance(content, bytes):
+        try:
+            content = content.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise DriverImportError('File must be UTF-8 encoded')
+    if filename.lower().endswith('.json') or content.lstrip().startswith(('[', '{')):
+        try:
+            rows = json.loads(content)
+        except ValueError as e:
+            raise DriverImportError(f'Invalid JSON: {e}')
+        if isinstance(rows, dict):
+            rows = rows.get('drivers')
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise DriverImportError('JSON must be a list of driver objects')
+        return rows
+    reader = csv.DictReader(io.StringIO(content))
+    missing = [column for column in REQUIRED if column not in (reader.fieldnames or [])]
+    if missing:
+        raise DriverImportError(f'CSV is missing column(s): {", ".join(missing)}')
+    return list(reader)
+
+
+def _clean(row):
+    """Per-row checks that need no database access"""
+    for field in REQUIRED:
+        if not str(row.raw.get(field) or '').strip():
+            row.errors[field] = 'This field is required'
+    if row.email and 'email' not in row.errors:
+        try:
+            validate_email(row.email)
+        except DjangoValidationError:
+            row.errors['email'] = 'Enter a valid email address'
+    if len(row.license_number) > Driver._meta.get_field('license_number').max_length:
+        row.errors['licenseNumber'] = 'Must be at most 20 characters'
+    if len(row.phone_number) > User._meta.get_field('phone_number').max_length:
+        row.errors['phone'] = 'Must be at most 20 characters'
+    expiry = str(row.raw.get('licenseExpiry') or '').strip()
+    if expiry:
+        try:
+            row.license_expiry = date.fromisoformat(expiry)
+        except ValueError:
+            row.errors['licenseExpiry'] = 'Must be a date (YYYY-MM-DD)'
+    experience = str(row.raw.get('experienceYears') or '').strip()
+    if experience:
+        try:
+            row.experience_years = int(experience)
+            if row.experience_years < 0:
+                raise ValueError
+        except ValueError:
+            row.errors['experienceYears'] = 'Must be a non-negative integer'
+
+
+def validate_rows(raw_rows):
+    """
+    Clean all rows and flag duplicates, within the upload and against the
+    database, with one query per unique column. Returns the ImportRows.
+    """
+    rows = [ImportRow(number, raw) for number, raw in enumerate(raw_rows, start=1)]
+    for row in rows:
+        _clean(row)
+
+    # Duplicates inside the upload: the first occurrence wins
+    seen_emails, seen_licenses = {}, {}
+    for row in rows:
+        email, license_number = row.email.lower(), row.license_number.lower()
+        if email and email in seen_emails:
+            row.errors.setdefault('email', f'Duplicate of row {seen_emails[email]}')
+        seen_emails.setdefault(email, row.number)
+        if license_number and license_number in seen_licenses:
+            row.errors.setdefault('licenseNumber', f'Duplicate of row {seen_licenses[license_number]}')
+        seen_licenses.setdefault(license_number, row.number)
+
+    # Compared lowercased on both sides, whatever the column collation
+    candidates = [row for row in rows if not row.errors]
+    taken_emails = set(
+        User.objects.annotate(email_lower=Lower('email'))
+        .filter(email_lower__in=[row.email.lower() for row in candidates])
+        .values_list('email_lower', flat=True)
+    )
+    taken_licenses = set(
+        Driver.objects.annotate(license_lower=Lower('license_number'))
+        .filter(license_lower__in=[row.license_number.lower() for row in candidates])
+        .values_list('license_lower', flat=True)
+    )
+    for row in candidates:
+        if row.email.lower() in taken_emails:
+            row.errors['email'] = 'Email already exists'
+        if row.license_number.lower() in taken_licenses:
+            row.errors['licenseNumber'] = 'License number already registered'
+
+    # Usernames follow create(): the email's local part, or the whole email if that's taken
+    candidates = [row for row in rows if not row.errors]
+    local_parts = {row.email.split('@')[0] for row in candidates}
+    taken_usernames = set(User.objects.filter(username__in=local_parts).values_list('username', flat=True))
+    for row in candidates:
+        username = row.email.split('@')[0]
+        if username in taken_usernames:
+            username = row.email
+        row.username = username
+        taken_usernames.add(username)
+    full_emails = {row.username for row in candidates if row.username == row.email}
+    clashes = set(User.objects.filter(username__in=full_emails).values_list('username', flat=True))
+    for row in candidates:
+        if row.username in clashes:
+            row.errors['email'] = 'An account with this username already exists'
+    return rows
+
+
+def _hash_many(passwords):
+    return [make_password(password) for password in passwords]
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    make_password() for every password, spread over a thread pool.
+
+    PBKDF2 (hashlib), argon2-cffi and bcrypt release the GIL while hashing,
+    so threads run in parallel without forking the (threaded) web worker;
+    with `workers` <= 1 (or few passwords) it runs inline.
+    """
+    if workers is None:
+        workers = getattr(settings, 'DRIVER_IMPORT_HASH_WORKERS', None) or os.cpu_count() or 1
+    workers = min(workers, len(passwords))
+    if workers <= 1:
+        return _hash_many(passwords)
+    chunk = -(-len(passwords) // workers)
+    chunks = [passwords[start:start + chunk] for start in range(0, len(passwords), chunk)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return [hashed for hashed_chunk in pool.map(_hash_many, chunks) for hashed in hashed_chunk]
+
+
+def _insert_batch(batch, hashes, now):
+    with transaction.atomic():
+        User.objects.bulk_create([
+            User(
+                username=row.username,
+                email=row.email,
+                first_name=row.first_name,
+                last_name=row.last_name,
+                password=hashed,
+                role='driver',
+                phone_number=row.phone_number,
+                is_active=True,
+            )
+            for row, hashed in zip(batch, hashes)
+        ])
+        # MySQL's bulk_create doesn't return primary keys, so read them back
+        user_ids = dict(
+            User.objects.filter(username__in=[row.username for row in batch]).values_list('username', 'id')
+        )
+        Driver.objects.bulk_create([
+            Driver(
+                user_id=user_ids[row.username],
+                license_number=row.license_number,
+                license_expiry=row.license_expiry,
+                experience_years=row.experience_years,
+                is_verified=True,  # Manager-created drivers are verified, as in create()
+                verification_date=now,
+                status='available',
+            )
+            for row in batch
+        ])
+        driver_ids = dict(
+            Driver.objects.filter(user_id__in=user_ids.values()).values_list('user_id', 'id')
+        )
+    for row in batch:
+        row.user_id = user_ids[row.username]
+        row.driver_id = driver_ids[row.user_id]
+
+
+def import_drivers(raw_rows, dry_run=False, batch_size=None):
+    """
+    Validate and create drivers; returns the ImportRows with per-row outcomes.
+
+    Valid rows are created even when others fail. Each batch is one
+    transaction, so a conflicting concurrent signup only fails its own batch.
+    """
+    max_rows = getattr(settings, 'DRIVER_IMPORT_MAX_ROWS', 5000)
+    if not raw_rows:
+        raise DriverImportError('No rows to import')
+    if len(raw_rows) > max_rows:
+        raise DriverImportError(f'At most {max_rows} rows per import')
+
+    rows = validate_rows(raw_rows)
+    valid = [row for row in rows if not row.errors]
+    if dry_run or not valid:
+        return rows
+
+    for row in valid:
+        if row.generated_password:
+            row.password = secrets.token_urlsafe(9)
+    hashes = hash_passwords([row.password for row in valid])
+
+    batch_size = batch_size or getattr(settings, 'DRIVER_IMPORT_BATCH_SIZE', 500)
+    now = timezone.now()
+    created = 0
+    for start in range(0, len(valid), batch_size):
+        batch = valid[start:start + batch_size]
+        try:
+            _insert_batch(batch, hashes[start:start + batch_size], now)
+            created += len(batch)
+        except IntegrityError as e:
+            logger.warning('Driver import batch at row %s failed: %s', batch[0].number, e)
+            for row in batch:
+                row.errors['row'] = 'Conflicts with a driver or user created meanwhile; retry this row'
+
+    # bulk_create() skips model signals, so refresh the cached lists here
+    if created:
+        bump_namespace('users', 'drivers')
+    return rows
@@ -0,0 +1,156 @@
+"""
+Expiry sweeper for unpaid pending bookings
+Cancels pending bookings whose payment never completed, in small batches
+driven by the (status, payment_status, created_at) index.
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from config.cache import bump_namespace
+from .models import Booking
+from .platform_settings import get_platform_setting
+
+logger = logging.getLogger(__name__)
+
+# payment_status -> platform setting holding the timeout in seconds, measured from created_at
+EXPIRY_RULES = {
+    'pending': 'pending_booking_timeout',      # checkout never started
+    'failed': 'pending_payment_timeout',       # payment failed and was not retried
+    'initiated': 'pending_booking_hold_time',  # checkout opened, slot held for payment
+}
+
+
+class SweepResult:
+    """Counters for a single sweep"""
+
+    def __init__(self):
+        self.scanned = 0
+        self.cancelled = 0
+        self.batches = 0
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.cancelled / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (
+            f'cancelled {self.cancelled} of {self.scanned} expired bookings '
+            f'in {self.batches} batch(es), {self.elapsed:.2f}s ({self.rows_per_second:.0f} rows/s)'
+        )
+
+
+def expired_bookings(payment_status, now=None):
+    """Pending bookings with `payment_status` older than that status's timeout"""
+    timeout = get_platform_setting(EXPIRY_RULES[payment_status])
+    cutoff = (now or timezone.now()) - timedelta(seconds=timeout)
+    return Booking.objects.filter(
+        status='pending',
+        payment_status=payment_status,
+        created_at__lt=cutoff,
+    )
+
+
+def sweep_expired_bookings(batch_size=500, dry_run=False, now=None):
+    """
+    Cancel expired pending bookings batch by batch.
+
+    Each batch reads at most `batch_size` ids from the index and cancels them
+    with one conditional UPDATE in its own short transaction, so a payment
+    verified mid-sweep (status no longer 'pending') is never overwritten.
+    """
+    result = SweepResult()
+    started = time.monotonic()
+    now = now or timezone.now()
+    touched_days = set()
+
+    for payment_status in EXPIRY_RULES:
+        queryset = expired_bookings(payment_status, now).order_by('created_at', 'id')
+        last = None
+        while True:
+            batch = queryset
+            if last:
+                # Walk the index in (created_at, id) order without re-reading earlier batches
+                batch = batch.filter(
+                    Q(created_at__gt=last[1]) | Q(created_at=last[1], id__gt=last[0])
+                )
+            rows = list(batch.values_list('id', 'created_at')[:batch_size])
+            if not rows:
+                break
+            last = rows[-1]
+            result.scanned += len(rows)
+            result.batches += 1
+
+            if not dry_run:
+                ids = [booking_id for booking_id, _ in rows]
+                with transaction.atomic():
+                    cancelled = Booking.objects.filter(
+                        id__in=ids,
+                        status='pending',
+                        payment_status=payment_status,
+                    ).update(status='cancelled', updated_at=timezone.now())
+                result.cancelled += cancelled
+                touched_days.update(timezone.localtime(created_at).date() for _, created_at in rows)
+
+            if len(rows) < batch_size:
+                break
+
+    # update() skips model signals, so refresh the derived data here
+    if result.cancelled:
+        bump_namespace('bookings')
+        if getattr(settings, 'BOOKING_STATS_ROLLUP', False):
+            from .stats import refresh_daily_stats
+            refresh_daily_stats(touched_days)
+
+    result.elapsed = time.monotonic() - started
+    return result
+
+
+_sweeper_thread = None
+
+
+def _sweeper_loop(interval, batch_size):
+    while True:
+        time.sleep(interval)
+        close_old_connections()
+        try:
+            # Admins can switch auto-cancel off at runtime from the settings page
+            if not get_platform_setting('auto_cancel_expired_pending'):
+                continue
+            result = sweep_expired_bookings(batch_size=batch_size)
+            if result.cancelled:
+                logger.info('Pending booking sweep: %s', result)
+        except Exception:
+            logger.exception('Pending booking sweep failed')
+        finally:
+            close_old_connections()
+
+
+def start_sweeper_thread(interval=None, batch_size=500):
+    """
+    Run the sweeper every `interval` seconds in a daemon thread of this process.
+
+    Does nothing when AUTO_CANCEL_EXPIRED_PENDING is off or the interval is 0;
+    the auto_cancel_expired_pending platform setting pauses it at runtime.
+    """
+    global _sweeper_thread
+    if interval is None:
+        interval = getattr(settings, 'PENDING_SWEEPER_INTERVAL', 0)
+    if not interval or not getattr(settings, 'AUTO_CANCEL_EXPIRED_PENDING', True):
+        return None
+    if _sweeper_thread is None or not _sweeper_thread.is_alive():
+        _sweeper_thread = threading.Thread(
+            target=_sweeper_loop,
+            args=(interval, batch_size),
+            name='pending-booking-sweeper',
+            daemon=True,
+        )
+        _sweeper_thread.start()
+    return _sweeper_thread
@@ -0,0 +1,235 @@
+"""
+Streaming admin exports
+Bookings, payments and users as CSV or NDJSON, generated row by row from
+values() projections and walked in (created_at, id) keyset chunks, so memory
+stays flat whatever the table size and every query is a short index range
+scan (MySQL drivers buffer whole result sets, so QuerySet.iterator() alone
+would not stream there).
+"""
+import csv
+from datetime import date, datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from users.models import User
+from .filters import BookingFilterBackend, _choices
+from .models import Booking, Payment
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class ExportSpec:
+    """What one export reads: base queryset, (column, ORM lookup) pairs and extra filters"""
+
+    def __init__(self, queryset, columns, filters=None):
+        self.queryset = queryset
+        self.columns = columns
+        self.filters = filters or {}
+
+
+def _boolean(raw):
+    if raw.lower() not in ('true', 'false'):
+        raise ValueError('must be "true" or "false"')
+    return raw.lower() == 'true'
+
+
+EXPORTS = {
+    'bookings': ExportSpec(
+        Booking.objects.all,
+        [
+            ('id', 'id'),
+            ('created_at', 'created_at'),
+            ('user_id', 'user_id'),
+            ('user_email', 'user__email'),
+            ('booking_type', 'booking_type'),
+            ('status', 'status'),
+            ('payment_status', 'payment_status'),
+            ('driver_option', 'driver_option'),
+            ('assigned_driver_id', 'assigned_driver_id'),
+            ('number_of_days', 'number_of_days'),
+            ('pickup_date', 'pickup_date'),
+            ('pickup_time', 'pickup_time'),
+            ('pickup_location', 'pickup_location'),
+            ('dropoff_location', 'dropoff_location'),
+            ('total_amount', 'total_amount'),
+            ('payment_method', 'payment_method'),
+            ('razorpay_order_id', 'razorpay_order_id'),
+            ('razorpay_payment_id', 'razorpay_payment_id'),
+        ],
+    ),
+    'payments': ExportSpec(
+        Payment.objects.all,
+        [
+            ('id', 'id'),
+            ('created_at', 'created_at'),
+            ('booking_id', 'booking_id'),
+            ('user_email', 'booking__user__email'),
+            ('amount', 'amount'),
+            ('tax', 'tax'),
+            ('discount', 'discount'),
+            ('total_amount', 'total_amount'),
+            ('status', 'status'),
+            ('payment_method', 'payment_method'),
+            ('gateway_name', 'gateway_name'),
+            ('gateway_transaction_id', 'gateway_transaction_id'),
+            ('gateway_order_id', 'gateway_order_id'),
+            ('invoice_number', 'invoice__invoice_number'),
+        ],
+        {'status': ('status__in', _choices(Payment.STATUS_CHOICES))},
+    ),
+    'users': ExportSpec(
+        User.objects.all,
+        [
+            ('id', 'id'),
+            ('created_at', 'created_at'),
+            ('email', 'email'),
+            ('first_name', 'first_name'),
+            ('last_name', 'last_name'),
+            ('role', 'role'),
+            ('phone_number', 'phone_number'),
+            ('is_active', 'is_active'),
+            ('is_verified', 'is_verified'),
+            ('last_login', 'last_login'),
+        ],
+        {
+            'role': ('role__in', _choices(User.ROLE_CHOICES)),
+            'is_active': ('is_active', _boolean),
+        },
+    ),
+}
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def export_queryset(name, request):
+    """
+    Filtered queryset for an export; raises ValidationError on bad params.
+
+    Every export takes date_from/date_to (YYYY-MM-DD, inclusive, on
+    created_at); bookings take the booking list filters, the others their own.
+    """
+    spec = EXPORTS[name]
+    queryset = spec.queryset()
+    params = request.query_params
+    errors = {}
+
+    bounds = {}
+    for param in ('date_from', 'date_to'):
+        if params.get(param):
+            try:
+                bounds[param] = date.fromisoformat(params[param])
+            except ValueError:
+                errors[param] = 'must be a date (YYYY-MM-DD)'
+    if 'date_from' in bounds:
+        queryset = queryset.filter(created_at__gte=_day_start(bounds['date_from']))
+    if 'date_to' in bounds:
+        queryset = queryset.filter(created_at__lt=_day_start(bounds['date_to'] + timedelta(days=1)))
+
+    conditions = {}
+    for param, (lookup, parse) in spec.filters.items():
+        raw = params.get(param)
+        if raw in (None, ''):
+            continue
+        try:
+            value = parse(raw)
+        except ValueError as e:
+            errors[param] = str(e)
+            continue
+        if lookup.endswith('__in') and len(value) == 1:
+            lookup, value = lookup[:-len('__in')], value[0]
+        conditions[lookup] = value
+
+    if errors:
+        raise ValidationError({'status': 'error', 'message': 'Invalid export parameters', 'errors': errors})
+    if name == 'bookings':
+        queryset = BookingFilterBackend().filter_queryset(request, queryset, None)
+    return queryset.filter(**conditions)
+
+
+def iter_values(queryset, lookups, chunk_size=2000):
+    """values_list() rows in (created_at, id) order, one keyset-bounded query per chunk"""
+    lookups = list(lookups)
+    created_index, id_index = lookups.index('created_at'), lookups.index('id')
+    queryset = queryset.order_by('created_at', 'id').values_list(*lookups)
+    last = None
+    while True:
+        chunk = queryset
+        if last:
+            chunk = chunk.filter(Q(created_at__gt=last[0]) | Q(created_at=last[0], id__gt=last[1]))
+        rows = list(chunk[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last = (rows[-1][created_index], rows[-1][id_index])
+
+
+class _Echo:
+    """File-like object whose write() hands back the line csv.writer produced"""
+
+    def write(self, value):
+        return value
+
+
+# Spreadsheet formula prefixes; string cells starting with one are quoted so
+# spreadsheets won't evaluate them. '+' and '-' included even before a digit:
+# "-2+3+cmd|..." is a formula too. Numbers are not strings and are left alone.
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_cell(value):
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def stream_export(name, queryset, fmt, chunk_size=2000):
+    """Yield the export as CSV lines (header first) or NDJSON lines, in chunk-sized pieces"""
+    columns = EXPORTS[name].columns
+    headers = [column for column, _ in columns]
+    rows = iter_values(queryset, [lookup for _, lookup in columns], chunk_size)
+
+    if fmt == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(headers)
+
+        def encode(row):
+            return writer.writerow([_csv_cell(value) for value in row])
+    else:
+        encoder = DjangoJSONEncoder(separators=(',', ':'))
+
+        def encode(row):
+            return encoder.encode(dict(zip(headers, row))) + '\n'
+
+    buffer = []
+    for row in rows:
+        buffer.append(encode(row))
+        if len(buffer) >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def export_filename(name, fmt):
+    return f'{name}-{timezone.localtime():%Y%m%d-%H%M%S}.{fmt}'
+
+
+def parse_format(raw):
+    fmt = (raw or 'csv').lower()
+    if fmt not in FORMATS:
+        raise ValidationError({
+            'status': 'error',
+            'message': f'Unsupported export format {fmt!r}; use one of {", ".join(FORMATS)}',
+        })
+    return fmt
+
@@ -0,0 +1,127 @@
+"""
+Payment ledger
+A confirmed payment is recorded as an insert-only Payment row plus its
+Invoice, in the same transaction that marks the booking paid. Payment
+reporting reads this narrow table instead of scanning bookings; corrections
+go through Refund rows, ledger rows are never edited.
+"""
+import logging
+
+from django.utils import timezone
+
+from .models import Invoice, Payment, Refund
+
+logger = logging.getLogger(__name__)
+
+
+def invoice_number(booking):
+    """One invoice per paid booking, so the number is derived from the booking"""
+    return f'INV-{booking.pk:08d}'
+
+
+def apply_captured_payment(booking, payment_id):
+    """
+    Mark a locked booking paid, in memory; shared by verify_payment and the
+    webhook worker so both treat a payment the same way.
+
+    A pending booking is confirmed. A booking the expiry sweeper already
+    cancelled stays cancelled: the payment is still recorded in the ledger
+    and needs a refund. Returns (booking changed, refund required).
+    """
+    changed = False
+    if booking.payment_status != 'completed':
+        booking.payment_status = 'completed'
+        booking.razorpay_payment_id = payment_id or booking.razorpay_payment_id
+        changed = True
+    elif not booking.razorpay_payment_id:
+        # Already paid: the first recorded payment id is kept
+        booking.razorpay_payment_id = payment_id
+        changed = True
+    if booking.status == 'pending':
+        booking.status = 'confirmed'
+        changed = True
+    refund_required = booking.status == 'cancelled'
+    if refund_required:
+        logger.warning('Payment %s captured for cancelled booking %s; refund required', payment_id, booking.id)
+    return changed, refund_required
+
+
+def record_payments(entries):
+    """
+    Write Payment + Invoice rows for newly paid bookings.
+
+    `entries` is an iterable of (booking, gateway payment id, signature or
+    None). Bookings that already have a ledger row (e.g. recorded by the
+    webhook worker before the browser's verify call) are skipped, so this is
+    safe to call more than once. Call it inside the transaction that updates
+    the bookings, with the bookings locked. Returns the new Payment rows.
+    """
+    pending = {}
+    for booking, payment_id, signature in entries:
+        pending.setdefault(booking.pk, (booking, payment_id, signature))
+    if not pending:
+        return []
+
+    recorded = set(Payment.objects.filter(booking_id__in=pending).values_list('booking_id', flat=True))
+    new = [
+        Payment(
+            booking=booking,
+            amount=booking.total_amount,
+            total_amount=booking.total_amount,
+            payment_method='razorpay',
+            gateway_name='razorpay',
+            gateway_transaction_id=payment_id,
+            gateway_order_id=booking.razorpay_order_id,
+            gateway_signature=signature,
+            status='completed',
+        )
+        for booking_id, (booking, payment_id, signature) in pending.items()
+        if booking_id not in recorded
+    ]
+    if not new:
+        return []
+    Payment.objects.bulk_create(new)
+
+    # MySQL's bulk_create doesn't set primary keys, so rows are re-read before use as FKs
+    payments = list(Payment.objects.filter(booking_id__in=[payment.booking_id for payment in new]))
+    create_invoices(payments, {booking_id: entry[0] for booking_id, entry in pending.items()})
+    return payments
+
+
+def create_invoices(payments, bookings):
+    """Invoice rows for saved payments; `bookings` maps booking id -> Booking"""
+    Invoice.objects.bulk_create([
+        Invoice(
+            booking_id=payment.booking_id,
+            payment=payment,
+            customer_id=bookings[payment.booking_id].user_id,
+            invoice_number=invoice_number(bookings[payment.booking_id]),
+            subtotal=payment.amount,
+            total_amount=payment.total_amount,
+            payment_status='paid',
+            description=f'{bookings[payment.booking_id].get_booking_type_display()} booking #{payment.booking_id}',
+        )
+        for payment in payments
+    ])
+
+
+def void_payment(payment, user, reason=None):
+    """
+    Reverse a ledger payment with a full, admin-approved Refund row.
+
+    The Payment and its Invoice stay as recorded, so re-recording the
+    booking can't collide with its invoice number. Call it inside a
+    transaction with the payment locked. Returns the Refund, or None if the
+    payment already has an open or completed refund.
+    """
+    if payment.refunds.exclude(status='rejected').exists():
+        return None
+    return Refund.objects.create(
+        booking_id=payment.booking_id,
+        payment=payment,
+        refund_amount=payment.total_amount,
+        refund_reason=reason or 'Voided by admin',
+        status='approved',
+        approved_by=user,
+        approved_date=timezone.now(),
+    )
@@ -0,0 +1,73 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from bookings.query_plans import HOT_QUERIES, full_scans, seed_plan_data
+from users.models import User
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN the hot booking/driver/user/car querysets and fail if any '
+        'of them reads a table with a full scan'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--no-seed',
+            action='store_true',
+            help='Explain against the existing data (e.g. after seed_load) instead of seeding in a rolled-back transaction',
+        )
+        parser.add_argument('--bookings', type=int, default=5000, help='Bookings to seed (default 5000)')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan, not only failures')
+
+    def handle(self, *args, **options):
+        if options['no_seed']:
+            failures = self._audit(self._context(), options['verbose_plans'])
+        else:
+            failures = []
+            try:
+                with transaction.atomic():
+                    context = seed_plan_data(options['bookings'])
+                    failures = self._audit(context, options['verbose_plans'])
+                    raise _Rollback()
+            except _Rollback:
+                pass
+
+        if failures:
+            raise CommandError(f'{len(failures)} query plan(s) use a full table scan: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS(f'All {len(HOT_QUERIES)} hot query plans use indexes'))
+
+    def _audit(self, context, verbose):
+        failures = []
+        for name, build in HOT_QUERIES:
+            try:
+                scans, plan = full_scans(build(context))
+            except NotImplementedError as e:
+                raise CommandError(str(e))
+            if scans:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f'{name:<42} FULL SCAN on {", ".join(scans)}'))
+            else:
+                self.stdout.write(f'{name:<42} ok')
+            if scans or verbose:
+                self.stdout.write(f'    {plan}'.replace('\n', '\n    '))
+        return failures
+
+    def _context(self):
+        manager = User.objects.filter(role='manager').first()
+        customer = User.objects.filter(role='customer').first()
+        if manager is None or customer is None:
+            raise CommandError('--no-seed needs at least one manager and one customer in the database')
+        return {
+            'manager': manager,
+            'customer': customer,
+            'today': date.today(),
+            'now': timezone.now(),
+        }
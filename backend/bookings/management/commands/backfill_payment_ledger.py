@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from bookings.ledger import create_invoices, record_payments
+from bookings.models import Booking, Payment
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the payment ledger for payments made before it existed: Payment and '
+        'Invoice rows for paid bookings without one, and Invoices for completed '
+        'payments without one'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per transaction (default 500)')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        unrecorded = Booking.objects.filter(payment_status='completed', payment__isnull=True).order_by('id')
+        last_id, payments = 0, 0
+        while True:
+            with transaction.atomic():
+                batch = list(unrecorded.filter(id__gt=last_id).select_for_update()[:batch_size])
+                if not batch:
+                    break
+                last_id = batch[-1].id
+                payments += len(record_payments(
+                    (booking, booking.razorpay_payment_id, booking.razorpay_signature) for booking in batch
+                ))
+
+        uninvoiced = (
+            Payment.objects.filter(status='completed', booking__isnull=False, invoice__isnull=True)
+            .select_related('booking').order_by('id')
+        )
+        last_id, invoices = 0, 0
+        while True:
+            with transaction.atomic():
+                batch = list(uninvoiced.filter(id__gt=last_id)[:batch_size])
+                if not batch:
+                    break
+                last_id = batch[-1].id
+                create_invoices(batch, {payment.booking_id: payment.booking for payment in batch})
+                invoices += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Recorded {payments} payment(s) and {invoices} invoice(s) for older payments in the ledger'
+        ))
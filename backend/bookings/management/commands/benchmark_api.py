@@ -0,0 +1,277 @@
+import json
+import math
+import re
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver
+from rest_framework.routers import APIRootView
+from rest_framework.test import APIClient
+
+from bookings.models import Booking, Driver, Payment
+from carsales.models import Car
+from users.models import User
+
+# URL prefixes whose routes are benchmarked (users, bookings, carsales, manager_admin_urls)
+ROUTE_PREFIXES = ('api/users/', 'api/bookings/', 'api/cars/', 'api/manager/')
+
+# Detail routes: viewset class name -> function(context) returning a pk to request
+DETAIL_OBJECTS = {
+    'BookingViewSet': lambda ctx: Booking.objects.order_by('-id').values_list('id', flat=True).first(),
+    'ManagerBookingViewSet': lambda ctx: Booking.objects.filter(status='pending')
+    .order_by('-id').values_list('id', flat=True).first(),
+    'ManagerTaxiRidesViewSet': lambda ctx: Booking.objects.filter(booking_type='taxi')
+    .order_by('-id').values_list('id', flat=True).first(),
+    'AdminPaymentViewSet': lambda ctx: Payment.objects.order_by('-id').values_list('id', flat=True).first(),
+    'UserViewSet': lambda ctx: ctx['customer'].pk,
+    'AdminUserViewSet': lambda ctx: ctx['customer'].pk,
+    'CarViewSet': lambda ctx: Car.objects.filter(status='available').order_by('-id').values_list('id', flat=True).first(),
+    'ManagerCarManagementViewSet': lambda ctx: Car.objects.filter(seller=ctx['manager'])
+    .order_by('-id').values_list('id', flat=True).first(),
+    'AdminCarManagementViewSet': lambda ctx: Car.objects.order_by('-id').values_list('id', flat=True).first(),
+    'ManagerDriverViewSet': lambda ctx: Driver.objects.order_by('-id').values_list('id', flat=True).first(),
+    'AdminDriverViewSet': lambda ctx: Driver.objects.order_by('-id').values_list('id', flat=True).first(),
+}
+
+# Query strings required by specific actions
+ACTION_PARAMS = {
+    'available_drivers': lambda ctx: f'pickup_date={date.today() + timedelta(days=7)}&number_of_days=2',
+}
+
+# Routes whose role can't be told from the path
+ROUTE_ROLES = {
+    '/api/cars/my_listings/': 'manager',
+}
+
+_GROUP = re.compile(r'\(\?P<(\w+)>[^)]*\)')
+
+
+def iter_routes(patterns=None, prefix=''):
+    """Yield (path regex, view callback) for every URL pattern, depth first"""
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_routes(pattern.url_patterns, prefix + str(pattern.pattern))
+        elif isinstance(pattern, URLPattern):
+            yield prefix + str(pattern.pattern), pattern.callback
+
+
+def role_for(path):
+    """Role to authenticate as: manager routes reject admins and vice versa"""
+    if path in ROUTE_ROLES:
+        return ROUTE_ROLES[path]
+    if '/admin/' in path:
+        return 'admin'
+    if path.startswith('/api/manager/') or path.startswith('/api/bookings/manager/'):
+        return 'manager'
+    return 'admin'
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def fetch(client, url):
+    """
+    GET `url` and return (response, body size in bytes).
+
+    Streamed bodies (the admin exports) are consumed here, so their queries
+    and generation time are part of the measurement.
+    """
+    response = client.get(url)
+    if response.streaming:
+        return response, sum(len(chunk) for chunk in response.streaming_content)
+    return response, len(response.content)
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark every GET route in the users, bookings, carsales and manager '
+        'URL confs with the test client: p50/p95/p99 latency, queries and bytes '
+        'per request. Run against seeded data (see seed_load).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per route (default 20)')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per route first (default 2)')
+        parser.add_argument('--filter', default='', help='Only routes whose path contains this text')
+        parser.add_argument('--no-cache', action='store_true', help='Disable the API response cache')
+        parser.add_argument('--output', help='Write results as JSON to this file')
+        parser.add_argument(
+            '--compare',
+            nargs='+',
+            metavar='FILE',
+            help='Compare to a baseline JSON file; with two files, compare them without running',
+        )
+        parser.add_argument('--threshold', type=float, default=20.0,
+                            help='Percent p95/bytes growth that counts as a regression (default 20)')
+
+    def handle(self, *args, **options):
+        compare = options['compare'] or []
+        if len(compare) > 2:
+            raise CommandError('--compare takes a baseline file and optionally a second results file')
+        if len(compare) == 2:
+            self._compare(self._load(compare[0]), self._load(compare[1]), options['threshold'])
+            return
+
+        overrides = {'API_CACHE_ENABLED': False} if options['no_cache'] else {}
+        with override_settings(**overrides):
+            report = self._run(options)
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(report, fh, indent=2, sort_keys=True)
+            self.stdout.write(f'Wrote {options["output"]}')
+        if compare:
+            self._compare(self._load(compare[0]), report, options['threshold'])
+
+    # ------------------------------------------------------------------ running
+
+    def _context(self):
+        context = {}
+        for role in ('admin', 'manager', 'customer'):
+            user = User.objects.filter(role=role, is_active=True).order_by('id').first()
+            if user is None:
+                raise CommandError(f'No active {role} user; seed data first (manage.py seed_load --scale 0.01)')
+            context[role] = user
+        return context
+
+    def _requests(self, context, path_filter):
+        """Concrete (label, url, role) for every benchmarkable GET route, plus skipped routes"""
+        requests, skipped = [], []
+        for regex, callback in iter_routes():
+            path = '/' + regex.replace('^', '').replace('$', '')
+            if not path.startswith(tuple('/' + prefix for prefix in ROUTE_PREFIXES)):
+                continue
+            view_class = getattr(callback, 'cls', None)
+            actions = getattr(callback, 'actions', None) or {}
+            if view_class is None or issubclass(view_class, APIRootView) or 'format' in regex:
+                continue
+            label = _GROUP.sub(lambda m: '{' + m.group(1) + '}', path).replace('\\', '')
+            if path_filter and path_filter not in label:
+                continue
+            if 'get' not in actions:
+                skipped.append(f'{label} ({", ".join(sorted(actions)).upper()})')
+                continue
+
+            url = label
+            if '{pk}' in url:
+                get_pk = DETAIL_OBJECTS.get(view_class.__name__)
+                pk = get_pk(context) if get_pk else None
+                if pk is None:
+                    skipped.append(f'{label} (no object to request)')
+                    continue
+                url = url.replace('{pk}', str(pk))
+            params = ACTION_PARAMS.get(actions['get'])
+            if params:
+                url = f'{url}?{params(context)}'
+            requests.append((label, url, role_for(path)))
+        return requests, skipped
+
+    def _run(self, options):
+        context = self._context()
+        host = next((h for h in settings.ALLOWED_HOSTS if h and h != '*'), 'localhost')
+        requests, skipped = self._requests(context, options['filter'])
+        if not requests:
+            raise CommandError('No GET routes matched')
+
+        results = {}
+        for label, url, role in requests:
+            client = APIClient(HTTP_HOST=host)
+            client.force_authenticate(user=context[role])
+            for _ in range(options['warmup']):
+                fetch(client, url)
+
+            timings, query_counts = [], []
+            response, size = None, 0
+            for _ in range(options['iterations']):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response, size = fetch(client, url)
+                    timings.append((time.perf_counter() - started) * 1000)
+                query_counts.append(len(queries))
+
+            timings.sort()
+            results[label] = {
+                'url': url,
+                'role': role,
+                'status': response.status_code,
+                'p50_ms': round(percentile(timings, 50), 3),
+                'p95_ms': round(percentile(timings, 95), 3),
+                'p99_ms': round(percentile(timings, 99), 3),
+                'mean_ms': round(statistics.fmean(timings), 3),
+                'queries': max(query_counts),
+                'bytes': size,
+            }
+            self._print_row(label, results[label])
+
+        for label in skipped:
+            self.stdout.write(self.style.WARNING(f'skipped {label}'))
+        return {
+            'meta': {
+                'iterations': options['iterations'],
+                'warmup': options['warmup'],
+                'cache': not options['no_cache'],
+                'database': connection.vendor,
+                'bookings': Booking.objects.count(),
+                'users': User.objects.count(),
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            },
+            'results': results,
+            'skipped': skipped,
+        }
+
+    def _print_row(self, label, row):
+        line = (
+            f'{label:<58} {row["status"]:>3}  p50 {row["p50_ms"]:8.2f}  p95 {row["p95_ms"]:8.2f}  '
+            f'p99 {row["p99_ms"]:8.2f} ms  {row["queries"]:>4} q  {row["bytes"]:>9} B'
+        )
+        self.stdout.write(line if row['status'] < 400 else self.style.ERROR(line))
+
+    # ------------------------------------------------------------------ comparing
+
+    def _load(self, path):
+        try:
+            with open(path) as fh:
+                return json.load(fh)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read {path}: {e}')
+
+    def _compare(self, baseline, current, threshold):
+        regressions = []
+        for label, now in sorted(current['results'].items()):
+            before = baseline['results'].get(label)
+            if before is None:
+                self.stdout.write(f'{label:<58} new route')
+                continue
+            problems = []
+            if before['p95_ms'] and now['p95_ms'] > before['p95_ms'] * (1 + threshold / 100):
+                problems.append(f'p95 {before["p95_ms"]:.2f} -> {now["p95_ms"]:.2f} ms')
+            if now['queries'] > before['queries']:
+                problems.append(f'queries {before["queries"]} -> {now["queries"]}')
+            if before['bytes'] and now['bytes'] > before['bytes'] * (1 + threshold / 100):
+                problems.append(f'bytes {before["bytes"]} -> {now["bytes"]}')
+            if now['status'] != before['status']:
+                problems.append(f'status {before["status"]} -> {now["status"]}')
+
+            delta = (now['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0.0
+            line = f'{label:<58} p95 {delta:+7.1f}%  queries {before["queries"]:>3} -> {now["queries"]:<3}'
+            if problems:
+                regressions.append(label)
+                self.stdout.write(self.style.ERROR(f'{line}  REGRESSION: {"; ".join(problems)}'))
+            else:
+                self.stdout.write(line)
+
+        if regressions:
+            raise CommandError(f'{len(regressions)} route(s) regressed beyond {threshold:.0f}%')
+        self.stdout.write(self.style.SUCCESS('No regressions'))
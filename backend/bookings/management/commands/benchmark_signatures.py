@@ -0,0 +1,70 @@
+import hashlib
+import hmac
+import secrets
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings.signatures import HmacSigner, payment_message
+
+
+def _naive_verify(secret, message, signature):
+    """How verify_payment used to check signatures: new HMAC per call, == compare"""
+    return hmac.new(secret.encode(), message.encode(), hashlib.sha256).hexdigest() == signature
+
+
+class Command(BaseCommand):
+    help = (
+        'Microbenchmark Razorpay signature verification: per-call HMAC with == '
+        'versus the precomputed key state with constant-time compare, single and batch'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=100000, help='Verifications per case (default 100000)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Signatures per verify_many call (default 1000)')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        for option in ('iterations', 'batch_size'):
+            if options[option] < 1:
+                raise CommandError(f"--{option.replace('_', '-')} must be a positive integer")
+        # A batch larger than the run would never complete once
+        batch_size = min(options['batch_size'], iterations)
+        secret = settings.RAZORPAY_KEY_SECRET or 'benchmark-secret'
+        signer = HmacSigner(secret)
+        payments = [
+            payment_message(f'order_{secrets.token_hex(7)}', f'pay_{secrets.token_hex(7)}')
+            for _ in range(batch_size)
+        ]
+        items = [(message, signer.sign(message)) for message in payments]
+
+        def naive():
+            for i in range(iterations):
+                message, signature = items[i % len(items)]
+                assert _naive_verify(secret, message, signature)
+
+        def precomputed():
+            for i in range(iterations):
+                message, signature = items[i % len(items)]
+                assert signer.verify(message, signature)
+
+        def batched():
+            for _ in range(iterations // len(items)):
+                assert all(signer.verify_many(items))
+
+        baseline = None
+        for label, run, count in (
+            ('per-call key, == compare', naive, iterations),
+            ('precomputed key, constant-time', precomputed, iterations),
+            (f'precomputed, batches of {len(items)}', batched, iterations // len(items) * len(items)),
+        ):
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+            per_op = elapsed / count * 1e6
+            baseline = baseline or per_op
+            self.stdout.write(
+                f'{label:<36} {count / elapsed:12,.0f} verifications/s  {per_op:6.2f} us/op  '
+                f'{baseline / per_op:5.2f}x'
+            )
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from bookings.expiry import sweep_expired_bookings
+from bookings.platform_settings import get_platform_setting
+
+
+class Command(BaseCommand):
+    help = 'Cancel pending bookings whose payment window has expired'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per UPDATE (default 500)')
+        parser.add_argument('--dry-run', action='store_true', help='Count expired bookings without cancelling them')
+        parser.add_argument(
+            '--loop',
+            type=int,
+            default=0,
+            metavar='SECONDS',
+            help='Keep running, sweeping every SECONDS',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Sweep even when auto-cancel of expired pending bookings is off',
+        )
+
+    def handle(self, *args, **options):
+        if not options['force'] and not get_platform_setting('auto_cancel_expired_pending'):
+            self.stdout.write(self.style.WARNING('Auto-cancel of expired pending bookings is off; use --force to sweep anyway'))
+            return
+
+        while True:
+            result = sweep_expired_bookings(
+                batch_size=options['batch_size'],
+                dry_run=options['dry_run'],
+            )
+            prefix = '[dry run] ' if options['dry_run'] else ''
+            self.stdout.write(self.style.SUCCESS(f'{prefix}{result}'))
+            if not options['loop']:
+                break
+            time.sleep(options['loop'])
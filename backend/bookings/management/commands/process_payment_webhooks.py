@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from bookings.models import PaymentWebhookEvent
+from bookings.webhooks import process_pending_events
+
+
+class Command(BaseCommand):
+    help = 'Apply queued Razorpay webhook events to bookings and payments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Events per transaction (default 100)')
+        parser.add_argument(
+            '--loop',
+            type=float,
+            default=0,
+            metavar='SECONDS',
+            help='Keep running, polling the queue every SECONDS when it is empty',
+        )
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Re-queue failed events (e.g. after fixing their booking) before processing',
+        )
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            requeued = PaymentWebhookEvent.objects.filter(status='failed').update(status='pending', attempts=0, last_error=None)
+            self.stdout.write(f'Re-queued {requeued} failed event(s)')
+
+        while True:
+            result = process_pending_events(batch_size=options['batch_size'])
+            if result.events or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(str(result)))
+            if not options['loop']:
+                break
+            close_old_connections()
+            # Only events waiting for a retry: give whatever made them fail time to clear
+            if result.events == result.retried:
+                time.sleep(options['loop'])
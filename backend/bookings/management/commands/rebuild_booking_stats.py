@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings.stats import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the DailyBookingStats rollup from the bookings table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help='Only rebuild days on or after this date (YYYY-MM-DD)',
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = datetime.strptime(options['since'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('Invalid --since date. Use YYYY-MM-DD')
+
+        days = rebuild_daily_stats(since=since)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt booking stats for {days} day(s)'))
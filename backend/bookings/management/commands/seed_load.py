@@ -0,0 +1,453 @@
+import random
+import time as clock
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from bookings.ledger import invoice_number
+from bookings.models import Booking, Car, Driver, Invoice, Payment, ReviewRating, Trip
+from carsales.models import Car as ListingCar
+from config.cache import bump_namespace
+from users.models import User
+
+# Default load profile: value distributions as name=weight lists. Confirmed and
+# completed bookings are always paid and pending ones unpaid, so payment_status
+# only shapes cancelled bookings.
+DEFAULT_DISTRIBUTIONS = {
+    'booking_type': 'taxi=50,local=30,premium=20',
+    'status': 'completed=45,confirmed=25,pending=15,cancelled=15',
+    'payment_status': 'completed=65,pending=15,initiated=10,failed=10',
+    'driver_option': 'with-driver=60,without-driver=40',
+}
+
+CITIES = ['Mumbai', 'Delhi', 'Bengaluru', 'Chennai', 'Kolkata', 'Hyderabad', 'Pune', 'Jaipur', 'Ahmedabad', 'Kochi']
+BRANDS = [('Toyota', 'Innova'), ('Maruti', 'Swift'), ('Hyundai', 'Creta'), ('Honda', 'City'), ('Mahindra', 'XUV700'),
+          ('Tata', 'Nexon'), ('Kia', 'Seltos'), ('BMW', '5 Series'), ('Mercedes', 'E-Class'), ('Audi', 'A6')]
+DAILY_RATE = {'taxi': (300, 1500), 'local': (1500, 4000), 'premium': (5000, 15000)}
+
+
+def parse_distribution(spec):
+    """'a=50,b=30' -> (['a', 'b'], cumulative weights) for random.choices"""
+    names, cumulative, total = [], [], 0.0
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        try:
+            weight = float(weight)
+        except ValueError:
+            raise CommandError(f'Invalid distribution entry "{part}" (expected name=weight)')
+        total += weight
+        names.append(name.strip())
+        cumulative.append(total)
+    return names, cumulative
+
+
+@contextmanager
+def preserve_timestamps(*models):
+    """Let bulk_create write the generated created_at/updated_at values"""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate production-sized synthetic data (users, drivers, fleet, bookings, '
+        'trips, payments, invoices, reviews) with bulk_create, deterministically from --seed'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50000, help='Customers (default 50000)')
+        parser.add_argument('--drivers', type=int, default=5000, help='Drivers (default 5000)')
+        parser.add_argument('--managers', type=int, default=20, help='Managers (default 20)')
+        parser.add_argument('--admins', type=int, default=2, help='Admins (default 2)')
+        parser.add_argument('--fleet', type=int, default=1000, help='Fleet cars (default 1000)')
+        parser.add_argument('--listings', type=int, default=5000, help='Car sale listings (default 5000)')
+        parser.add_argument('--bookings', type=int, default=1000000, help='Bookings (default 1000000)')
+        parser.add_argument('--trips', type=int, default=200000, help='Trips for assigned bookings (default 200000)')
+        parser.add_argument('--reviews', type=int, default=100000, help='Trip reviews (default 100000)')
+        parser.add_argument('--scale', type=float, default=1.0, help='Multiply every volume, e.g. 0.01 for a quick run')
+        parser.add_argument('--days', type=int, default=365, help='Spread created_at over this many past days')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; same seed + anchor = same data')
+        parser.add_argument('--anchor', type=date.fromisoformat, default=None,
+                            help='Date the history ends on (default today)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT (default 5000)')
+        parser.add_argument('--prefix', default='load', help='Username/email prefix marking seeded rows (default "load")')
+        parser.add_argument('--clear', action='store_true', help='Delete rows from a previous run with the same prefix first')
+        parser.add_argument('--password', default='loadtest123', help='Password shared by all seeded users')
+        for name, default in DEFAULT_DISTRIBUTIONS.items():
+            parser.add_argument(f'--{name.replace("_", "-")}-dist', dest=f'{name}_dist', default=default,
+                                help=f'{name} distribution (default "{default}")')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.prefix = options['prefix']
+        self.dist = {name: parse_distribution(options[f'{name}_dist']) for name in DEFAULT_DISTRIBUTIONS}
+        scale = options['scale']
+        volume = {
+            key: max(1, int(options[key] * scale)) if options[key] else 0
+            for key in ('users', 'drivers', 'managers', 'admins', 'fleet', 'listings', 'bookings', 'trips', 'reviews')
+        }
+
+        anchor = options['anchor'] or timezone.localdate()
+        self.end = timezone.make_aware(datetime.combine(anchor, time(23, 59)))
+        self.span_seconds = options['days'] * 86400
+
+        if User.objects.filter(username__startswith=f'{self.prefix}-').exists():
+            if not options['clear']:
+                raise CommandError(f'Seeded rows with prefix "{self.prefix}" exist; pass --clear or another --prefix')
+            self._clear()
+
+        started = clock.monotonic()
+        password = make_password(options['password'])  # hashed once, shared by every seeded user
+        with preserve_timestamps(User, Driver, Car, ListingCar, Booking, Trip, Payment, Invoice, ReviewRating):
+            customers = self._seed_users('customer', volume['users'], password)
+            managers = self._seed_users('manager', volume['managers'], password)
+            self._seed_users('admin', volume['admins'], password)
+            fleet = self._seed_fleet(volume['fleet'])
+            drivers = self._seed_drivers(volume['drivers'], password, fleet)
+            self._seed_listings(volume['listings'], managers)
+            self._seed_bookings(volume['bookings'], customers, drivers)
+            trips = self._seed_trips(volume['trips'], fleet)
+            self._seed_payments()
+            self._seed_invoices()
+            self._seed_reviews(volume['reviews'], trips)
+
+        # bulk_create skips model signals: refresh derived data once at the end
+        bump_namespace('users', 'drivers', 'bookings', 'trips', 'cars')
+        if getattr(settings, 'BOOKING_STATS_ROLLUP', False):
+            from bookings.stats import rebuild_daily_stats
+            self.stdout.write(f'Rebuilt {rebuild_daily_stats()} daily stats rows')
+        self.stdout.write(self.style.SUCCESS(f'Seeded load profile in {clock.monotonic() - started:.1f}s'))
+
+    # ------------------------------------------------------------------ helpers
+
+    def _timestamp(self):
+        return self.end - timedelta(seconds=self.rng.randrange(self.span_seconds))
+
+    def _pick(self, name, k=1):
+        names, cumulative = self.dist[name]
+        picked = self.rng.choices(names, cum_weights=cumulative, k=k)
+        return picked if k > 1 else picked[0]
+
+    def _insert(self, model, rows, label):
+        """bulk_create `rows` (a generator) in batches, one transaction per batch"""
+        started = clock.monotonic()
+        inserted = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                with transaction.atomic():
+                    model.objects.bulk_create(batch)
+                inserted += len(batch)
+                batch = []
+        if batch:
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+            inserted += len(batch)
+        elapsed = clock.monotonic() - started
+        rate = inserted / elapsed if elapsed else 0
+        self.stdout.write(f'{label:<15} {inserted:>9} rows in {elapsed:6.1f}s ({rate:,.0f} rows/s)')
+        return inserted
+
+    def _new_ids(self, model, after_id, **filters):
+        # bulk_create doesn't return primary keys on MySQL, so read back the new id range
+        return list(
+            model.objects.filter(id__gt=after_id, **filters).order_by('id').values_list('id', flat=True)
+        )
+
+    def _max_id(self, model):
+        return model.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+    def _clear(self):
+        self.stdout.write(f'Clearing rows seeded with prefix "{self.prefix}"...')
+        seeded_users = User.objects.filter(username__startswith=f'{self.prefix}-')
+        ReviewRating.objects.filter(reviewer__in=seeded_users).delete()
+        Invoice.objects.filter(customer__in=seeded_users).delete()
+        Payment.objects.filter(booking__user__in=seeded_users).delete()
+        Trip.objects.filter(customer__in=seeded_users).delete()
+        Booking.objects.filter(user__in=seeded_users).delete()
+        ListingCar.objects.filter(seller__in=seeded_users).delete()
+        Driver.objects.filter(user__in=seeded_users).delete()
+        Car.objects.filter(registration_number__startswith=f'{self.prefix.upper()}-').delete()
+        seeded_users.delete()
+
+    # ------------------------------------------------------------------ tables
+
+    def _seed_users(self, role, count, password):
+        after = self._max_id(User)
+
+        def rows():
+            for i in range(count):
+                created = self._timestamp()
+                yield User(
+                    username=f'{self.prefix}-{role}-{i}',
+                    email=f'{self.prefix}-{role}-{i}@example.com',
+                    password=password,
+                    first_name=role.title(),
+                    last_name=str(i),
+                    role=role,
+                    is_driver=role == 'driver',
+                    city=self.rng.choice(CITIES),
+                    phone_number=f'9{self.rng.randrange(10 ** 9):09d}',
+                    date_joined=created,
+                    created_at=created,
+                    updated_at=created,
+                )
+
+        self._insert(User, rows(), f'{role} users')
+        return self._new_ids(User, after, role=role)
+
+    def _seed_fleet(self, count):
+        after = self._max_id(Car)
+        car_types = ['taxi', 'local', 'premium', 'suv', 'luxury']
+
+        def rows():
+            for i in range(count):
+                brand, model = self.rng.choice(BRANDS)
+                created = self._timestamp()
+                yield Car(
+                    registration_number=f'{self.prefix.upper()}-{i:06d}',
+                    brand=brand,
+                    model=model,
+                    year=self.rng.randint(2015, 2025),
+                    color=self.rng.choice(['White', 'Black', 'Silver', 'Red', 'Blue']),
+                    capacity=self.rng.choice([4, 5, 7]),
+                    fuel_type=self.rng.choice(['Petrol', 'Diesel', 'CNG', 'Electric']),
+                    car_type=self.rng.choice(car_types),
+                    daily_rental_price=Decimal(self.rng.randrange(1500, 15000)),
+                    current_location=self.rng.choice(CITIES),
+                    total_km=self.rng.randrange(200000),
+                    acquired_date=created.date(),
+                    created_at=created,
+                    updated_at=created,
+                )
+
+        self._insert(Car, rows(), 'fleet')
+        return self._new_ids(Car, after)
+
+    def _seed_drivers(self, count, password, fleet):
+        user_ids = self._seed_users('driver', count, password)
+        after = self._max_id(Driver)
+        statuses = ['available'] * 6 + ['assigned'] * 2 + ['off_duty', 'on_break']
+
+        def rows():
+            for i, user_id in enumerate(user_ids):
+                created = self._timestamp()
+                yield Driver(
+                    user_id=user_id,
+                    license_number=f'{self.prefix.upper()}{i:08d}'[:20],
+                    license_expiry=date(2030, 1, 1) + timedelta(days=self.rng.randrange(1500)),
+                    experience_years=self.rng.randrange(25),
+                    average_rating=Decimal(self.rng.randrange(300, 501)) / 100,
+                    assigned_vehicle_id=self.rng.choice(fleet) if fleet and self.rng.random() < 0.5 else None,
+                    status=self.rng.choice(statuses),
+                    is_verified=self.rng.random() < 0.9,
+                    created_at=created,
+                    updated_at=created,
+                )
+
+        self._insert(Driver, rows(), 'drivers')
+        return self._new_ids(Driver, after)
+
+    def _seed_listings(self, count, managers):
+        if not managers:
+            return
+
+        def rows():
+            for _ in range(count):
+                make, model = self.rng.choice(BRANDS)
+                created = self._timestamp()
+                yield ListingCar(
+                    seller_id=self.rng.choice(managers),
+                    make=make,
+                    model=model,
+                    year=self.rng.randint(2010, 2025),
+                    price=Decimal(self.rng.randrange(200000, 5000000)),
+                    mileage=self.rng.randrange(150000),
+                    condition=self.rng.choice(['new', 'used', 'used', 'used']),
+                    car_category=self.rng.choice(['affordable', 'affordable', 'premium']),
+                    status=self.rng.choice(['available'] * 7 + ['sold', 'sold', 'pending']),
+                    created_at=created,
+                    updated_at=created,
+                )
+
+        self._insert(ListingCar, rows(), 'listings')
+
+    def _seed_bookings(self, count, customers, drivers):
+        self.first_booking_id = self._max_id(Booking)
+
+        def rows():
+            for _ in range(count):
+                created = self._timestamp()
+                booking_type = self._pick('booking_type')
+                status = self._pick('status')
+                driver_option = self._pick('driver_option')
+                # Payment outcome has to agree with the booking's status
+                if status in ('confirmed', 'completed'):
+                    payment_status = 'completed'
+                elif status == 'pending':
+                    payment_status = self.rng.choice(['pending', 'initiated', 'failed'])
+                else:
+                    payment_status = self._pick('payment_status')
+                assigned = (
+                    drivers and driver_option == 'with-driver'
+                    and status in ('confirmed', 'completed')
+                )
+                days = 1 if booking_type == 'taxi' else self.rng.choice([1, 1, 2, 3, 5, 7])
+                low, high = DAILY_RATE[booking_type]
+                pickup, dropoff = self.rng.sample(CITIES, 2)
+                yield Booking(
+                    user_id=self.rng.choice(customers),
+                    booking_type=booking_type,
+                    number_of_days=days,
+                    driver_option=driver_option,
+                    assigned_driver_id=self.rng.choice(drivers) if assigned else None,
+                    pickup_location=pickup,
+                    dropoff_location=dropoff,
+                    pickup_date=(created + timedelta(days=self.rng.randrange(30))).date(),
+                    pickup_time=time(self.rng.randrange(6, 22), self.rng.choice([0, 15, 30, 45])),
+                    phone=f'9{self.rng.randrange(10 ** 9):09d}',
+                    agree_to_terms=True,
+                    payment_method='razorpay',
+                    total_amount=Decimal(self.rng.randrange(low, high) * days),
+                    payment_status=payment_status,
+                    status=status,
+                    created_at=created,
+                    updated_at=created,
+                )
+
+        self._insert(Booking, rows(), 'bookings')
+
+    def _seed_trips(self, count, fleet):
+        candidates = list(
+            Booking.objects.filter(id__gt=self.first_booking_id, assigned_driver__isnull=False)
+            .order_by('id')
+            .values_list('id', 'user_id', 'assigned_driver_id', 'pickup_date', 'number_of_days',
+                         'status', 'total_amount', 'pickup_location', 'dropoff_location')
+        )
+        chosen = self.rng.sample(candidates, min(count, len(candidates)))
+        chosen.sort()
+        after = self._max_id(Trip)
+
+        def rows():
+            for (booking_id, user_id, driver_id, pickup_date, days,
+                 status, amount, pickup, dropoff) in chosen:
+                start = timezone.make_aware(datetime.combine(pickup_date, time(self.rng.randrange(6, 22))))
+                done = status == 'completed'
+                yield Trip(
+                    booking_id=booking_id,
+                    driver_id=driver_id,
+                    customer_id=user_id,
+                    car_id=self.rng.choice(fleet) if fleet else None,
+                    start_location=pickup,
+                    end_location=dropoff,
+                    distance_traveled=Decimal(self.rng.randrange(5, 600)),
+                    start_time=start,
+                    end_time=start + timedelta(days=days) if done else None,
+                    start_odometer=self.rng.randrange(200000),
+                    status='completed' if done else self.rng.choice(['pending', 'started']),
+                    base_fare=amount,
+                    total_cost=amount,
+                    created_at=start,
+                    updated_at=start,
+                )
+
+        self._insert(Trip, rows(), 'trips')
+        return list(
+            Trip.objects.filter(id__gt=after).order_by('id')
+            .values_list('id', 'customer_id', 'status', 'created_at')
+        )
+
+    def _seed_payments(self):
+        paid = (
+            Booking.objects.filter(id__gt=self.first_booking_id)
+            .exclude(payment_status='pending')
+            .order_by('id')
+            .values_list('id', 'total_amount', 'payment_status', 'created_at')
+        )
+        status_map = {'completed': 'completed', 'failed': 'failed', 'initiated': 'processing'}
+
+        def rows():
+            for booking_id, amount, payment_status, created in paid.iterator(chunk_size=self.batch_size):
+                yield Payment(
+                    booking_id=booking_id,
+                    amount=amount,
+                    total_amount=amount,
+                    payment_method='razorpay',
+                    gateway_name='razorpay',
+                    gateway_order_id=f'order_{self.prefix}{booking_id}',
+                    gateway_transaction_id=f'pay_{self.prefix}{booking_id}' if payment_status == 'completed' else None,
+                    status=status_map[payment_status],
+                    transaction_date=created,
+                    created_at=created,
+                    updated_at=created,
+                )
+
+        self._insert(Payment, rows(), 'payments')
+
+    def _seed_invoices(self):
+        completed = (
+            Payment.objects.filter(booking_id__gt=self.first_booking_id, status='completed')
+            .order_by('id')
+            .values_list('id', 'booking_id', 'booking__user_id', 'booking__booking_type', 'total_amount', 'created_at')
+        )
+        type_labels = dict(Booking.BOOKING_TYPE_CHOICES)
+
+        def rows():
+            for payment_id, booking_id, user_id, booking_type, amount, created in completed.iterator(
+                chunk_size=self.batch_size
+            ):
+                yield Invoice(
+                    booking_id=booking_id,
+                    payment_id=payment_id,
+                    customer_id=user_id,
+                    invoice_number=invoice_number(Booking(pk=booking_id)),
+                    invoice_date=created.date(),
+                    subtotal=amount,
+                    total_amount=amount,
+                    payment_status='paid',
+                    description=f'{type_labels[booking_type]} booking #{booking_id}',
+                    generated_at=created,
+                    created_at=created,
+                    updated_at=created,
+                )
+
+        self._insert(Invoice, rows(), 'invoices')
+
+    def _seed_reviews(self, count, trips):
+        completed = [trip for trip in trips if trip[2] == 'completed']
+        chosen = self.rng.sample(completed, min(count, len(completed)))
+        review_types, weights = ['overall_service', 'driver', 'vehicle'], [60, 30, 10]
+
+        def rows():
+            for trip_id, customer_id, _, started in chosen:
+                rating = self.rng.choices([5, 4, 3, 2, 1], weights=[50, 30, 10, 6, 4])[0]
+                created = started + timedelta(days=self.rng.randrange(1, 10))
+                yield ReviewRating(
+                    trip_id=trip_id,
+                    reviewer_id=customer_id,
+                    review_type=self.rng.choices(review_types, weights=weights)[0],
+                    rating=rating,
+                    would_recommend=rating >= 4,
+                    created_at=created,
+                    updated_at=created,
+                )
+
+        self._insert(ReviewRating, rows(), 'reviews')
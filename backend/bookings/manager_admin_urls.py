@@ -10,6 +10,8 @@ from .manager_admin_views import (
     AdminUserViewSet,
     AdminPaymentViewSet,
     AdminSettingsViewSet,
+    AdminMetricsViewSet,
+    AdminExportViewSet,
     ManagerCarManagementViewSet,
     AdminCarManagementViewSet,
     ManagerDriverViewSet,
@@ -31,6 +33,8 @@ router.register(r'admin/stats', AdminStatsViewSet, basename='admin-stats')
 router.register(r'admin/users', AdminUserViewSet, basename='admin-users')
 router.register(r'admin/payments', AdminPaymentViewSet, basename='admin-payments')
 router.register(r'admin/settings', AdminSettingsViewSet, basename='admin-settings')
+router.register(r'admin/metrics', AdminMetricsViewSet, basename='admin-metrics')
+router.register(r'admin/exports', AdminExportViewSet, basename='admin-exports')
 router.register(r'admin/car-management', AdminCarManagementViewSet, basename='admin-cars')
 router.register(r'admin/drivers', AdminDriverViewSet, basename='admin-drivers')
 
@@ -6,16 +6,40 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.parsers import MultiPartParser, FormParser
-from django.db.models import Count, Sum, Avg
+from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.db.models import Count, Sum, Avg, Exists, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import timedelta
-from .models import Booking
-from .serializers import BookingSerializer
-from users.models import User
-from users.serializers import UserDetailSerializer
+from .models import Booking, Driver, Payment
+from .serializers import BookingSerializer, PaymentLedgerSerializer
+from .stats import get_booking_stats, get_user_stats
+from .platform_settings import (
+    get_platform_settings_for_api, validate_platform_settings, save_platform_settings
+)
+from users.models import User, Document
+from users.serializers import UserDetailSerializer, AdminUserSerializer
 from carsales.models import Car
 from carsales.serializers import CarSerializer
+from config.pagination import KeysetPagination
+from config.cache import cache_response
+from config.conditional import conditional_get
+from config.instrumentation import registry as metrics_registry
+
+
+def _related_count(model, fk_field):
+    """Correlated COUNT(*) of `model` rows pointing at the outer row through `fk_field`"""
+    counts = (
+        model.objects
+        .filter(**{fk_field: OuterRef('pk')})
+        .order_by()
+        .values(fk_field)
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts), 0)
 
 
 class ManagerBookingViewSet(viewsets.ModelViewSet):
@@ -23,6 +47,7 @@ class ManagerBookingViewSet(viewsets.ModelViewSet):
     Manager-specific booking endpoints
     GET /api/manager/bookings/ - List pending bookings
     PATCH /api/manager/bookings/{id}/ - Approve/reject booking
+    POST /api/manager/bookings/bulk/ - Approve/reject many pending bookings
     """
     permission_classes = [IsAuthenticated]
     serializer_class = BookingSerializer
@@ -32,12 +57,18 @@ class ManagerBookingViewSet(viewsets.ModelViewSet):
         if self.request.user.role != 'manager':
             return Booking.objects.none()
         # Return pending bookings
-        return Booking.objects.filter(status='pending').order_by('-created_at')
+        return BookingSerializer.optimized_queryset(
+            Booking.objects.filter(status='pending')
+        ).order_by('-created_at')
 
     def list(self, request):
         """Get list of pending bookings for manager approval"""
         try:
             bookings = self.get_queryset()
+            page = self.paginate_queryset(bookings)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
             serializer = self.get_serializer(bookings, many=True)
             return Response({
                 'status': 'success',
@@ -85,6 +116,77 @@ class ManagerBookingViewSet(viewsets.ModelViewSet):
                 'message': str(e)
             }, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Approve or reject pending bookings in one go
+        Body: {"action": "approve"|"reject", "ids": [1, 2, ...]}
+          or: {"action": "approve"|"reject", "filter": {<booking list filters>}}
+        With a filter, the oldest matching pending bookings are reviewed, up to
+        BULK_REVIEW_MAX_BOOKINGS per request; has_more tells whether to repeat.
+        """
+        from .approvals import REVIEW_ACTIONS, max_bulk_review, pending_booking_ids, review_bookings
+        from .filters import booking_filter_conditions
+
+        if request.user.role != 'manager':
+            return Response({
+                'status': 'error',
+                'message': 'Only managers can review bookings'
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        action_type = request.data.get('action')
+        if action_type not in REVIEW_ACTIONS:
+            return Response({
+                'status': 'error',
+                'message': 'Invalid action. Use "approve" or "reject"'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        ids = request.data.get('ids')
+        filters = request.data.get('filter')
+        if (ids is None) == (filters is None):
+            return Response({
+                'status': 'error',
+                'message': 'Provide either "ids" or "filter"'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        has_more = False
+        if ids is not None:
+            if not isinstance(ids, list) or not ids or not all(
+                isinstance(booking_id, int) and not isinstance(booking_id, bool) for booking_id in ids
+            ):
+                return Response({
+                    'status': 'error',
+                    'message': '"ids" must be a non-empty list of booking ids'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            if len(ids) > max_bulk_review():
+                return Response({
+                    'status': 'error',
+                    'message': f'At most {max_bulk_review()} bookings per request'
+                }, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            if not isinstance(filters, dict):
+                return Response({
+                    'status': 'error',
+                    'message': '"filter" must be an object of booking list filters'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            conditions = booking_filter_conditions(filters, request.user.role)
+            # Only pending bookings can be reviewed; a status filter would be meaningless
+            conditions.pop('status', None)
+            conditions.pop('status__in', None)
+            ids, has_more = pending_booking_ids(conditions)
+
+        result = review_bookings(ids, action_type)
+        result.has_more = has_more
+        import logging
+        logging.getLogger(__name__).info(
+            'Manager %s bulk %s: %s', request.user.id, action_type, result.counts
+        )
+        return Response({
+            'status': 'success',
+            'message': f'{result.updated} of {len(result.results)} booking(s) {REVIEW_ACTIONS[action_type][1]}',
+            'data': result.as_dict(),
+        }, status=status.HTTP_200_OK)
+
 
 class ManagerStatsViewSet(viewsets.ViewSet):
     """
@@ -93,6 +195,7 @@ class ManagerStatsViewSet(viewsets.ViewSet):
     """
     permission_classes = [IsAuthenticated]
 
+    @cache_response('manager-stats', namespaces=['bookings'], ttl=30, vary_on=['role'])
     def list(self, request):
         """Get manager statistics"""
         if request.user.role != 'manager':
@@ -102,44 +205,20 @@ class ManagerStatsViewSet(viewsets.ViewSet):
             }, status=status.HTTP_403_FORBIDDEN)
         
         try:
-            # Calculate statistics
-            total_bookings = Booking.objects.count()
-            pending_bookings = Booking.objects.filter(status='pending').count()
-            confirmed_bookings = Booking.objects.filter(status='confirmed').count()
-            completed_bookings = Booking.objects.filter(status='completed').count()
-            cancelled_bookings = Booking.objects.filter(status='cancelled').count()
-            
-            # Revenue calculations
-            total_revenue = Booking.objects.filter(
-                status='confirmed',
-                payment_status='completed'
-            ).aggregate(Sum('total_amount'))['total_amount__sum'] or 0
-            
-            # This month revenue
-            first_day_of_month = timezone.now().replace(day=1)
-            this_month_revenue = Booking.objects.filter(
-                status='confirmed',
-                payment_status='completed',
-                created_at__gte=first_day_of_month
-            ).aggregate(Sum('total_amount'))['total_amount__sum'] or 0
-            
-            # Booking types breakdown
-            booking_types = Booking.objects.values('booking_type').annotate(
-                count=Count('id'),
-                revenue=Sum('total_amount')
-            )
+            # All status/payment/type breakdowns in one aggregate query
+            stats = get_booking_stats()
             
             return Response({
                 'status': 'success',
                 'data': {
-                    'totalBookings': total_bookings,
-                    'pendingApprovals': pending_bookings,
-                    'confirmedBookings': confirmed_bookings,
-                    'completedBookings': completed_bookings,
-                    'cancelledBookings': cancelled_bookings,
-                    'totalRevenue': float(total_revenue),
-                    'thisMonthRevenue': float(this_month_revenue),
-                    'bookingsByType': list(booking_types)
+                    'totalBookings': stats['total_bookings'],
+                    'pendingApprovals': stats['pending_bookings'],
+                    'confirmedBookings': stats['confirmed_bookings'],
+                    'completedBookings': stats['completed_bookings'],
+                    'cancelledBookings': stats['cancelled_bookings'],
+                    'totalRevenue': float(stats['confirmed_revenue']),
+                    'thisMonthRevenue': float(stats['this_month_revenue']),
+                    'bookingsByType': stats['bookings_by_type']
                 }
             }, status=status.HTTP_200_OK)
         except Exception as e:
@@ -156,6 +235,7 @@ class AdminStatsViewSet(viewsets.ViewSet):
     """
     permission_classes = [IsAuthenticated]
 
+    @cache_response('admin-stats', namespaces=['bookings', 'users'], ttl=30, vary_on=['role'])
     def list(self, request):
         """Get system statistics for admin dashboard"""
         if request.user.role != 'admin':
@@ -165,32 +245,9 @@ class AdminStatsViewSet(viewsets.ViewSet):
             }, status=status.HTTP_403_FORBIDDEN)
         
         try:
-            # User statistics
-            total_users = User.objects.count()
-            total_managers = User.objects.filter(role='manager').count()
-            total_customers = User.objects.filter(role='customer').count()
-            total_drivers = User.objects.filter(role='driver').count()
-            total_admins = User.objects.filter(role='admin').count()
-            
-            # Booking statistics
-            total_bookings = Booking.objects.count()
-            pending_bookings = Booking.objects.filter(status='pending').count()
-            confirmed_bookings = Booking.objects.filter(status='confirmed').count()
-            completed_bookings = Booking.objects.filter(status='completed').count()
-            
-            # Payment statistics
-            total_revenue = Booking.objects.filter(
-                status='confirmed',
-                payment_status='completed'
-            ).aggregate(Sum('total_amount'))['total_amount__sum'] or 0
-            
-            pending_payments = Booking.objects.filter(
-                payment_status='pending'
-            ).aggregate(Sum('total_amount'))['total_amount__sum'] or 0
-            
-            failed_payments = Booking.objects.filter(
-                payment_status='failed'
-            ).count()
+            # One aggregate query per table
+            user_stats = get_user_stats()
+            stats = get_booking_stats()
             
             # Health metrics (placeholder - can be enhanced)
             api_health = 99  # Would measure real API health
@@ -199,18 +256,18 @@ class AdminStatsViewSet(viewsets.ViewSet):
             return Response({
                 'status': 'success',
                 'data': {
-                    'totalUsers': total_users,
-                    'totalManagers': total_managers,
-                    'totalCustomers': total_customers,
-                    'totalDrivers': total_drivers,
-                    'totalAdmins': total_admins,
-                    'totalBookings': total_bookings,
-                    'pendingBookings': pending_bookings,
-                    'confirmedBookings': confirmed_bookings,
-                    'completedBookings': completed_bookings,
-                    'totalRevenue': float(total_revenue),
-                    'pendingPayments': float(pending_payments),
-                    'failedPayments': failed_payments,
+                    'totalUsers': user_stats['total_users'],
+                    'totalManagers': user_stats['manager'],
+                    'totalCustomers': user_stats['customer'],
+                    'totalDrivers': user_stats['driver'],
+                    'totalAdmins': user_stats['admin'],
+                    'totalBookings': stats['total_bookings'],
+                    'pendingBookings': stats['pending_bookings'],
+                    'confirmedBookings': stats['confirmed_bookings'],
+                    'completedBookings': stats['completed_bookings'],
+                    'totalRevenue': float(stats['confirmed_revenue']),
+                    'pendingPayments': float(stats['pending_payment_amount']),
+                    'failedPayments': stats['failed_payments'],
                     'apiHealth': api_health,
                     'databaseHealth': database_health,
                     'platformHealth': 97
@@ -231,6 +288,12 @@ class AdminUserViewSet(viewsets.ViewSet):
     """
     permission_classes = [IsAuthenticated]
 
+    @conditional_get(
+        'admin-users',
+        lambda view, request: User.objects.all(),
+        namespaces=['bookings', 'documents', 'drivers'],
+        roles=('admin',),
+    )
     def list(self, request):
         """Get list of all users"""
         if request.user.role != 'admin':
@@ -243,6 +306,7 @@ class AdminUserViewSet(viewsets.ViewSet):
             # Get filter parameters
             role_filter = request.query_params.get('role')
             is_active_filter = request.query_params.get('is_active')
+            search = request.query_params.get('search', '').strip()
             
             queryset = User.objects.all()
             
@@ -250,13 +314,26 @@ class AdminUserViewSet(viewsets.ViewSet):
                 queryset = queryset.filter(role=role_filter)
             if is_active_filter:
                 queryset = queryset.filter(is_active=is_active_filter.lower() == 'true')
+            if search:
+                queryset = queryset.filter(
+                    Q(email__icontains=search) |
+                    Q(first_name__icontains=search) |
+                    Q(last_name__icontains=search)
+                )
+            
+            # Related counts as correlated subqueries, evaluated only for the rows returned
+            queryset = queryset.annotate(
+                booking_count=_related_count(Booking, 'user'),
+                document_count=_related_count(Document, 'user'),
+                has_driver_profile=Exists(Driver.objects.filter(user=OuterRef('pk'))),
+            ).order_by('-created_at', '-id')
             
-            # Add booking count for each user
-            users_data = []
-            for user in queryset:
-                user_data = UserDetailSerializer(user).data
-                user_data['bookingCount'] = user.bookings.count()
-                users_data.append(user_data)
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(queryset, request, view=self)
+            if page is not None:
+                return paginator.get_paginated_response(AdminUserSerializer(page, many=True).data)
+            
+            users_data = AdminUserSerializer(queryset, many=True).data
             
             return Response({
                 'status': 'success',
@@ -338,8 +415,8 @@ class AdminUserViewSet(viewsets.ViewSet):
 class AdminPaymentViewSet(viewsets.ViewSet):
     """
     Admin payment management endpoint
-    GET /api/admin/payments/ - List all payments
-    DELETE /api/admin/payments/{id}/ - Delete a payment/booking
+    GET /api/admin/payments/ - List all payments (from the payments ledger)
+    POST /api/admin/payments/{id}/void_payment/ - Void a ledger payment with a refund entry (id as listed, not the booking id)
     """
     permission_classes = [IsAuthenticated]
 
@@ -355,12 +432,17 @@ class AdminPaymentViewSet(viewsets.ViewSet):
             # Get filter parameters
             status_filter = request.query_params.get('status')
             
-            queryset = Booking.objects.all().order_by('-created_at')
+            queryset = PaymentLedgerSerializer.optimized_queryset().order_by('-created_at', '-id')
             
             if status_filter:
-                queryset = queryset.filter(payment_status=status_filter)
+                queryset = queryset.filter(status=status_filter)
+            
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(queryset, request, view=self)
+            if page is not None:
+                return paginator.get_paginated_response(PaymentLedgerSerializer(page, many=True).data)
             
-            serializer = BookingSerializer(queryset, many=True)
+            serializer = PaymentLedgerSerializer(queryset, many=True)
             
             return Response({
                 'status': 'success',
@@ -373,27 +455,36 @@ class AdminPaymentViewSet(viewsets.ViewSet):
                 'message': str(e)
             }, status=status.HTTP_400_BAD_REQUEST)
 
-    @action(detail=True, methods=['delete'], permission_classes=[IsAuthenticated])
-    def delete_payment(self, request, pk=None):
-        """Delete a booking/payment"""
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    def void_payment(self, request, pk=None):
+        """Void a payment by adding a full refund; ledger rows themselves are never deleted"""
         if request.user.role != 'admin':
             return Response({
                 'status': 'error',
-                'message': 'Only admins can delete payments'
+                'message': 'Only admins can void payments'
             }, status=status.HTTP_403_FORBIDDEN)
         
         try:
-            booking = Booking.objects.get(pk=pk)
-            booking_id = booking.id
-            booking.delete()
+            from django.db import transaction
+            from .ledger import void_payment
+            
+            with transaction.atomic():
+                payment = Payment.objects.select_for_update().get(pk=pk, booking__isnull=False)
+                refund = void_payment(payment, request.user, request.data.get('reason'))
+            if refund is None:
+                return Response({
+                    'status': 'error',
+                    'message': f'Payment #{payment.id} already has a refund'
+                }, status=status.HTTP_400_BAD_REQUEST)
             return Response({
                 'status': 'success',
-                'message': f'Booking #{booking_id} deleted successfully'
+                'message': f'Payment #{payment.id} voided',
+                'data': {'id': payment.id, 'booking_id': payment.booking_id, 'refund_id': refund.id}
             }, status=status.HTTP_200_OK)
-        except Booking.DoesNotExist:
+        except (Payment.DoesNotExist, ValueError):
             return Response({
                 'status': 'error',
-                'message': 'Booking not found'
+                'message': 'Payment not found'
             }, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({
@@ -402,6 +493,92 @@ class AdminPaymentViewSet(viewsets.ViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
 
 
+class AdminMetricsViewSet(viewsets.ViewSet):
+    """
+    Request metrics of this process, recorded by RequestMetricsMiddleware
+    GET /api/manager/admin/metrics/ - Per-endpoint stats (?output=prometheus for text format)
+    POST /api/manager/admin/metrics/reset/ - Clear the collected stats
+    """
+    permission_classes = [IsAuthenticated]
+
+    def list(self, request):
+        """Get per-endpoint timing, query and size stats"""
+        if request.user.role != 'admin':
+            return Response({
+                'status': 'error',
+                'message': 'Only admins can access this endpoint'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        if request.query_params.get('output') == 'prometheus':
+            return HttpResponse(metrics_registry.prometheus(), content_type='text/plain; version=0.0.4')
+        
+        return Response({
+            'status': 'success',
+            'data': metrics_registry.snapshot()
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'])
+    def reset(self, request):
+        """Clear the collected stats"""
+        if request.user.role != 'admin':
+            return Response({
+                'status': 'error',
+                'message': 'Only admins can access this endpoint'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        metrics_registry.reset()
+        return Response({
+            'status': 'success',
+            'message': 'Metrics reset'
+        }, status=status.HTTP_200_OK)
+
+
+class AdminExportViewSet(viewsets.ViewSet):
+    """
+    Admin data exports, streamed as CSV (default) or NDJSON (?output=ndjson)
+    GET /api/manager/admin/exports/bookings/ - Bookings (booking list filters)
+    GET /api/manager/admin/exports/payments/ - Payments ledger (?status=)
+    GET /api/manager/admin/exports/users/ - Users (?role=, ?is_active=)
+    All accept ?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD on created_at.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def _export(self, request, name):
+        from .exports import FORMATS, export_filename, export_queryset, parse_format, stream_export
+
+        if request.user.role != 'admin':
+            return Response({
+                'status': 'error',
+                'message': 'Only admins can export data'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        fmt = parse_format(request.query_params.get('output'))
+        queryset = export_queryset(name, request)
+        chunk_size = getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+        response = StreamingHttpResponse(stream_export(name, queryset, fmt, chunk_size), content_type=FORMATS[fmt])
+        response['Content-Disposition'] = f'attachment; filename="{export_filename(name, fmt)}"'
+        # Don't let a reverse proxy buffer the whole export before sending it on
+        response['X-Accel-Buffering'] = 'no'
+        import logging
+        logging.getLogger(__name__).info('Export %s (%s) started by user %s', name, fmt, request.user.id)
+        return response
+
+    @action(detail=False, methods=['get'])
+    def bookings(self, request):
+        """Stream bookings"""
+        return self._export(request, 'bookings')
+
+    @action(detail=False, methods=['get'])
+    def payments(self, request):
+        """Stream payments from the ledger"""
+        return self._export(request, 'payments')
+
+    @action(detail=False, methods=['get'])
+    def users(self, request):
+        """Stream users"""
+        return self._export(request, 'users')
+
+
 class AdminSettingsViewSet(viewsets.ViewSet):
     """
     Admin settings endpoint
@@ -410,6 +587,7 @@ class AdminSettingsViewSet(viewsets.ViewSet):
     """
     permission_classes = [IsAuthenticated]
 
+    @cache_response('admin-settings', namespaces=['settings'], ttl=300, vary_on=['role'])
     def list(self, request):
         """Get current platform settings"""
         if request.user.role != 'admin':
@@ -418,25 +596,7 @@ class AdminSettingsViewSet(viewsets.ViewSet):
                 'message': 'Only admins can access this endpoint'
             }, status=status.HTTP_403_FORBIDDEN)
         
-        from django.conf import settings
-        
-        # Return default settings including pending booking config
-        settings_data = {
-            'commissionRate': 15,
-            'minBookingAmount': 1000,
-            'maxBookingDays': 365,
-            'maintenanceMode': False,
-            'maxConcurrentBookings': 100,
-            'supportEmail': 'support@autonexus.com',
-            'supportPhone': '+1-800-123-4567',
-            'platformFee': 2.99,
-            'currency': 'USD',
-            'pendingBookingTimeout': getattr(settings, 'PENDING_BOOKING_TIMEOUT', 3600),
-            'pendingPaymentTimeout': getattr(settings, 'PENDING_PAYMENT_TIMEOUT', 1800),
-            'autoApproveBookings': getattr(settings, 'AUTO_APPROVE_BOOKINGS', False),
-            'autoCancelExpiredPending': getattr(settings, 'AUTO_CANCEL_EXPIRED_PENDING', True),
-            'pendingBookingHoldTime': getattr(settings, 'PENDING_BOOKING_HOLD_TIME', 7200),
-        }
+        settings_data = get_platform_settings_for_api()
         
         return Response({
             'status': 'success',
@@ -452,14 +612,20 @@ class AdminSettingsViewSet(viewsets.ViewSet):
             }, status=status.HTTP_403_FORBIDDEN)
         
         try:
-            # In a real implementation, would save to database
-            # For now, just return success
-            updated_settings = request.data
+            cleaned, errors = validate_platform_settings(request.data)
+            if errors:
+                return Response({
+                    'status': 'error',
+                    'message': 'Invalid settings',
+                    'errors': errors
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            save_platform_settings(cleaned, user=request.user)
             
             return Response({
                 'status': 'success',
                 'message': 'Settings updated successfully',
-                'data': updated_settings
+                'data': get_platform_settings_for_api()
             }, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({
@@ -483,13 +649,23 @@ class ManagerCarManagementViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Only return cars listed by the current manager"""
         if self.request.user.role == 'manager':
-            return Car.objects.filter(seller=self.request.user).order_by('-created_at')
+            return CarSerializer.optimized_queryset(Car.objects.filter(seller=self.request.user)).order_by('-created_at')
         return Car.objects.none()
 
+    @conditional_get(
+        'manager-cars',
+        lambda view, request: view.get_queryset(),
+        namespaces=['users'],
+        roles=('manager',),
+    )
     def list(self, request):
         """Get all cars listed by the manager"""
         try:
             cars = self.get_queryset()
+            page = self.paginate_queryset(cars)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
             serializer = self.get_serializer(cars, many=True)
             return Response({
                 'status': 'success',
@@ -592,7 +768,7 @@ class AdminCarManagementViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Admin sees all cars regardless of status"""
         if self.request.user.role == 'admin':
-            return Car.objects.all().order_by('-created_at')
+            return CarSerializer.optimized_queryset().order_by('-created_at')
         return Car.objects.none()
 
     def list(self, request):
@@ -605,6 +781,10 @@ class AdminCarManagementViewSet(viewsets.ModelViewSet):
 
         try:
             cars = self.get_queryset()
+            page = self.paginate_queryset(cars)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
             serializer = self.get_serializer(cars, many=True)
             return Response({
                 'status': 'success',
@@ -683,9 +863,11 @@ class ManagerDriverViewSet(viewsets.ViewSet):
     Manager-specific driver management endpoints
     GET /api/manager/drivers/ - List all drivers
     POST /api/manager/drivers/ - Create a new driver
+    POST /api/manager/drivers/import/ - Bulk import drivers from CSV/JSON
     """
     permission_classes = [IsAuthenticated]
 
+    @cache_response('manager-drivers', namespaces=['drivers', 'users'], vary_on=['role'])
     def list(self, request):
         """List all drivers added by managers"""
         # Check if user is manager
@@ -700,7 +882,11 @@ class ManagerDriverViewSet(viewsets.ViewSet):
             from .serializers import DriverSerializer
             
             # Get all drivers
-            drivers = Driver.objects.select_related('user').order_by('-created_at') if hasattr(Driver, 'created_at') else Driver.objects.select_related('user').all()
+            drivers = DriverSerializer.optimized_queryset().order_by('-created_at')
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(drivers, request, view=self)
+            if page is not None:
+                return paginator.get_paginated_response(DriverSerializer(page, many=True).data)
             serializer = DriverSerializer(drivers, many=True)
             
             return Response({
@@ -712,7 +898,7 @@ class ManagerDriverViewSet(viewsets.ViewSet):
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
-            logger.exception(f'Error listing drivers: {str(e)}')
+            logger.exception('Error listing drivers: %s', e)
             return Response({
                 'status': 'error',
                 'message': f'Failed to fetch drivers: {str(e)}'
@@ -778,7 +964,7 @@ class ManagerDriverViewSet(viewsets.ViewSet):
                 is_active=True
             )
             
-            logger.info(f'Created driver user: {user.email} with role: {user.role}')
+            logger.info('Created driver user: %s with role: %s', user.email, user.role)
 
             # Create driver profile
             from django.utils import timezone
@@ -792,7 +978,7 @@ class ManagerDriverViewSet(viewsets.ViewSet):
                 status='available'
             )
             
-            logger.info(f'Created driver profile for user {user.id}: {driver.id}')
+            logger.info('Created driver profile for user %s: %s', user.id, driver.id)
 
             # Return success with driver info
             return Response({
@@ -818,12 +1004,72 @@ class ManagerDriverViewSet(viewsets.ViewSet):
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
-            logger.exception(f'Error creating driver: {str(e)}')
+            logger.exception('Error creating driver: %s', e)
             return Response({
                 'status': 'error',
                 'message': f'Failed to create driver: {str(e)}'
             }, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'], url_path='import',
+            parser_classes=[JSONParser, MultiPartParser, FormParser])
+    def bulk_import(self, request):
+        """
+        Import many drivers at once (manager only)
+        Upload a CSV/JSON file as "file", or send JSON {"drivers": [...]}, with
+        the fields accepted by create plus an optional "password" (a random
+        temporary password is generated and returned otherwise).
+        ?dry_run=true only validates. Valid rows are created even if others fail.
+        """
+        if request.user.role != 'manager':
+            return Response({
+                'status': 'error',
+                'message': 'Only managers can create drivers'
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        from .driver_import import DriverImportError, import_drivers, parse_upload
+
+        dry_run = request.query_params.get('dry_run', '').lower() == 'true'
+        try:
+            upload = request.FILES.get('file')
+            if upload is not None:
+                raw_rows = parse_upload(upload.read(), upload.name)
+            else:
+                raw_rows = request.data.get('drivers')
+                if not isinstance(raw_rows, list) or not all(isinstance(row, dict) for row in raw_rows):
+                    raise DriverImportError('Send a CSV/JSON "file" or a "drivers" list')
+            rows = import_drivers(raw_rows, dry_run=dry_run)
+        except DriverImportError as e:
+            return Response({
+                'status': 'error',
+                'message': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        failed = sum(1 for row in rows if row.errors)
+        created = sum(1 for row in rows if row.driver_id)
+        import logging
+        logging.getLogger(__name__).info(
+            'Manager %s imported drivers: %d created, %d failed%s',
+            request.user.id, created, failed, ' (dry run)' if dry_run else '',
+        )
+        if created:
+            response_status = status.HTTP_201_CREATED
+        elif failed and not dry_run:
+            response_status = status.HTTP_400_BAD_REQUEST
+        else:
+            response_status = status.HTTP_200_OK
+        return Response({
+            'status': 'error' if response_status == status.HTTP_400_BAD_REQUEST else 'success',
+            'message': (
+                f'{len(rows) - failed} of {len(rows)} row(s) valid' if dry_run
+                else f'{created} of {len(rows)} driver(s) created'
+            ),
+            'data': {
+                'created': created,
+                'failed': failed,
+                'results': [row.as_result() for row in rows],
+            }
+        }, status=response_status)
+
     def retrieve(self, request, pk=None):
         """Get a specific driver by ID"""
         if request.user.role != 'manager':
@@ -836,7 +1082,7 @@ class ManagerDriverViewSet(viewsets.ViewSet):
             from .models import Driver
             from .serializers import DriverSerializer
             
-            driver = Driver.objects.select_related('user').get(id=pk)
+            driver = DriverSerializer.optimized_queryset().get(id=pk)
             serializer = DriverSerializer(driver)
             
             return Response({
@@ -851,7 +1097,7 @@ class ManagerDriverViewSet(viewsets.ViewSet):
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
-            logger.exception(f'Error retrieving driver: {str(e)}')
+            logger.exception('Error retrieving driver: %s', e)
             return Response({
                 'status': 'error',
                 'message': f'Failed to retrieve driver: {str(e)}'
@@ -892,7 +1138,7 @@ class ManagerDriverViewSet(viewsets.ViewSet):
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
-            logger.exception(f'Error updating driver: {str(e)}')
+            logger.exception('Error updating driver: %s', e)
             return Response({
                 'status': 'error',
                 'message': f'Failed to update driver: {str(e)}'
@@ -933,7 +1179,7 @@ class ManagerDriverViewSet(viewsets.ViewSet):
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
-            logger.exception(f'Error updating driver: {str(e)}')
+            logger.exception('Error updating driver: %s', e)
             return Response({
                 'status': 'error',
                 'message': f'Failed to update driver: {str(e)}'
@@ -965,7 +1211,7 @@ class ManagerDriverViewSet(viewsets.ViewSet):
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
-            logger.exception(f'Error deleting driver: {str(e)}')
+            logger.exception('Error deleting driver: %s', e)
             return Response({
                 'status': 'error',
                 'message': f'Failed to delete driver: {str(e)}'
@@ -994,12 +1240,14 @@ class ManagerTaxiRidesViewSet(viewsets.ViewSet):
             
             # Get all taxi bookings (pending, confirmed, completed)
             # Manager needs to see all statuses to assign drivers
-            taxi_bookings = Booking.objects.filter(
-                booking_type='taxi'
-            ).select_related('user', 'assigned_driver').order_by('-created_at')
+            taxi_bookings = BookingSerializer.optimized_queryset(
+                Booking.objects.filter(booking_type='taxi')
+            ).order_by('-created_at')
             
-            logger.info(f'[ManagerTaxiRides] Found {taxi_bookings.count()} taxi bookings')
-            logger.info(f'[ManagerTaxiRides] Booking statuses: {list(taxi_bookings.values_list("status", flat=True))}')
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(taxi_bookings, request, view=self)
+            if page is not None:
+                return paginator.get_paginated_response(BookingSerializer(page, many=True).data)
             
             serializer = BookingSerializer(taxi_bookings, many=True)
             
@@ -1011,7 +1259,7 @@ class ManagerTaxiRidesViewSet(viewsets.ViewSet):
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
-            logger.exception(f'Error fetching taxi rides: {str(e)}')
+            logger.exception('Error fetching taxi rides: %s', e)
             return Response({
                 'status': 'error',
                 'message': f'Failed to fetch taxi rides: {str(e)}'
@@ -1063,7 +1311,7 @@ class ManagerTaxiRidesViewSet(viewsets.ViewSet):
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
-            logger.exception(f'Error assigning driver: {str(e)}')
+            logger.exception('Error assigning driver: %s', e)
             return Response({
                 'status': 'error',
                 'message': f'Failed to assign driver: {str(e)}'
@@ -1077,6 +1325,7 @@ class AdminDriverViewSet(viewsets.ViewSet):
     """
     permission_classes = [IsAuthenticated]
 
+    @cache_response('admin-drivers', namespaces=['drivers', 'users'], vary_on=['role'])
     def list(self, request):
         """List all drivers in the system (admin only)"""
         # Check if user is admin
@@ -1091,7 +1340,11 @@ class AdminDriverViewSet(viewsets.ViewSet):
             from .serializers import DriverSerializer
             
             # Get all drivers with related user data
-            drivers = Driver.objects.select_related('user').order_by('-created_at')
+            drivers = DriverSerializer.optimized_queryset().order_by('-created_at')
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(drivers, request, view=self)
+            if page is not None:
+                return paginator.get_paginated_response(DriverSerializer(page, many=True).data)
             serializer = DriverSerializer(drivers, many=True)
             
             return Response({
@@ -1103,7 +1356,7 @@ class AdminDriverViewSet(viewsets.ViewSet):
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
-            logger.exception(f'Error listing drivers for admin: {str(e)}')
+            logger.exception('Error listing drivers for admin: %s', e)
             return Response({
                 'status': 'error',
                 'message': f'Failed to fetch drivers: {str(e)}'
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_booking_assigned_driver'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['assigned_driver', 'pickup_date'], name='bookings_assigne_454474_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0006_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyBookingStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('total_bookings', models.IntegerField(default=0)),
+                ('pending_bookings', models.IntegerField(default=0)),
+                ('confirmed_bookings', models.IntegerField(default=0)),
+                ('completed_bookings', models.IntegerField(default=0)),
+                ('cancelled_bookings', models.IntegerField(default=0)),
+                ('premium_bookings', models.IntegerField(default=0)),
+                ('local_bookings', models.IntegerField(default=0)),
+                ('taxi_bookings', models.IntegerField(default=0)),
+                ('premium_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('local_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('taxi_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('confirmed_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('pending_payment_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('failed_payments', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Daily Booking Stats',
+                'verbose_name_plural': 'Daily Booking Stats',
+                'db_table': 'daily_booking_stats',
+                'ordering': ['-date'],
+            },
+        ),
+    ]
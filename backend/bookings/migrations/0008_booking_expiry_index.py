@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0007_dailybookingstats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'payment_status', 'created_at'], name='bookings_status_a98668_idx'),
+        ),
+    ]
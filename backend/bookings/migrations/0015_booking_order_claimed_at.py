@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0014_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='order_claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -64,6 +64,8 @@ class Booking(models.Model):
     razorpay_order_id = models.CharField(max_length=100, blank=True, null=True)
     razorpay_payment_id = models.CharField(max_length=100, blank=True, null=True)
     razorpay_signature = models.CharField(max_length=255, blank=True, null=True)
+    # Set while a checkout is creating the gateway order (payment_gateway.reserve_order_creation)
+    order_claimed_at = models.DateTimeField(blank=True, null=True)
     
     # Status
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
@@ -77,6 +79,22 @@ class Booking(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Booking'
         verbose_name_plural = 'Bookings'
+        indexes = [
+            models.Index(fields=['assigned_driver', 'pickup_date']),
+            # Keyset pagination: (created_at, id) plus the common list filters
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['booking_type', 'created_at']),
+            models.Index(fields=['payment_status', 'created_at']),
+            # Expiry sweeper range scans
+            models.Index(fields=['status', 'payment_status', 'created_at']),
+            # List filters: status with pickup date ranges / driver assignment
+            models.Index(fields=['status', 'pickup_date']),
+            models.Index(fields=['status', 'assigned_driver', 'created_at']),
+            # Conditional GET fingerprint: MAX(updated_at)
+            models.Index(fields=['updated_at']),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.booking_type} ({self.pickup_date})"
@@ -211,6 +229,9 @@ class Driver(models.Model):
         indexes = [
             models.Index(fields=['status']),
             models.Index(fields=['is_verified']),
+            models.Index(fields=['created_at', 'id']),
+            # available_drivers candidate set
+            models.Index(fields=['is_verified', 'status']),
         ]
     
     def __str__(self):
@@ -284,6 +305,8 @@ class Trip(models.Model):
             models.Index(fields=['driver']),
             models.Index(fields=['customer']),
             models.Index(fields=['start_time']),
+            # Per-driver overlap probe in availability.available_drivers
+            models.Index(fields=['driver', 'status', 'start_time']),
         ]
     
     def __str__(self):
@@ -581,6 +604,9 @@ class Payment(models.Model):
         indexes = [
             models.Index(fields=['status']),
             models.Index(fields=['gateway_transaction_id']),
+            # Admin payments ledger: newest first, optionally by status (keyset pagination)
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['status', 'created_at']),
         ]
     
     def __str__(self):
@@ -684,4 +710,107 @@ class Refund(models.Model):
         ]
     
     def __str__(self):
-        return f"Refund: {self.refund_amount} - {self.status}"
\ No newline at end of file
+        return f"Refund: {self.refund_amount} - {self.status}"
+
+
+class PaymentWebhookEvent(models.Model):
+    """Razorpay webhook delivery, queued by the webhook endpoint and applied by process_payment_webhooks"""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('processed', 'Processed'),
+        ('ignored', 'Ignored'),
+        ('failed', 'Failed'),
+    )
+    
+    # Delivery
+    event_id = models.CharField(max_length=100, unique=True)  # X-Razorpay-Event-Id; redeliveries share it
+    event_type = models.CharField(max_length=100)
+    payload = models.JSONField()
+    
+    # Processing
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    
+    # Metadata
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'payment_webhook_events'
+        verbose_name = 'Payment Webhook Event'
+        verbose_name_plural = 'Payment Webhook Events'
+        ordering = ['id']
+        indexes = [
+            # Worker queue: oldest pending events first
+            models.Index(fields=['status', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.event_type} {self.event_id} - {self.status}"
+
+# ============================================================================
+# REPORTING MODELS
+# ============================================================================
+
+class DailyBookingStats(models.Model):
+    """Per-day rollup of booking counters, keyed on the booking's created_at date"""
+    date = models.DateField(unique=True)
+    
+    # Status breakdown
+    total_bookings = models.IntegerField(default=0)
+    pending_bookings = models.IntegerField(default=0)
+    confirmed_bookings = models.IntegerField(default=0)
+    completed_bookings = models.IntegerField(default=0)
+    cancelled_bookings = models.IntegerField(default=0)
+    
+    # Booking type breakdown
+    premium_bookings = models.IntegerField(default=0)
+    local_bookings = models.IntegerField(default=0)
+    taxi_bookings = models.IntegerField(default=0)
+    premium_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    local_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    taxi_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    # Payments
+    confirmed_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    pending_payment_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    failed_payments = models.IntegerField(default=0)
+    
+    # Metadata
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'daily_booking_stats'
+        verbose_name = 'Daily Booking Stats'
+        verbose_name_plural = 'Daily Booking Stats'
+        ordering = ['-date']
+    
+    def __str__(self):
+        return f"Stats {self.date}: {self.total_bookings} bookings"
+
+
+# ============================================================================
+# PLATFORM SETTINGS MODELS
+# ============================================================================
+
+class PlatformSetting(models.Model):
+    """Admin-editable platform setting; keys and types are defined in bookings.platform_settings"""
+    key = models.CharField(max_length=100, unique=True)
+    value = models.JSONField()
+    
+    # Audit
+    updated_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='updated_platform_settings')
+    
+    # Metadata
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'platform_settings'
+        verbose_name = 'Platform Setting'
+        verbose_name_plural = 'Platform Settings'
+        ordering = ['key']
+    
+    def __str__(self):
+        return f"{self.key} = {self.value}"
@@ -0,0 +1,337 @@
+"""
+Payment gateway service
+One process-wide Razorpay client on a keep-alive connection pool, with
+connect/read timeouts, bounded retries with jitter and a circuit breaker.
+Order creation is not idempotent, so it is only re-sent when the request
+provably never reached the gateway; after a timeout or 5xx the order is
+first looked up by its receipt.
+The backend is pluggable (PAYMENT_GATEWAY_BACKEND) so local runs and load
+tests can use FakeGatewayBackend instead of the real API.
+"""
+import logging
+import random
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+import razorpay
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from razorpay.errors import GatewayError, ServerError
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from .models import Booking
+from .platform_settings import get_platform_setting
+
+logger = logging.getLogger(__name__)
+
+# Transient failures worth another attempt; BadRequestError is the caller's fault
+RETRYABLE_ERRORS = (GatewayError, ServerError, requests.ConnectionError, requests.Timeout)
+
+
+def request_not_sent(error):
+    """Whether a failed call provably never reached the gateway (so re-sending can't duplicate it)"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if isinstance(error, requests.ConnectionError):
+        # requests wraps urllib3's MaxRetryError; its reason says which phase failed
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return isinstance(reason, NewConnectionError)
+    return False
+
+
+class GatewayUnavailable(Exception):
+    """Raised without calling the gateway while the circuit breaker is open"""
+
+
+class _TimeoutSession(requests.Session):
+    """Session that applies a default (connect, read) timeout to every request"""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, *args, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(*args, **kwargs)
+
+
+class RazorpayGatewayBackend:
+    """Razorpay API over a shared keep-alive session"""
+
+    def __init__(self, key_id, key_secret, timeout=(3.05, 10), pool_size=10):
+        session = _TimeoutSession(timeout)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        # Retries are ours (with the circuit breaker), not the SDK's
+        self.client = razorpay.Client(session=session, auth=(key_id, key_secret))
+
+    def create_order(self, data):
+        return self.client.order.create(data=data)
+
+    def fetch_order(self, order_id):
+        return self.client.order.fetch(order_id)
+
+    def find_orders(self, receipt):
+        """Orders created with `receipt`, newest first"""
+        return self.client.order.all(data={'receipt': receipt}).get('items', [])
+
+
+class FakeGatewayBackend:
+    """In-memory gateway for local development and tests; never touches the network"""
+
+    def __init__(self, **kwargs):
+        self.lock = threading.Lock()
+        self.orders = {}
+
+    def create_order(self, data):
+        order = {
+            'id': f'order_fake{uuid.uuid4().hex[:14]}',
+            'entity': 'order',
+            'amount': data['amount'],
+            'amount_paid': 0,
+            'amount_due': data['amount'],
+            'currency': data.get('currency', 'INR'),
+            'receipt': data.get('receipt'),
+            'notes': data.get('notes', {}),
+            'status': 'created',
+            'attempts': 0,
+            'created_at': int(time.time()),
+        }
+        with self.lock:
+            self.orders[order['id']] = order
+        return dict(order)
+
+    def fetch_order(self, order_id):
+        with self.lock:
+            order = self.orders.get(order_id)
+        if order is None:
+            raise razorpay.errors.BadRequestError('The id provided does not exist')
+        return dict(order)
+
+    def find_orders(self, receipt):
+        with self.lock:
+            orders = [dict(order) for order in self.orders.values() if order['receipt'] == receipt]
+        return sorted(orders, key=lambda order: order['created_at'], reverse=True)
+
+
+class CircuitBreaker:
+    """
+    Stops calling the gateway after `threshold` consecutive failures.
+
+    While open every call fails fast; after `reset_timeout` seconds one trial
+    call is let through and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, threshold=5, reset_timeout=30):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        with self.lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+class PaymentGateway:
+    """Retries and circuit breaking around a gateway backend"""
+
+    def __init__(self, backend, max_retries=2, backoff=0.2, max_backoff=2.0, breaker=None):
+        self.backend = backend
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+
+    def _call(self, operation, *args, idempotent=True, recover=None):
+        """
+        Call the backend, retrying transient failures.
+
+        Idempotent operations are retried on any RETRYABLE_ERRORS. Others are
+        only re-sent when the request never reached the gateway; after any
+        other failure `recover()` is asked for the result the gateway may
+        already have produced, and the call is re-sent only if it finds none.
+        """
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise GatewayUnavailable('Payment gateway is temporarily unavailable')
+            try:
+                result = getattr(self.backend, operation)(*args)
+            except RETRYABLE_ERRORS as e:
+                self.breaker.record_failure()
+                ambiguous = not idempotent and not request_not_sent(e)
+                if attempt >= self.max_retries or (ambiguous and recover is None):
+                    raise
+                # Full jitter keeps retries from concurrent requests from lining up
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+                logger.warning('Gateway %s failed (%s), retry %s in %.2fs', operation, e, attempt + 1, delay)
+                time.sleep(delay)
+                attempt += 1
+                if ambiguous:
+                    existing = recover()
+                    if existing is not None:
+                        logger.info('Gateway %s had succeeded despite %s; using its result', operation, e)
+                        return existing
+                continue
+            except Exception:
+                # The gateway answered; a rejected request says nothing about its health
+                self.breaker.record_success()
+                raise
+            self.breaker.record_success()
+            return result
+
+    def create_order(self, data):
+        receipt = data.get('receipt')
+
+        def existing_order():
+            # Newest open order for the same receipt and amount, if the failed call created one
+            for order in self._call('find_orders', receipt):
+                if (order.get('status') in OPEN_ORDER_STATES and order['amount'] == data['amount']
+                        and order.get('currency', 'INR') == data.get('currency', 'INR')):
+                    return order
+            return None
+
+        return self._call('create_order', data, idempotent=False, recover=existing_order if receipt else None)
+
+    def fetch_order(self, order_id):
+        return self._call('fetch_order', order_id)
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_payment_gateway():
+    """The process-wide PaymentGateway, built from settings on first use"""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                backend_class = import_string(getattr(
+                    settings, 'PAYMENT_GATEWAY_BACKEND', 'bookings.payment_gateway.RazorpayGatewayBackend'
+                ))
+                backend = backend_class(
+                    key_id=settings.RAZORPAY_KEY_ID,
+                    key_secret=settings.RAZORPAY_KEY_SECRET,
+                    timeout=(
+                        getattr(settings, 'PAYMENT_GATEWAY_CONNECT_TIMEOUT', 3.05),
+                        getattr(settings, 'PAYMENT_GATEWAY_READ_TIMEOUT', 10),
+                    ),
+                )
+                _gateway = PaymentGateway(
+                    backend,
+                    max_retries=getattr(settings, 'PAYMENT_GATEWAY_MAX_RETRIES', 2),
+                    breaker=CircuitBreaker(
+                        threshold=getattr(settings, 'PAYMENT_GATEWAY_BREAKER_THRESHOLD', 5),
+                        reset_timeout=getattr(settings, 'PAYMENT_GATEWAY_BREAKER_RESET', 30),
+                    ),
+                )
+    return _gateway
+
+
+# ============================================================================
+# ORDER REUSE
+# ============================================================================
+
+ORDER_KEY_PREFIX = 'payorder'
+# Razorpay order states that can still be paid
+OPEN_ORDER_STATES = ('created', 'attempted')
+# Seconds a checkout may spend creating an order; longer than create_order with all its retries
+ORDER_RESERVATION_TTL = 120
+
+
+def reserve_order_creation(booking_id):
+    """
+    Claim the right to create a gateway order for a booking.
+
+    A conditional UPDATE on the booking row instead of a row lock held
+    across the gateway call (with its retries and backoff), so it holds
+    across processes without a long transaction. A claim older than
+    ORDER_RESERVATION_TTL is treated as abandoned. Returns the claim
+    timestamp, or None while another checkout of the same booking holds it
+    or the booking is already paid.
+    """
+    now = timezone.now()
+    claimed = Booking.objects.filter(pk=booking_id).exclude(payment_status='completed').filter(
+        Q(order_claimed_at__isnull=True) | Q(order_claimed_at__lt=now - timedelta(seconds=ORDER_RESERVATION_TTL))
+    ).update(order_claimed_at=now)
+    return now if claimed else None
+
+
+def release_order_creation(booking_id, claim):
+    """Give up a claim from reserve_order_creation, unless it was already cleared or taken over"""
+    Booking.objects.filter(pk=booking_id, order_claimed_at=claim).update(order_claimed_at=None)
+
+
+def remember_order(booking_id, order, ttl=None):
+    """Keep the gateway order for a booking so a retried checkout can reuse it"""
+    if ttl is None:
+        ttl = get_platform_setting('pending_booking_hold_time')
+    cache.set(
+        f'{ORDER_KEY_PREFIX}:{booking_id}',
+        {'id': order['id'], 'amount': order['amount'], 'currency': order.get('currency', 'INR')},
+        ttl,
+    )
+
+
+def reusable_order(booking, amount, currency='INR'):
+    """
+    The booking's existing gateway order if it can still be paid for `amount`.
+
+    Answered from the cache when possible; otherwise the order is fetched from
+    the gateway once (still far cheaper than creating and orphaning a new one).
+    """
+    if not booking.razorpay_order_id or booking.payment_status != 'initiated':
+        return None
+
+    order = cache.get(f'{ORDER_KEY_PREFIX}:{booking.id}')
+    if order is None or order['id'] != booking.razorpay_order_id:
+        try:
+            order = get_payment_gateway().fetch_order(booking.razorpay_order_id)
+        except Exception:
+            logger.warning('Could not fetch order %s for booking %s', booking.razorpay_order_id, booking.id)
+            return None
+        if order.get('status') not in OPEN_ORDER_STATES:
+            return None
+        remember_order(booking.id, order)
+
+    if order['amount'] != amount or order.get('currency', 'INR') != currency:
+        return None
+    return order
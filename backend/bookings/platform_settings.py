@@ -0,0 +1,193 @@
+"""
+Platform settings store
+Typed, admin-editable settings persisted in PlatformSetting and served from a
+process-local snapshot. The snapshot is reloaded from the database at most
+once per PLATFORM_SETTINGS_CHECK_INTERVAL, so get_platform_setting() on the
+hot path normally costs a dict lookup, and a change made in one process
+reaches every other process within that interval without relying on a
+shared cache.
+"""
+import math
+import threading
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import PlatformSetting
+
+class SettingSpec:
+    """
+    Schema entry: value type, default, the camelCase name used by the API
+    and, for numbers, the accepted range (min_exclusive makes min_value
+    itself invalid, e.g. rates that must be above zero)
+    """
+
+    def __init__(self, value_type, default, api_name, django_setting=None,
+                 min_value=None, max_value=None, min_exclusive=False):
+        self.value_type = value_type
+        self._default = default
+        self.api_name = api_name
+        self.django_setting = django_setting
+        self.min_value = min_value
+        self.max_value = max_value
+        self.min_exclusive = min_exclusive
+
+    @property
+    def default(self):
+        # Settings that already exist in settings.py keep it as their default
+        if self.django_setting:
+            return getattr(settings, self.django_setting, self._default)
+        return self._default
+
+    def coerce(self, value):
+        """Convert an API value to the stored type, raising ValueError when invalid"""
+        if self.value_type is bool:
+            if isinstance(value, bool):
+                return value
+            if isinstance(value, str) and value.lower() in ('true', 'false', '1', '0'):
+                return value.lower() in ('true', '1')
+            raise ValueError('Must be a boolean')
+        if self.value_type is int:
+            if isinstance(value, bool):
+                raise ValueError('Must be an integer')
+            try:
+                number = Decimal(str(value).strip())
+            except (InvalidOperation, ValueError):
+                raise ValueError('Must be an integer')
+            if not number.is_finite() or number != number.to_integral_value():
+                raise ValueError('Must be an integer')
+            return self._check_range(int(number))
+        if self.value_type is float:
+            if isinstance(value, bool):
+                raise ValueError('Must be a number')
+            try:
+                number = float(Decimal(str(value).strip()))
+            except (InvalidOperation, ValueError):
+                raise ValueError('Must be a number')
+            # NaN/Infinity parse as Decimals, and huge values overflow float
+            if not math.isfinite(number):
+                raise ValueError('Must be a finite number')
+            return self._check_range(number)
+        if not isinstance(value, str):
+            raise ValueError('Must be a string')
+        return value.strip()
+
+    def _check_range(self, number):
+        if self.min_value is not None:
+            if self.min_exclusive and number <= self.min_value:
+                raise ValueError(f'Must be greater than {self.min_value}')
+            if number < self.min_value:
+                raise ValueError(f'Must be at least {self.min_value}')
+        if self.max_value is not None and number > self.max_value:
+            raise ValueError(f'Must be at most {self.max_value}')
+        return number
+
+
+# Timeouts are in seconds: at least a minute, at most 30 days
+TIMEOUT_RANGE = {'min_value': 60, 'max_value': 30 * 24 * 3600}
+
+PLATFORM_SETTINGS = {
+    'platform_name': SettingSpec(str, 'AutoNexus', 'platformName'),
+    'commission_rate': SettingSpec(float, 15, 'commissionRate', min_value=0, max_value=100, min_exclusive=True),
+    'min_booking_amount': SettingSpec(float, 1000, 'minBookingAmount', min_value=0, max_value=10_000_000),
+    'max_booking_days': SettingSpec(int, 365, 'maxBookingDays', 'MAX_BOOKING_DAYS', min_value=1, max_value=3650),
+    'maintenance_mode': SettingSpec(bool, False, 'maintenanceMode'),
+    'max_concurrent_bookings': SettingSpec(int, 100, 'maxConcurrentBookings', min_value=1, max_value=100_000),
+    'support_email': SettingSpec(str, 'support@autonexus.com', 'supportEmail'),
+    'support_phone': SettingSpec(str, '+1-800-123-4567', 'supportPhone'),
+    'contact_phone': SettingSpec(str, '+1-800-123-4567', 'contactPhone'),
+    'platform_fee': SettingSpec(float, 2.99, 'platformFee', min_value=0, max_value=1_000_000),
+    'currency': SettingSpec(str, 'USD', 'currency'),
+    'pending_booking_timeout': SettingSpec(
+        int, 3600, 'pendingBookingTimeout', 'PENDING_BOOKING_TIMEOUT', **TIMEOUT_RANGE),
+    'pending_payment_timeout': SettingSpec(
+        int, 1800, 'pendingPaymentTimeout', 'PENDING_PAYMENT_TIMEOUT', **TIMEOUT_RANGE),
+    'auto_approve_bookings': SettingSpec(bool, False, 'autoApproveBookings', 'AUTO_APPROVE_BOOKINGS'),
+    'auto_cancel_expired_pending': SettingSpec(bool, True, 'autoCancelExpiredPending', 'AUTO_CANCEL_EXPIRED_PENDING'),
+    'pending_booking_hold_time': SettingSpec(
+        int, 7200, 'pendingBookingHoldTime', 'PENDING_BOOKING_HOLD_TIME', **TIMEOUT_RANGE),
+}
+
+API_NAMES = {spec.api_name: key for key, spec in PLATFORM_SETTINGS.items()}
+
+
+class _Snapshot:
+    """Per-process copy of the stored settings and when it was loaded"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = None
+        self.loaded_at = 0.0
+
+
+_snapshot = _Snapshot()
+
+
+def expire_snapshot():
+    """Reload this process's snapshot on the next read instead of waiting out the interval"""
+    _snapshot.loaded_at = 0.0
+
+
+def _stored_values():
+    interval = getattr(settings, 'PLATFORM_SETTINGS_CHECK_INTERVAL', 1.0)
+    if _snapshot.values is not None and time.monotonic() - _snapshot.loaded_at < interval:
+        return _snapshot.values
+
+    with _snapshot.lock:
+        # Another thread may have reloaded while this one waited for the lock
+        if _snapshot.values is None or time.monotonic() - _snapshot.loaded_at >= interval:
+            _snapshot.values = dict(PlatformSetting.objects.values_list('key', 'value'))
+            _snapshot.loaded_at = time.monotonic()
+        return _snapshot.values
+
+
+def get_platform_setting(key):
+    """Current value of a platform setting, falling back to its schema default"""
+    spec = PLATFORM_SETTINGS[key]
+    values = _stored_values()
+    if key in values:
+        return values[key]
+    return spec.default
+
+
+def get_platform_settings_for_api():
+    """All settings keyed by their API (camelCase) names"""
+    values = _stored_values()
+    return {
+        spec.api_name: values.get(key, spec.default)
+        for key, spec in PLATFORM_SETTINGS.items()
+    }
+
+
+def validate_platform_settings(data):
+    """
+    Map API names to schema keys and coerce values, checking each number
+    against its range. Returns (cleaned, errors) where errors maps API
+    names to messages.
+    """
+    cleaned = {}
+    errors = {}
+    for api_name, value in data.items():
+        key = API_NAMES.get(api_name)
+        if key is None:
+            errors[api_name] = 'Unknown setting'
+            continue
+        try:
+            cleaned[key] = PLATFORM_SETTINGS[key].coerce(value)
+        except ValueError as e:
+            errors[api_name] = str(e)
+    return cleaned, errors
+
+
+def save_platform_settings(cleaned, user=None):
+    """Persist validated settings; other processes pick them up on their next reload"""
+    with transaction.atomic():
+        for key, value in cleaned.items():
+            PlatformSetting.objects.update_or_create(
+                key=key,
+                defaults={'value': value, 'updated_by': user},
+            )
+    # Don't wait out the check interval in the process that made the change
+    expire_snapshot()
@@ -0,0 +1,183 @@
+"""
+Query plan audit
+The hot booking/driver/user/car querysets, as the views and the sweeper
+build them, and an EXPLAIN parser that reports full table scans. Used by
+QueryPlanTests (bookings/tests.py) on seeded data and by the
+audit_query_plans command against a real database.
+"""
+from datetime import date, datetime, time, timedelta
+
+from django.db import connection
+from django.utils import timezone
+
+from carsales.models import Car
+from users.models import User
+from .availability import available_drivers, overlapping_reservations, overlapping_trips
+from .expiry import expired_bookings
+from .ledger import record_payments
+from .models import Booking, Driver, Trip
+from .serializers import BookingSerializer, DriverSerializer, PaymentLedgerSerializer
+
+# Hot querysets as views.py / manager_admin_views.py / the sweeper build them.
+# Each entry: (name, builder(context) -> queryset)
+HOT_QUERIES = [
+    ('my_bookings', lambda ctx: BookingSerializer.optimized_queryset(
+        Booking.objects.filter(user=ctx['customer']))),
+    ('all_bookings?status', lambda ctx: BookingSerializer.optimized_queryset(
+        Booking.objects.filter(status='confirmed'))),
+    ('all_bookings?status&driver=unassigned', lambda ctx: Booking.objects.filter(
+        status='confirmed', assigned_driver__isnull=True)),
+    ('all_bookings?status&pickup_date range', lambda ctx: Booking.objects.filter(
+        status='confirmed', pickup_date__gte=ctx['today'], pickup_date__lte=ctx['today'] + timedelta(days=7))),
+    ('all_bookings?booking_type', lambda ctx: Booking.objects.filter(booking_type='premium')),
+    ('manager pending queue', lambda ctx: BookingSerializer.optimized_queryset(
+        Booking.objects.filter(status='pending')).order_by('-created_at')),
+    ('manager taxi rides', lambda ctx: BookingSerializer.optimized_queryset(
+        Booking.objects.filter(booking_type='taxi')).order_by('-created_at')),
+    ('admin payments?status', lambda ctx: PaymentLedgerSerializer.optimized_queryset().filter(
+        status='completed').order_by('-created_at', '-id')),
+    ('keyset page', lambda ctx: Booking.objects.filter(
+        created_at__lte=ctx['now']).order_by('-created_at', '-id')[:50]),
+    ('expiry sweep', lambda ctx: expired_bookings('pending', ctx['now']).order_by('created_at', 'id')),
+    ('driver reservations', lambda ctx: overlapping_reservations(
+        ctx['today'], ctx['today'] + timedelta(days=3))),
+    ('overlapping trips', lambda ctx: overlapping_trips(ctx['today'], ctx['today'] + timedelta(days=3))),
+    ('available drivers', lambda ctx: DriverSerializer.optimized_queryset(available_drivers(
+        ctx['today'], ctx['today'] + timedelta(days=3),
+        drivers=Driver.objects.filter(is_verified=True, status__in=['available', 'assigned'])))),
+    ('admin users?role', lambda ctx: User.objects.filter(role='driver').order_by('-created_at', '-id')),
+    ('cars catalog', lambda ctx: Car.objects.filter(status='available').order_by('-created_at')),
+    ('manager cars', lambda ctx: Car.objects.filter(seller=ctx['manager']).order_by('-created_at')),
+]
+
+
+def full_scans(queryset):
+    """
+    Return (tables read by full scan, plan text) for a queryset.
+
+    A walk over a whole index (e.g. to satisfy ORDER BY while filtering on an
+    unindexed column) counts too. MySQL: access type ALL or index.
+    PostgreSQL: Seq Scan. SQLite: SCAN, with or without an index.
+    """
+    sql, params = queryset.query.sql_with_params()
+    vendor = connection.vendor
+    with connection.cursor() as cursor:
+        if vendor == 'mysql':
+            cursor.execute(f'EXPLAIN {sql}', params)
+            columns = [col[0] for col in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            scans = [row['table'] for row in rows if row['type'] in ('ALL', 'index')]
+            plan = '\n'.join(
+                f"{row['table']}: type={row['type']} key={row['key']} rows={row['rows']} {row['Extra'] or ''}"
+                for row in rows
+            )
+        elif vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN {sql}', params)
+            lines = [row[0] for row in cursor.fetchall()]
+            scans = [line.split('Seq Scan on ', 1)[1].split()[0] for line in lines if 'Seq Scan on ' in line]
+            plan = '\n'.join(lines)
+        elif vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            details = [row[-1] for row in cursor.fetchall()]
+            scans = [
+                detail.split()[1] for detail in details
+                if detail.startswith('SCAN ') and 'CONSTANT ROW' not in detail
+            ]
+            plan = '\n'.join(details)
+        else:
+            raise NotImplementedError(f'EXPLAIN parsing is not implemented for {vendor}')
+    return scans, plan
+
+
+def seed_plan_data(count=5000):
+    """Seed bookings, drivers, trips, payments and cars shaped like production; returns the context"""
+    users = {}
+    for role in ('manager', 'customer'):
+        users[role] = User.objects.create_user(
+            username=f'plan-audit-{role}',
+            email=f'plan-audit-{role}@example.com',
+            password=None,
+            role=role,
+        )
+    # MySQL's bulk_create doesn't set primary keys, so rows are re-read before use as FKs
+    User.objects.bulk_create([
+        User(username=f'plan-audit-driver-{i}', email=f'plan-audit-driver-{i}@example.com', role='driver')
+        for i in range(50)
+    ])
+    driver_users = User.objects.filter(username__startswith='plan-audit-driver-').order_by('id')
+    Driver.objects.bulk_create([
+        Driver(
+            user=user,
+            license_number=f'PA-{i:05d}',
+            license_expiry=date(2099, 1, 1),
+            is_verified=i % 3 != 0,
+            status=['available', 'assigned', 'off_duty'][i % 3],
+        )
+        for i, user in enumerate(driver_users)
+    ])
+    drivers = list(Driver.objects.filter(license_number__startswith='PA-').order_by('id'))
+
+    today = date.today()
+    booking_types = [choice for choice, _ in Booking.BOOKING_TYPE_CHOICES]
+    statuses = [choice for choice, _ in Booking.STATUS_CHOICES]
+    payment_statuses = [choice for choice, _ in Booking.PAYMENT_STATUS_CHOICES]
+    Booking.objects.bulk_create([
+        Booking(
+            user=users['customer'],
+            booking_type=booking_types[i % len(booking_types)],
+            status=statuses[i % len(statuses)],
+            payment_status=payment_statuses[(i // 4) % len(payment_statuses)],
+            number_of_days=1 + i % 5,
+            driver_option='with-driver',
+            assigned_driver=drivers[i % len(drivers)] if i % 2 else None,
+            pickup_location='Audit Pickup',
+            dropoff_location='Audit Dropoff',
+            pickup_date=today + timedelta(days=i % 120 - 60),
+            pickup_time=time(9, 0),
+            phone='0000000000',
+            payment_method='razorpay',
+            total_amount=1000,
+        )
+        for i in range(count)
+    ], batch_size=500)
+
+    paid = Booking.objects.filter(user=users['customer'], payment_status='completed')
+    record_payments((booking, f'pay_audit_{booking.id}', None) for booking in paid)
+
+    bookings = Booking.objects.filter(
+        user=users['customer'], assigned_driver__isnull=False
+    ).order_by('id')[:count // 4]
+    start = timezone.make_aware(datetime.combine(today, time(9, 0)))
+    Trip.objects.bulk_create([
+        Trip(
+            booking=booking,
+            driver=booking.assigned_driver,
+            customer=users['customer'],
+            start_location='Audit Pickup',
+            end_location='Audit Dropoff',
+            start_time=start + timedelta(days=i % 120 - 60),
+            end_time=start + timedelta(days=i % 120 - 59),
+            start_odometer=0,
+            status=['pending', 'started', 'completed'][i % 3],
+        )
+        for i, booking in enumerate(bookings)
+    ], batch_size=500)
+
+    Car.objects.bulk_create([
+        Car(
+            seller=users['manager'],
+            make='Audit',
+            model=f'Model {i}',
+            year=2020,
+            price=10000,
+            mileage=1000,
+            status=['available', 'sold'][i % 2],
+        )
+        for i in range(200)
+    ], batch_size=500)
+    return {
+        'manager': users['manager'],
+        'customer': users['customer'],
+        'today': today,
+        'now': timezone.now(),
+    }
@@ -4,6 +4,7 @@ from .models import (
     UsedCarInquiry, Complaint, MaintenanceLog, 
     Payment, Invoice, Refund
 )
+from .platform_settings import get_platform_setting
 
 class BookingSerializer(serializers.ModelSerializer):
     user = serializers.SerializerMethodField()
@@ -40,6 +41,13 @@ class BookingSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
     
+    @classmethod
+    def optimized_queryset(cls, queryset=None):
+        """Join the relations read by get_user/get_assigned_driver so lists cost a fixed number of queries"""
+        if queryset is None:
+            queryset = Booking.objects.all()
+        return queryset.select_related('user', 'assigned_driver__user')
+    
     def get_user(self, obj):
         """Get user details"""
         return {
@@ -89,6 +97,12 @@ class BookingCreateSerializer(serializers.ModelSerializer):
             'total_amount',
         ]
     
+    def validate_number_of_days(self, value):
+        max_days = get_platform_setting('max_booking_days')
+        if value > max_days:
+            raise serializers.ValidationError(f'Bookings can be at most {max_days} days long')
+        return value
+    
     def create(self, validated_data):
         """Create booking with optional driver assignment"""
         selected_driver_id = validated_data.pop('selected_driver_id', None)
@@ -140,6 +154,13 @@ class DriverSerializer(serializers.ModelSerializer):
     user = serializers.SerializerMethodField()
     assigned_vehicle_info = CarListSerializer(source='assigned_vehicle', read_only=True)
     
+    @classmethod
+    def optimized_queryset(cls, queryset=None):
+        """Join the user and vehicle rows read for every driver"""
+        if queryset is None:
+            queryset = Driver.objects.all()
+        return queryset.select_related('user', 'assigned_vehicle')
+    
     def get_user(self, obj):
         return {
             'id': obj.user.id,
@@ -268,6 +289,44 @@ class PaymentSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'transaction_date']
 
 
+
+class PaymentLedgerSerializer(serializers.ModelSerializer):
+    """Admin payments list row, read from the payments ledger"""
+    booking_id = serializers.IntegerField(read_only=True)
+    booking_type = serializers.CharField(source='booking.booking_type', read_only=True, default=None)
+    user_email = serializers.CharField(source='booking.user.email', read_only=True, default=None)
+    user_name = serializers.CharField(source='booking.user.first_name', read_only=True, default=None)
+    razorpay_payment_id = serializers.CharField(source='gateway_transaction_id', read_only=True)
+    razorpay_order_id = serializers.CharField(source='gateway_order_id', read_only=True)
+    invoice_number = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Payment
+        fields = [
+            'id', 'booking_id', 'booking_type', 'user_email', 'user_name',
+            'amount', 'tax', 'discount', 'total_amount', 'payment_method',
+            'gateway_name', 'razorpay_payment_id', 'razorpay_order_id',
+            'invoice_number', 'status', 'transaction_date', 'created_at'
+        ]
+        read_only_fields = fields
+    
+    @classmethod
+    def optimized_queryset(cls, queryset=None):
+        """Join the booking's user and the invoice by primary key; only the columns the row shows"""
+        if queryset is None:
+            queryset = Payment.objects.all()
+        return queryset.select_related('booking__user', 'invoice').only(
+            *[field for field in cls.Meta.fields if field in {f.attname for f in Payment._meta.concrete_fields}],
+            'gateway_transaction_id', 'gateway_order_id',
+            'booking__booking_type', 'booking__user__email', 'booking__user__first_name',
+            'invoice__invoice_number',
+        )
+    
+    def get_invoice_number(self, obj):
+        invoice = getattr(obj, 'invoice', None)
+        return invoice.invoice_number if invoice else None
+
+
 # ============================================================================
 # INVOICE SERIALIZERS
 # ============================================================================
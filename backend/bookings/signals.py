@@ -0,0 +1,31 @@
+"""
+Model signal handlers for the bookings app
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Booking, PlatformSetting
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def update_daily_booking_stats(sender, instance, **kwargs):
+    """Keep the DailyBookingStats row for the booking's day current"""
+    if not getattr(settings, 'BOOKING_STATS_ROLLUP', False) or not instance.created_at:
+        return
+    from .stats import refresh_daily_stats
+
+    day = timezone.localtime(instance.created_at).date()
+    transaction.on_commit(lambda: refresh_daily_stats([day]))
+
+
+@receiver(post_save, sender=PlatformSetting)
+@receiver(post_delete, sender=PlatformSetting)
+def reload_platform_settings(sender, instance, **kwargs):
+    """Reload this process's settings snapshot once the change is committed (e.g. edits in the Django admin)"""
+    from .platform_settings import expire_snapshot
+
+    transaction.on_commit(expire_snapshot)
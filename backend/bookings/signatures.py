@@ -0,0 +1,89 @@
+"""
+Razorpay signature verification
+Shared by checkout verification (verify_payment) and the webhook endpoint.
+Each secret's keyed HMAC state is built once per process and copied per
+message, and signatures are compared in constant time.
+"""
+import hashlib
+import hmac
+import threading
+
+from django.conf import settings
+
+
+class HmacSigner:
+    """Hex HMAC-SHA256 signer whose key schedule is computed once"""
+
+    def __init__(self, key, digestmod=hashlib.sha256):
+        if isinstance(key, str):
+            key = key.encode()
+        self._keyed = hmac.new(key, digestmod=digestmod)
+
+    def sign(self, message):
+        if isinstance(message, str):
+            message = message.encode()
+        mac = self._keyed.copy()
+        mac.update(message)
+        return mac.hexdigest()
+
+    def verify(self, message, signature):
+        """True if `signature` is the hex HMAC of `message`; never raises on junk input"""
+        if isinstance(signature, str):
+            signature = signature.encode('ascii', 'replace')
+        if not isinstance(signature, bytes) or not signature:
+            return False
+        return hmac.compare_digest(self.sign(message).encode(), signature)
+
+    def verify_many(self, items):
+        """[(message, signature), ...] -> [bool, ...], in order"""
+        return [self.verify(message, signature) for message, signature in items]
+
+
+_signers = {}
+_signers_lock = threading.Lock()
+
+
+def get_signer(setting_name):
+    """
+    Signer for the secret in `setting_name`, cached per process.
+
+    Rebuilt when the secret changes (key rotation, override_settings in tests);
+    returns None when the secret is empty.
+    """
+    secret = getattr(settings, setting_name, '')
+    if not secret:
+        return None
+    cached = _signers.get(setting_name)
+    if cached is not None and cached[0] == secret:
+        return cached[1]
+    signer = HmacSigner(secret)
+    with _signers_lock:
+        _signers[setting_name] = (secret, signer)
+    return signer
+
+
+def payment_message(order_id, payment_id):
+    """What Razorpay Checkout signs: '<order_id>|<payment_id>'"""
+    return f'{order_id}|{payment_id}'
+
+
+def verify_payment_signature(order_id, payment_id, signature):
+    """Checkout handler signature (razorpay_signature) with RAZORPAY_KEY_SECRET"""
+    signer = get_signer('RAZORPAY_KEY_SECRET')
+    return signer is not None and signer.verify(payment_message(order_id, payment_id), signature)
+
+
+def verify_payment_signatures(items):
+    """Batch form for reconciliation: [(order_id, payment_id, signature), ...] -> [bool, ...]"""
+    signer = get_signer('RAZORPAY_KEY_SECRET')
+    if signer is None:
+        return [False] * len(items)
+    return signer.verify_many(
+        (payment_message(order_id, payment_id), signature) for order_id, payment_id, signature in items
+    )
+
+
+def verify_webhook_signature(body, signature):
+    """X-Razorpay-Signature: HMAC of the raw request body with RAZORPAY_WEBHOOK_SECRET"""
+    signer = get_signer('RAZORPAY_WEBHOOK_SECRET')
+    return signer is not None and signer.verify(body, signature)
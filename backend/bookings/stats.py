@@ -0,0 +1,152 @@
+"""
+Dashboard statistics
+Computes booking and user breakdowns with conditional aggregation (one query
+per table) and maintains the optional DailyBookingStats rollup.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from users.models import User
+from .models import Booking, DailyBookingStats
+
+BOOKING_TYPES = [choice for choice, _ in Booking.BOOKING_TYPE_CHOICES]
+
+
+def booking_aggregates():
+    """Aggregate expressions shared by the live query and the daily rollup"""
+    aggregates = {
+        'total_bookings': Count('id'),
+        'pending_bookings': Count('id', filter=Q(status='pending')),
+        'confirmed_bookings': Count('id', filter=Q(status='confirmed')),
+        'completed_bookings': Count('id', filter=Q(status='completed')),
+        'cancelled_bookings': Count('id', filter=Q(status='cancelled')),
+        'confirmed_revenue': Sum('total_amount', filter=Q(status='confirmed', payment_status='completed')),
+        'pending_payment_amount': Sum('total_amount', filter=Q(payment_status='pending')),
+        'failed_payments': Count('id', filter=Q(payment_status='failed')),
+    }
+    for booking_type in BOOKING_TYPES:
+        aggregates[f'{booking_type}_bookings'] = Count('id', filter=Q(booking_type=booking_type))
+        aggregates[f'{booking_type}_amount'] = Sum('total_amount', filter=Q(booking_type=booking_type))
+    return aggregates
+
+
+def _month_start():
+    now = timezone.localtime()
+    return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _format_booking_stats(row, this_month_revenue):
+    stats = {key: (value or 0) for key, value in row.items()}
+    stats['this_month_revenue'] = this_month_revenue or 0
+    # Same shape as values('booking_type').annotate(count, revenue)
+    stats['bookings_by_type'] = [
+        {
+            'booking_type': booking_type,
+            'count': stats[f'{booking_type}_bookings'],
+            'revenue': stats[f'{booking_type}_amount'],
+        }
+        for booking_type in BOOKING_TYPES
+        if stats[f'{booking_type}_bookings']
+    ]
+    return stats
+
+
+def live_booking_stats():
+    """All booking breakdowns in a single aggregate query over bookings"""
+    aggregates = booking_aggregates()
+    aggregates['this_month_revenue'] = Sum(
+        'total_amount',
+        filter=Q(status='confirmed', payment_status='completed', created_at__gte=_month_start()),
+    )
+    row = Booking.objects.aggregate(**aggregates)
+    this_month_revenue = row.pop('this_month_revenue')
+    return _format_booking_stats(row, this_month_revenue)
+
+
+def rollup_booking_stats():
+    """Booking breakdowns summed from the DailyBookingStats rollup"""
+    # Aliases can't shadow the rollup's own column names
+    aggregates = {f'sum_{field}': Sum(field) for field in booking_aggregates()}
+    aggregates['this_month_revenue'] = Sum(
+        'confirmed_revenue', filter=Q(date__gte=_month_start().date())
+    )
+    row = DailyBookingStats.objects.aggregate(**aggregates)
+    this_month_revenue = row.pop('this_month_revenue')
+    row = {key[len('sum_'):]: value for key, value in row.items()}
+    return _format_booking_stats(row, this_month_revenue)
+
+
+def get_booking_stats():
+    """Booking stats from the rollup when BOOKING_STATS_ROLLUP is on, else live"""
+    if getattr(settings, 'BOOKING_STATS_ROLLUP', False):
+        return rollup_booking_stats()
+    return live_booking_stats()
+
+
+def get_user_stats():
+    """User counts by role in a single aggregate query over users"""
+    aggregates = {'total_users': Count('id')}
+    for role, _ in User.ROLE_CHOICES:
+        aggregates[role] = Count('id', filter=Q(role=role))
+    return User.objects.aggregate(**aggregates)
+
+
+def refresh_daily_stats(dates):
+    """Recompute the rollup rows for the given created_at dates"""
+    dates = set(dates)
+    if not dates:
+        return 0
+
+    # Bound the scan on the created_at index before bucketing by day
+    tz = timezone.get_current_timezone()
+    range_start = timezone.make_aware(datetime.combine(min(dates), time.min), tz)
+    range_end = timezone.make_aware(datetime.combine(max(dates) + timedelta(days=1), time.min), tz)
+    rows = (
+        Booking.objects
+        .filter(created_at__gte=range_start, created_at__lt=range_end)
+        .annotate(day=TruncDate('created_at'))
+        .filter(day__in=dates)
+        .order_by()
+        .values('day')
+        .annotate(**booking_aggregates())
+    )
+    now = timezone.now()
+    stats = [
+        DailyBookingStats(date=row.pop('day'), updated_at=now, **{key: value or 0 for key, value in row.items()})
+        for row in rows
+    ]
+    refreshed = {row.date for row in stats}
+    if stats:
+        # One upsert for all days; MySQL infers the conflict target from the unique date column
+        DailyBookingStats.objects.bulk_create(
+            stats,
+            update_conflicts=True,
+            unique_fields=['date'] if connection.features.supports_update_conflicts_with_target else None,
+            update_fields=list(booking_aggregates()) + ['updated_at'],
+        )
+
+    # Days whose last booking was deleted
+    DailyBookingStats.objects.filter(date__in=dates - refreshed).delete()
+    return len(refreshed)
+
+
+def rebuild_daily_stats(since=None, batch_days=366):
+    """Backfill the rollup from the bookings table, optionally from a start date"""
+    days = Booking.objects.annotate(day=TruncDate('created_at'))
+    stale = DailyBookingStats.objects.all()
+    if since:
+        days = days.filter(day__gte=since)
+        stale = stale.filter(date__gte=since)
+
+    all_days = sorted(set(days.order_by().values_list('day', flat=True).distinct()))
+    refreshed = 0
+    for start in range(0, len(all_days), batch_days):
+        refreshed += refresh_daily_stats(all_days[start:start + batch_days])
+
+    stale.exclude(date__in=all_days).delete()
+    return refreshed
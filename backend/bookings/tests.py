@@ -0,0 +1,1383 @@
+import base64
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import date, time, timedelta
+from decimal import Decimal
+from unittest import mock
+
+import requests
+from django.conf import settings
+from django.contrib.auth.hashers import check_password
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from users.models import Document, User
+from .ledger import record_payments
+from .models import Booking, Driver, Invoice, Payment, PaymentWebhookEvent, Refund
+from .payment_gateway import FakeGatewayBackend, PaymentGateway, reserve_order_creation
+from .signatures import HmacSigner, payment_message
+
+
+class BookingFixtures:
+    """Users, drivers and bookings for API tests"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client = APIClient()
+
+    def create_user(self, role='customer', email=None, **fields):
+        count = User.objects.count() + 1
+        email = email or f'{role}{count}@example.com'
+        return User.objects.create_user(
+            username=email.split('@')[0],
+            email=email,
+            password='Passw0rd!',
+            role=role,
+            first_name=fields.pop('first_name', role.title()),
+            **fields
+        )
+
+    def create_driver(self, **fields):
+        user = self.create_user('driver')
+        return Driver.objects.create(
+            user=user,
+            license_number=fields.pop('license_number', f'LIC{user.id:06d}'),
+            license_expiry=date.today() + timedelta(days=365),
+            is_verified=True,
+            status='available',
+            **fields
+        )
+
+    def create_booking(self, user, **fields):
+        values = {
+            'booking_type': 'local',
+            'number_of_days': 2,
+            'pickup_location': 'Mumbai',
+            'dropoff_location': 'Pune',
+            'pickup_date': date.today() + timedelta(days=3),
+            'pickup_time': time(10, 0),
+            'phone': '9000000000',
+            'payment_method': 'razorpay',
+            'total_amount': Decimal('1500.00'),
+        }
+        values.update(fields)
+        return Booking.objects.create(user=user, **values)
+
+    def authenticate(self, user):
+        token, _ = Token.objects.get_or_create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+
+
+@override_settings(BOOKING_STATS_ROLLUP=True)
+class BookingStatsTests(BookingFixtures, TestCase):
+    """The DailyBookingStats rollup always sums to the live aggregate"""
+
+    def setUp(self):
+        super().setUp()
+        self.customer = self.create_user('customer')
+
+    def assertRollupMatchesLive(self):
+        from .stats import live_booking_stats, rollup_booking_stats
+
+        self.assertEqual(rollup_booking_stats(), live_booking_stats())
+
+    def test_live_stats_are_one_query(self):
+        from .stats import live_booking_stats
+
+        self.create_booking(self.customer, status='confirmed', payment_status='completed')
+        self.create_booking(self.customer, booking_type='premium', total_amount=Decimal('5000.00'))
+        with self.assertNumQueries(1):
+            stats = live_booking_stats()
+        self.assertEqual((stats['total_bookings'], stats['pending_bookings'], stats['confirmed_bookings']), (2, 1, 1))
+        self.assertEqual(stats['confirmed_revenue'], Decimal('1500.00'))
+        self.assertEqual(stats['this_month_revenue'], Decimal('1500.00'))
+        self.assertEqual(stats['pending_payment_amount'], Decimal('5000.00'))
+        self.assertEqual(
+            {row['booking_type']: row['count'] for row in stats['bookings_by_type']}, {'local': 1, 'premium': 1}
+        )
+
+    def test_rollup_follows_create_update_cancel_and_delete(self):
+        from .models import DailyBookingStats
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = self.create_booking(self.customer)
+            other = self.create_booking(self.customer, booking_type='taxi', total_amount=Decimal('250.00'))
+        self.assertEqual(DailyBookingStats.objects.get().total_bookings, 2)
+        self.assertRollupMatchesLive()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.status, booking.payment_status = 'confirmed', 'completed'
+            booking.save()
+        self.assertRollupMatchesLive()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.status = 'cancelled'
+            booking.save()
+        self.assertEqual(DailyBookingStats.objects.get().cancelled_bookings, 1)
+        self.assertRollupMatchesLive()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.delete()
+            other.delete()
+        self.assertFalse(DailyBookingStats.objects.exists())
+
+    def test_rebuild_command_backfills_and_drops_stale_days(self):
+        from django.core.management import call_command
+
+        from .models import DailyBookingStats
+
+        bookings = [self.create_booking(self.customer) for _ in range(3)]
+        Booking.objects.filter(pk=bookings[0].pk).update(created_at=timezone.now() - timedelta(days=40))
+        Booking.objects.filter(pk=bookings[1].pk).update(status='cancelled')
+        DailyBookingStats.objects.all().delete()
+        DailyBookingStats.objects.create(date=date(2000, 1, 1), total_bookings=9)
+
+        call_command('rebuild_booking_stats', stdout=io.StringIO())
+        self.assertEqual(DailyBookingStats.objects.count(), 2)
+        self.assertFalse(DailyBookingStats.objects.filter(date=date(2000, 1, 1)).exists())
+        self.assertRollupMatchesLive()
+
+    def test_rebuild_rejects_a_bad_date(self):
+        from django.core.management import CommandError, call_command
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_booking_stats', since='31/01/2024')
+
+
+class ConditionalGetTests(BookingFixtures, TestCase):
+    """ETag / 304 handling of the dashboard lists (config/conditional.py)"""
+
+    def setUp(self):
+        super().setUp()
+        self.admin = self.create_user('admin')
+        self.customer = self.create_user('customer')
+        self.create_booking(self.customer)
+
+    def test_repeat_get_with_etag_is_not_modified(self):
+        self.authenticate(self.admin)
+        first = self.client.get('/api/bookings/all_bookings/')
+        self.assertEqual(first.status_code, 200)
+        second = self.client.get('/api/bookings/all_bookings/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+
+    def test_change_invalidates_etag(self):
+        self.authenticate(self.admin)
+        first = self.client.get('/api/bookings/all_bookings/')
+        self.create_booking(self.customer)
+        second = self.client.get('/api/bookings/all_bookings/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+
+    def test_wildcard_is_not_a_match(self):
+        self.authenticate(self.admin)
+        response = self.client.get('/api/bookings/all_bookings/', HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 200)
+
+    def test_role_check_runs_before_etag(self):
+        self.authenticate(self.customer)
+        for url in ('/api/bookings/all_bookings/', '/api/bookings/admin/users/'):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, HTTP_IF_NONE_MATCH='*')
+            self.assertEqual(response.status_code, 403, url)
+            self.assertNotIn('ETag', response)
+            # No fingerprint (MAX/COUNT) query for callers the view rejects
+            self.assertFalse([q['sql'] for q in queries if 'MAX(' in q['sql']], url)
+
+    def test_seller_edit_changes_manager_cars_etag(self):
+        from carsales.models import Car
+
+        manager = self.create_user('manager')
+        Car.objects.create(seller=manager, make='Tata', model='Nexon', year=2022, price=900000, mileage=10)
+        self.authenticate(manager)
+        first = self.client.get('/api/manager/car-management/')
+        self.assertEqual(first.status_code, 200)
+        manager.first_name = 'Renamed'
+        manager.save()
+        second = self.client.get('/api/manager/car-management/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+
+
+class CachedResponseTests(BookingFixtures, TestCase):
+    """Writes bump the namespace versions, so the next GET misses the response cache"""
+
+    def setUp(self):
+        super().setUp()
+        self.admin = self.create_user('admin')
+        self.manager = self.create_user('manager')
+
+    def test_settings_update_invalidates_cached_settings(self):
+        self.authenticate(self.admin)
+        url = '/api/bookings/admin/settings/'
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+
+        self.assertEqual(self.client.post(url, {'maxBookingDays': 30}, format='json').status_code, 200)
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['data']['maxBookingDays'], 30)
+
+    def test_new_driver_invalidates_cached_driver_list(self):
+        self.authenticate(self.manager)
+        url = '/api/manager/drivers/'
+        self.assertEqual(len(self.client.get(url).json()['data']), 0)
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+
+        self.create_driver()
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.json()['data']), 1)
+
+    def test_car_edit_invalidates_cached_catalog(self):
+        from carsales.models import Car
+
+        car = Car.objects.create(seller=self.manager, make='Tata', model='Nexon', year=2022, price=900000, mileage=10)
+        self.assertEqual(self.client.get('/api/cars/').json()[0]['price'], '900000.00')
+        car.price = 850000
+        car.save()
+        response = self.client.get('/api/cars/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()[0]['price'], '850000.00')
+
+    def test_local_memory_cache_is_not_shared(self):
+        from config.cache import cache_is_shared
+
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        filebased = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp'}}
+        with override_settings(CACHES=locmem):
+            self.assertFalse(cache_is_shared())
+        with override_settings(CACHES=filebased):
+            self.assertTrue(cache_is_shared())
+
+
+class BookingFilterTests(BookingFixtures, TestCase):
+    """Booking list query-param filters (bookings/filters.py) through the list endpoints"""
+
+    ALL = '/api/bookings/all_bookings/'
+    MINE = '/api/bookings/my_bookings/'
+
+    def setUp(self):
+        super().setUp()
+        self.admin = self.create_user('admin')
+        self.customer = self.create_user('customer')
+        self.other = self.create_user('customer')
+        self.driver = self.create_driver()
+        today = date.today()
+        self.bookings = {
+            'pending': self.create_booking(self.customer, pickup_date=today + timedelta(days=1)),
+            'confirmed': self.create_booking(
+                self.customer, status='confirmed', payment_status='completed', booking_type='premium',
+                assigned_driver=self.driver, pickup_date=today + timedelta(days=5),
+            ),
+            'cancelled': self.create_booking(
+                self.other, status='cancelled', payment_status='failed', booking_type='taxi',
+                driver_option='without-driver', pickup_date=today + timedelta(days=10),
+            ),
+        }
+
+    def ids(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return {row['id'] for row in response.json()['data']}
+
+    def expect(self, *names):
+        return {self.bookings[name].id for name in names}
+
+    def test_each_filter(self):
+        self.authenticate(self.admin)
+        today = date.today()
+        cases = [
+            ({'status': 'confirmed'}, ('confirmed',)),
+            ({'status': 'pending,cancelled'}, ('pending', 'cancelled')),
+            ({'payment_status': 'failed'}, ('cancelled',)),
+            ({'booking_type': 'premium,taxi'}, ('confirmed', 'cancelled')),
+            ({'driver_option': 'without-driver'}, ('cancelled',)),
+            ({'driver': 'assigned'}, ('confirmed',)),
+            ({'driver': 'unassigned'}, ('pending', 'cancelled')),
+            ({'assigned_driver': self.driver.id}, ('confirmed',)),
+            ({'pickup_date': (today + timedelta(days=5)).isoformat()}, ('confirmed',)),
+            ({'pickup_date_from': (today + timedelta(days=2)).isoformat()}, ('confirmed', 'cancelled')),
+            ({'pickup_date_to': (today + timedelta(days=5)).isoformat()}, ('pending', 'confirmed')),
+            ({'user': self.other.id}, ('cancelled',)),
+            ({'status': 'pending,confirmed', 'driver': 'unassigned'}, ('pending',)),
+            ({'status': ''}, ('pending', 'confirmed', 'cancelled')),
+        ]
+        for params, expected in cases:
+            with self.subTest(params=params):
+                self.assertEqual(self.ids(self.ALL, **params), self.expect(*expected))
+
+    def test_staff_only_filters_are_ignored_for_customers(self):
+        self.authenticate(self.customer)
+        # user= can't widen a customer's own list, and assigned_driver= isn't applied
+        self.assertEqual(self.ids(self.MINE, user=self.other.id), self.expect('pending', 'confirmed'))
+        self.assertEqual(self.ids(self.MINE, assigned_driver=self.driver.id + 1), self.expect('pending', 'confirmed'))
+        self.assertEqual(self.ids(self.MINE, status='confirmed'), self.expect('confirmed'))
+
+    def test_invalid_values_are_400(self):
+        self.authenticate(self.admin)
+        response = self.client.get(self.ALL, {
+            'status': 'confirmed,shipped', 'driver': 'maybe', 'pickup_date_from': '31/01/2025', 'user': 'me',
+        })
+        self.assertEqual(response.status_code, 400)
+        body = response.json()
+        self.assertEqual(body['status'], 'error')
+        self.assertEqual(set(body['errors']), {'status', 'driver', 'pickup_date_from', 'user'})
+
+        self.authenticate(self.customer)
+        self.assertEqual(self.client.get(self.MINE, {'booking_type': 'boat'}).status_code, 400)
+
+
+class KeysetPaginationTests(BookingFixtures, TestCase):
+    """?page_size= pages follow next_cursor through every booking exactly once"""
+
+    def setUp(self):
+        super().setUp()
+        self.customer = self.create_user('customer')
+        self.bookings = [self.create_booking(self.customer) for _ in range(7)]
+        # Rows sharing a timestamp must be split by id, not skipped or repeated
+        Booking.objects.filter(pk__in=[b.pk for b in self.bookings[2:5]]).update(created_at=timezone.now())
+        self.authenticate(self.customer)
+
+    def test_cursor_walks_all_rows_newest_first(self):
+        expected = list(Booking.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        seen, cursor, pages = [], None, 0
+        while True:
+            params = {'page_size': 3}
+            if cursor:
+                params['cursor'] = cursor
+            body = self.client.get('/api/bookings/my_bookings/', params).json()
+            seen += [row['id'] for row in body['data']]
+            pages += 1
+            cursor = body['next_cursor']
+            self.assertEqual(body['has_more'], cursor is not None)
+            if not cursor:
+                break
+        self.assertEqual(seen, expected)
+        self.assertEqual(pages, 3)
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get('/api/bookings/my_bookings/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_out_of_range_cursor_is_404(self):
+        # json.loads parses 1e999 as inf, which int() rejects with OverflowError
+        cursor = base64.urlsafe_b64encode(b'{"c": "2024-01-01T00:00:00+00:00", "i": 1e999}').decode()
+        response = self.client.get('/api/bookings/my_bookings/', {'cursor': cursor})
+        self.assertEqual(response.status_code, 404)
+
+    def test_without_page_params_the_full_list_is_returned(self):
+        body = self.client.get('/api/bookings/my_bookings/').json()
+        self.assertEqual(len(body['data']), 7)
+        self.assertNotIn('next_cursor', body)
+
+
+class AdminPaymentTests(BookingFixtures, TestCase):
+    """Admin payments list and void work on ledger (Payment) ids"""
+
+    def setUp(self):
+        super().setUp()
+        self.admin = self.create_user('admin')
+        customer = self.create_user('customer')
+        # Create a few unpaid bookings first so booking and payment ids differ
+        self.unpaid = [self.create_booking(customer) for _ in range(3)]
+        self.booking = self.create_booking(customer, payment_status='completed', razorpay_order_id='order_1')
+        self.payment, = record_payments([(self.booking, 'pay_1', None)])
+        self.authenticate(self.admin)
+
+    def void(self, payment_id):
+        return self.client.post(f'/api/bookings/admin/payments/{payment_id}/void_payment/', {'reason': 'Duplicate charge'},
+                                format='json')
+
+    def test_void_uses_listed_payment_id_and_keeps_the_ledger(self):
+        listed = self.client.get('/api/bookings/admin/payments/').json()['data']
+        self.assertEqual([row['id'] for row in listed], [self.payment.id])
+        self.assertEqual(listed[0]['booking_id'], self.booking.id)
+
+        response = self.void(self.payment.id)
+        self.assertEqual(response.status_code, 200)
+        refund = Refund.objects.get(pk=response.json()['data']['refund_id'])
+        self.assertEqual((refund.payment_id, refund.booking_id), (self.payment.id, self.booking.id))
+        self.assertEqual((refund.refund_amount, refund.status), (self.payment.total_amount, 'approved'))
+        # Insert-only: the payment and invoice rows are still there, bookings untouched
+        self.assertTrue(Payment.objects.filter(pk=self.payment.id).exists())
+        self.assertTrue(Invoice.objects.filter(booking=self.booking).exists())
+        self.assertEqual(Booking.objects.count(), 4)
+
+    def test_payment_is_voided_once(self):
+        self.assertEqual(self.void(self.payment.id).status_code, 200)
+        self.assertEqual(self.void(self.payment.id).status_code, 400)
+        self.assertEqual(Refund.objects.count(), 1)
+
+    def test_void_unknown_payment_is_404(self):
+        response = self.void(self.unpaid[0].id + 1000)
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Refund.objects.exists())
+
+    def test_void_is_admin_only(self):
+        self.authenticate(self.create_user('manager'))
+        self.assertEqual(self.void(self.payment.id).status_code, 403)
+
+
+class AdminUserListTests(BookingFixtures, TestCase):
+    """GET /api/bookings/admin/users/ annotates related counts without a query per user"""
+
+    URL = '/api/bookings/admin/users/'
+    QUERIES = 2  # ETag fingerprint + the annotated user list
+
+    def setUp(self):
+        super().setUp()
+        self.admin = self.create_user('admin')
+        self.customer = self.create_user('customer')
+        for _ in range(3):
+            self.create_booking(self.customer)
+        Document.objects.create(user=self.customer, document_type='id_proof', file_path='documents/id.pdf')
+        self.driver = self.create_driver()
+        self.client.force_authenticate(user=self.admin)
+
+    def rows(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, 200)
+        return {row['id']: row for row in response.json()['data']}, len(queries)
+
+    def test_related_counts_are_annotated(self):
+        rows, _ = self.rows()
+        self.assertEqual(
+            (rows[self.customer.id]['bookingCount'], rows[self.customer.id]['documentCount']), (3, 1)
+        )
+        self.assertFalse(rows[self.customer.id]['hasDriverProfile'])
+        self.assertTrue(rows[self.driver.user_id]['hasDriverProfile'])
+        self.assertEqual((rows[self.admin.id]['bookingCount'], rows[self.admin.id]['documentCount']), (0, 0))
+
+    def test_query_count_does_not_grow_with_users(self):
+        _, queries = self.rows()
+        self.assertEqual(queries, self.QUERIES)
+        for _ in range(10):
+            user = self.create_user('customer')
+            self.create_booking(user)
+            self.create_driver()
+        rows, queries = self.rows()
+        self.assertEqual(len(rows), 23)
+        self.assertEqual(queries, self.QUERIES)
+
+
+class QueryBudgetTests(BookingFixtures, TestCase):
+    """
+    Every booking list is served in a constant number of queries:
+    with 1,000 bookings an N+1 would show up as hundreds of queries.
+    """
+    BOOKINGS = 1000
+    BUDGET = 10
+
+    # Booking list endpoints and the role that can read them
+    ENDPOINTS = [
+        ('/api/bookings/', 'admin'),
+        ('/api/bookings/all_bookings/', 'admin'),
+        ('/api/bookings/my_bookings/', 'customer'),
+        ('/api/bookings/admin/payments/', 'admin'),
+        ('/api/manager/bookings/', 'manager'),
+        ('/api/manager/taxi-rides/', 'manager'),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        fixtures = BookingFixtures()
+        cls.users = {role: fixtures.create_user(role) for role in ('admin', 'manager', 'customer')}
+        drivers = [fixtures.create_driver() for _ in range(5)]
+        booking_types = [choice for choice, _ in Booking.BOOKING_TYPE_CHOICES]
+        Booking.objects.bulk_create([
+            Booking(
+                user=cls.users['customer'],
+                booking_type=booking_types[i % len(booking_types)],
+                number_of_days=1,
+                driver_option='with-driver',
+                assigned_driver=drivers[i % len(drivers)] if i % 2 else None,
+                payment_status='completed' if i % 2 else 'pending',
+                razorpay_order_id=f'order_qb_{i}',
+                pickup_location='Budget Pickup',
+                dropoff_location='Budget Dropoff',
+                pickup_date=date.today(),
+                pickup_time=time(9, 0),
+                phone='0000000000',
+                payment_method='razorpay',
+                total_amount=1000,
+            )
+            for i in range(cls.BOOKINGS)
+        ], batch_size=500)
+        # Ledger rows for the paid half, so the admin payments list has rows to serialize
+        paid = Booking.objects.filter(payment_status='completed')
+        record_payments((booking, f'pay_qb_{booking.id}', None) for booking in paid)
+
+    def test_booking_lists_within_query_budget(self):
+        for url, role in self.ENDPOINTS:
+            with self.subTest(url=url):
+                cache.clear()
+                self.client.force_authenticate(user=self.users[role])
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                data = response.data.get('data', []) if isinstance(response.data, dict) else response.data
+                self.assertGreater(len(data), 100)
+                self.assertLessEqual(len(queries), self.BUDGET, [q['sql'][:120] for q in queries[:20]])
+
+
+class ServerTimingTests(BookingFixtures, TestCase):
+    """The Server-Timing header is opt-in and only ever sent to admins"""
+
+    def test_off_by_default(self):
+        self.authenticate(self.create_user('admin'))
+        self.assertNotIn('Server-Timing', self.client.get('/api/bookings/my_bookings/'))
+
+    @override_settings(SERVER_TIMING_ENABLED=True)
+    def test_enabled_only_for_admins(self):
+        self.authenticate(self.create_user('admin'))
+        response = self.client.get('/api/bookings/my_bookings/')
+        self.assertIn('db;dur=', response['Server-Timing'])
+
+        self.authenticate(self.create_user('customer'))
+        self.assertNotIn('Server-Timing', self.client.get('/api/bookings/my_bookings/'))
+        self.client.credentials()
+        self.assertNotIn('Server-Timing', self.client.get('/api/bookings/my_bookings/'))
+
+
+class SeedLoadCommandTests(TestCase):
+    """seed_load smoke test at a tiny scale"""
+
+    ARGS = ['--users', '20', '--drivers', '5', '--managers', '2', '--admins', '1', '--fleet', '4', '--listings', '3',
+            '--bookings', '60', '--trips', '10', '--reviews', '5', '--days', '30', '--batch-size', '25']
+
+    def seed(self, *args):
+        from django.core.management import call_command
+
+        out = io.StringIO()
+        call_command('seed_load', *self.ARGS, *args, stdout=out)
+        return out.getvalue()
+
+    def test_seeds_the_requested_volumes(self):
+        self.assertIn('Seeded load profile', self.seed())
+        seeded = User.objects.filter(username__startswith='load-')
+        self.assertEqual(seeded.filter(role='customer').count(), 20)
+        self.assertEqual(Driver.objects.filter(user__in=seeded).count(), 5)
+        self.assertEqual(Booking.objects.count(), 60)
+        # A ledger row and invoice per paid booking, and created_at spread over the past days
+        paid = Booking.objects.filter(payment_status='completed').count()
+        self.assertEqual(Payment.objects.filter(status='completed').count(), paid)
+        self.assertEqual(Invoice.objects.count(), paid)
+        self.assertFalse(Payment.objects.filter(booking__payment_status='pending').exists())
+        oldest = Booking.objects.order_by('created_at').first().created_at
+        self.assertGreater(oldest, timezone.now() - timedelta(days=32))
+        self.assertLess(oldest, timezone.now() - timedelta(days=1))
+
+    def test_rerun_needs_clear(self):
+        from django.core.management import CommandError
+
+        self.seed()
+        with self.assertRaises(CommandError):
+            self.seed()
+        self.seed('--clear')
+        self.assertEqual(Booking.objects.count(), 60)
+
+
+class BenchmarkApiCommandTests(BookingFixtures, TestCase):
+    """benchmark_api smoke test: every GET route answers without a server error"""
+
+    def setUp(self):
+        super().setUp()
+        self.create_user('admin')
+        self.create_user('manager')
+        customer = self.create_user('customer')
+        self.create_driver()
+        booking = self.create_booking(customer, payment_status='completed', razorpay_order_id='order_bench')
+        record_payments([(booking, 'pay_bench', None)])
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
+    def benchmark(self, *args):
+        from django.core.management import call_command
+
+        out = io.StringIO()
+        call_command('benchmark_api', *args, stdout=out)
+        return out.getvalue()
+
+    def test_run_writes_results_and_compares(self):
+        output = os.path.join(self.tmp, 'run.json')
+        self.benchmark('--iterations', '2', '--warmup', '0', '--output', output)
+        with open(output) as fh:
+            report = json.load(fh)
+        self.assertGreater(len(report['results']), 20)
+        errors = {label: row['status'] for label, row in report['results'].items() if row['status'] >= 500}
+        self.assertEqual(errors, {})
+        self.assertIn('No regressions', self.benchmark('--compare', output, output))
+
+    def test_compare_flags_query_regressions(self):
+        from django.core.management import CommandError
+
+        output = os.path.join(self.tmp, 'run.json')
+        self.benchmark('--iterations', '1', '--warmup', '0', '--filter', 'my_bookings', '--output', output)
+        with open(output) as fh:
+            report = json.load(fh)
+        baseline = os.path.join(self.tmp, 'baseline.json')
+        for row in report['results'].values():
+            row['queries'] -= 1
+        with open(baseline, 'w') as fh:
+            json.dump(report, fh)
+        with self.assertRaises(CommandError):
+            self.benchmark('--compare', baseline, output)
+
+    def test_needs_seeded_users(self):
+        from django.core.management import CommandError
+
+        User.objects.filter(role='manager').update(is_active=False)
+        with self.assertRaises(CommandError):
+            self.benchmark('--iterations', '1')
+
+
+class BenchmarkSignaturesCommandTests(TestCase):
+    """benchmark_signatures smoke test"""
+
+    def benchmark(self, *args):
+        from django.core.management import call_command
+
+        out = io.StringIO()
+        call_command('benchmark_signatures', *args, stdout=out)
+        return out.getvalue()
+
+    def test_reports_every_case(self):
+        output = self.benchmark('--iterations', '20', '--batch-size', '5')
+        self.assertEqual(len(output.splitlines()), 3)
+        self.assertIn('batches of 5', output)
+
+    def test_batch_is_capped_at_iterations(self):
+        self.assertIn('batches of 3', self.benchmark('--iterations', '3', '--batch-size', '1000'))
+
+    def test_sizes_must_be_positive(self):
+        from django.core.management import CommandError
+
+        for args in (('--batch-size', '0'), ('--iterations', '0'), ('--batch-size', '-1')):
+            with self.subTest(args=args), self.assertRaises(CommandError):
+                self.benchmark('--iterations', '10', *args)
+
+
+class QueryPlanTests(TestCase):
+    """
+    EXPLAIN every hot queryset (bookings/query_plans.py) on seeded data and
+    fail if any of them reads a table with a full scan.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        from .query_plans import seed_plan_data
+
+        cls.context = seed_plan_data(2000)
+
+    def test_hot_queries_use_indexes(self):
+        from .query_plans import HOT_QUERIES, full_scans
+
+        if connection.vendor not in ('mysql', 'postgresql', 'sqlite'):
+            self.skipTest(f'EXPLAIN parsing is not implemented for {connection.vendor}')
+        for name, build in HOT_QUERIES:
+            with self.subTest(query=name):
+                scans, plan = full_scans(build(self.context))
+                self.assertEqual(scans, [], f'{name} uses a full table scan:\n{plan}')
+
+
+class FlakyBackend(FakeGatewayBackend):
+    """Fake gateway whose create_order raises `error` once, optionally after creating the order"""
+
+    def __init__(self, error, created=False):
+        super().__init__()
+        self.error = error
+        self.created = created
+        self.create_calls = 0
+
+    def create_order(self, data):
+        self.create_calls += 1
+        if self.error is not None:
+            error, self.error = self.error, None
+            if self.created:
+                super().create_order(data)
+            raise error
+        return super().create_order(data)
+
+
+def connect_error():
+    from urllib3.exceptions import MaxRetryError, NewConnectionError
+    return requests.ConnectionError(MaxRetryError(None, '/v1/orders', NewConnectionError(None, 'Connection refused')))
+
+
+class PaymentGatewayRetryTests(TestCase):
+    """create_order is not idempotent: it is only re-sent when the gateway can't have seen it"""
+
+    ORDER = {'amount': 150000, 'currency': 'INR', 'receipt': 'booking_1'}
+
+    def gateway(self, backend):
+        return PaymentGateway(backend, max_retries=2, backoff=0)
+
+    def test_timeout_after_creation_reuses_order_by_receipt(self):
+        backend = FlakyBackend(requests.ReadTimeout('read timed out'), created=True)
+        order = self.gateway(backend).create_order(dict(self.ORDER))
+        self.assertEqual(backend.create_calls, 1)
+        self.assertEqual(len(backend.orders), 1)
+        self.assertEqual(order['id'], next(iter(backend.orders)))
+
+    def test_timeout_without_order_creates_once(self):
+        backend = FlakyBackend(requests.ReadTimeout('read timed out'))
+        self.gateway(backend).create_order(dict(self.ORDER))
+        self.assertEqual(backend.create_calls, 2)
+        self.assertEqual(len(backend.orders), 1)
+
+    def test_connect_error_is_resent(self):
+        backend = FlakyBackend(connect_error())
+        with mock.patch.object(backend, 'find_orders') as find_orders:
+            self.gateway(backend).create_order(dict(self.ORDER))
+        find_orders.assert_not_called()
+        self.assertEqual(backend.create_calls, 2)
+
+    def test_timeout_without_receipt_is_not_resent(self):
+        backend = FlakyBackend(requests.ReadTimeout('read timed out'))
+        with self.assertRaises(requests.ReadTimeout):
+            self.gateway(backend).create_order({'amount': 150000, 'currency': 'INR'})
+        self.assertEqual(backend.create_calls, 1)
+
+
+class CreatePaymentOrderTests(BookingFixtures, TestCase):
+    """Checkout creates the gateway order without holding the booking's row lock"""
+
+    def setUp(self):
+        super().setUp()
+        self.customer = self.create_user('customer')
+        self.booking = self.create_booking(self.customer)
+        self.backend = FakeGatewayBackend()
+        patcher = mock.patch('bookings.payment_gateway._gateway', PaymentGateway(self.backend, backoff=0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.authenticate(self.customer)
+        self.url = f'/api/bookings/{self.booking.id}/create_payment_order/'
+
+    def test_order_is_created_and_reused(self):
+        first = self.client.post(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.payment_status, 'initiated')
+        self.assertEqual(self.booking.razorpay_order_id, first.json()['data']['order_id'])
+
+        second = self.client.post(self.url)
+        self.assertEqual(second.json()['data']['order_id'], first.json()['data']['order_id'])
+        self.assertEqual(len(self.backend.orders), 1)
+
+    def test_repeated_idempotency_key_is_replayed(self):
+        first = self.client.post(self.url, HTTP_IDEMPOTENCY_KEY='checkout-1')
+        self.assertEqual(first.status_code, 200)
+        self.assertNotIn('Idempotent-Replayed', first)
+
+        with mock.patch.object(self.backend, 'create_order') as create_order:
+            replay = self.client.post(self.url, HTTP_IDEMPOTENCY_KEY='checkout-1')
+        create_order.assert_not_called()
+        self.assertEqual(replay.status_code, 200)
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(replay.json(), first.json())
+
+        other = self.client.post(self.url, HTTP_IDEMPOTENCY_KEY='checkout-2')
+        self.assertNotIn('Idempotent-Replayed', other)
+
+    def test_concurrent_checkout_is_rejected_while_reserved(self):
+        self.assertIsNotNone(reserve_order_creation(self.booking.id))
+        self.assertIsNone(reserve_order_creation(self.booking.id))
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.backend.orders, {})
+
+    def test_abandoned_claim_expires(self):
+        Booking.objects.filter(pk=self.booking.pk).update(order_claimed_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(self.client.post(self.url).status_code, 200)
+        self.booking.refresh_from_db()
+        self.assertIsNone(self.booking.order_claimed_at)
+        self.assertEqual(self.booking.payment_status, 'initiated')
+
+    def test_gateway_is_called_outside_a_transaction(self):
+        # Inside TestCase every request already runs in atomic blocks; count the view's own
+        depth = len(connection.savepoint_ids)
+        depths = []
+        create_order = self.backend.create_order
+
+        def spy(data):
+            depths.append(len(connection.savepoint_ids))
+            return create_order(data)
+
+        with mock.patch.object(self.backend, 'create_order', spy):
+            self.assertEqual(self.client.post(self.url).status_code, 200)
+        self.assertEqual(depths, [depth])
+
+
+@override_settings(RAZORPAY_WEBHOOK_SECRET='whsec_test')
+class PaymentSignatureTests(BookingFixtures, TestCase):
+    """verify_payment and the webhook endpoint trust only valid signatures and record each payment once"""
+
+    WEBHOOK_URL = '/api/bookings/payments/webhook/'
+
+    def setUp(self):
+        super().setUp()
+        self.customer = self.create_user('customer')
+        self.booking = self.create_booking(self.customer, payment_status='initiated', razorpay_order_id='order_sig1')
+        self.authenticate(self.customer)
+        self.verify_url = f'/api/bookings/{self.booking.id}/verify_payment/'
+
+    def checkout_signature(self, payment_id):
+        return HmacSigner(settings.RAZORPAY_KEY_SECRET).sign(payment_message('order_sig1', payment_id))
+
+    def verify(self, payment_id, signature=None):
+        return self.client.post(self.verify_url, {
+            'razorpay_payment_id': payment_id,
+            'razorpay_order_id': 'order_sig1',
+            'razorpay_signature': signature or self.checkout_signature(payment_id),
+        }, format='json')
+
+    def webhook(self, body, signature=None, event_id='evt_sig1'):
+        return self.client.post(
+            self.WEBHOOK_URL, body, content_type='application/json',
+            HTTP_X_RAZORPAY_SIGNATURE=signature or HmacSigner('whsec_test').sign(body),
+            HTTP_X_RAZORPAY_EVENT_ID=event_id,
+        )
+
+    def captured_body(self, payment_id):
+        return json.dumps({'event': 'payment.captured', 'payload': {'payment': {'entity': {
+            'id': payment_id, 'order_id': 'order_sig1', 'amount': 150000,
+        }}}}).encode()
+
+    def test_bad_checkout_signature_is_rejected(self):
+        response = self.verify('pay_sig1', signature='0' * 64)
+        self.assertEqual(response.status_code, 400)
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.payment_status, 'initiated')
+        self.assertFalse(Payment.objects.exists())
+
+    def test_repeated_verify_records_one_payment(self):
+        self.assertEqual(self.verify('pay_sig1').status_code, 200)
+        self.assertEqual(self.verify('pay_sig1').status_code, 200)
+        self.assertEqual(Payment.objects.filter(gateway_transaction_id='pay_sig1').count(), 1)
+        self.assertEqual(Invoice.objects.filter(booking=self.booking).count(), 1)
+
+    def test_booking_without_an_order_is_rejected(self):
+        # A valid signature for some other order of the same customer proves nothing about this booking
+        Booking.objects.filter(pk=self.booking.pk).update(razorpay_order_id=None)
+        response = self.verify('pay_sig1')
+        self.assertEqual(response.status_code, 400)
+        self.booking.refresh_from_db()
+        self.assertEqual((self.booking.payment_status, self.booking.status), ('initiated', 'pending'))
+        self.assertFalse(Payment.objects.exists())
+
+    def test_order_of_another_booking_is_rejected(self):
+        other = self.create_booking(self.customer, payment_status='initiated', razorpay_order_id='order_other')
+        response = self.client.post(f'/api/bookings/{other.id}/verify_payment/', {
+            'razorpay_payment_id': 'pay_sig1',
+            'razorpay_order_id': 'order_sig1',
+            'razorpay_signature': self.checkout_signature('pay_sig1'),
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Payment.objects.exists())
+
+    def test_payment_after_expiry_keeps_booking_cancelled(self):
+        from .webhooks import process_pending_events
+
+        Booking.objects.filter(pk=self.booking.pk).update(status='cancelled')
+        response = self.verify('pay_sig1')
+        self.assertEqual(response.status_code, 409)
+        self.booking.refresh_from_db()
+        self.assertEqual((self.booking.status, self.booking.payment_status), ('cancelled', 'completed'))
+        self.assertTrue(Payment.objects.filter(gateway_transaction_id='pay_sig1').exists())
+
+        # The webhook for the same payment agrees and flags the refund
+        self.webhook(self.captured_body('pay_sig1'))
+        process_pending_events()
+        event = PaymentWebhookEvent.objects.get()
+        self.assertEqual(event.status, 'processed')
+        self.assertIn('refund required', event.last_error)
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.status, 'cancelled')
+        self.assertEqual(Payment.objects.filter(booking=self.booking).count(), 1)
+
+    def test_bad_webhook_signature_is_rejected(self):
+        response = self.webhook(self.captured_body('pay_sig1'), signature='0' * 64)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PaymentWebhookEvent.objects.exists())
+
+    def test_webhook_redelivery_is_queued_once(self):
+        body = self.captured_body('pay_sig1')
+        self.assertEqual(self.webhook(body).json()['message'], 'Event queued')
+        self.assertEqual(self.webhook(body).json()['message'], 'Duplicate event')
+        self.assertEqual(PaymentWebhookEvent.objects.count(), 1)
+
+    def test_webhook_and_verify_record_one_payment(self):
+        from .webhooks import process_pending_events
+
+        self.webhook(self.captured_body('pay_sig1'))
+        process_pending_events()
+        self.assertEqual(self.verify('pay_sig1').status_code, 200)
+        self.assertEqual(Payment.objects.filter(booking=self.booking).count(), 1)
+
+
+class WebhookProcessingTests(BookingFixtures, TestCase):
+    """A bad event is recorded on its own row and never blocks the rest of its batch"""
+
+    def setUp(self):
+        super().setUp()
+        customer = self.create_user('customer')
+        self.bookings = [
+            self.create_booking(customer, payment_status='initiated', razorpay_order_id=f'order_wh{i}')
+            for i in range(2)
+        ]
+
+    def captured(self, booking, **entity):
+        values = {'id': f'pay_{booking.razorpay_order_id}', 'order_id': booking.razorpay_order_id, 'amount': 150000}
+        values.update(entity)
+        return PaymentWebhookEvent.objects.create(
+            event_id=f'evt_{PaymentWebhookEvent.objects.count()}',
+            event_type='payment.captured',
+            payload={'event': 'payment.captured', 'payload': {'payment': {'entity': values}}},
+        )
+
+    def test_malformed_event_fails_without_retries(self):
+        from .webhooks import process_pending_events
+
+        for index, amount in enumerate(({'value': 150000}, [150000], 'abc')):
+            booking = self.create_booking(self.bookings[0].user, payment_status='initiated',
+                                          razorpay_order_id=f'order_bad{index}')
+            self.captured(booking, amount=amount)
+        good = self.captured(self.bookings[1])
+
+        result = process_pending_events()
+        self.assertEqual((result.processed, result.failed, result.retried), (1, 3, 0))
+        good.refresh_from_db()
+        self.assertEqual(good.status, 'processed')
+        self.assertEqual(Payment.objects.get().booking_id, self.bookings[1].id)
+        for event in PaymentWebhookEvent.objects.exclude(pk=good.pk):
+            self.assertEqual((event.status, event.attempts), ('failed', 1))
+            self.assertIn('Invalid amount', event.last_error)
+
+    def test_transient_error_is_retried_then_failed(self):
+        from . import webhooks
+
+        flaky = self.captured(self.bookings[0])
+        apply_event = webhooks._apply_event
+
+        def apply(event, booking):
+            if event.pk == flaky.pk:
+                raise RuntimeError('lock wait timeout')
+            return apply_event(event, booking)
+
+        with mock.patch.object(webhooks, '_apply_event', apply):
+            result = webhooks.process_pending_events()
+            self.assertEqual((result.processed, result.retried), (0, 1))
+            flaky.refresh_from_db()
+            self.assertEqual((flaky.status, flaky.attempts), ('pending', 1))
+            self.assertIn('RuntimeError', flaky.last_error)
+
+            for _ in range(webhooks.max_attempts() - 1):
+                webhooks.process_pending_events()
+        flaky.refresh_from_db()
+        self.assertEqual((flaky.status, flaky.attempts), ('failed', webhooks.max_attempts()))
+        self.bookings[0].refresh_from_db()
+        self.assertEqual(self.bookings[0].payment_status, 'initiated')
+
+    def test_failed_write_only_rolls_back_its_event(self):
+        from . import webhooks
+
+        events = [self.captured(booking) for booking in self.bookings]
+        poisoned = self.bookings[0].id
+
+        def record(entries):
+            entries = list(entries)
+            if any(booking.id == poisoned for booking, _, _ in entries):
+                raise RuntimeError('ledger unavailable')
+            return record_payments(entries)
+
+        with mock.patch.object(webhooks, 'record_payments', record):
+            counts, _, retry_ids = webhooks.process_batch()
+        self.assertEqual((counts['processed'], counts['retried']), (1, 1))
+        self.assertEqual(retry_ids, {events[0].id})
+
+        # The failed event's booking update was rolled back with its savepoint
+        self.bookings[0].refresh_from_db()
+        self.bookings[1].refresh_from_db()
+        self.assertEqual(self.bookings[0].payment_status, 'initiated')
+        self.assertEqual(self.bookings[1].payment_status, 'completed')
+        self.assertEqual(list(Payment.objects.values_list('booking_id', flat=True)), [self.bookings[1].id])
+
+
+@override_settings(EXPORT_CHUNK_SIZE=2)
+class ExportTests(BookingFixtures, TestCase):
+    """Admin exports stream every row once, in chunks, as CSV or NDJSON"""
+
+    def setUp(self):
+        super().setUp()
+        self.admin = self.create_user('admin')
+        customer = self.create_user('customer')
+        self.bookings = [self.create_booking(customer) for _ in range(4)]
+        self.create_booking(customer, pickup_location='=HYPERLINK("http://example.com")')
+        self.authenticate(self.admin)
+
+    def export(self, path, **params):
+        response = self.client.get(f'/api/manager/admin/exports/{path}/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_bookings_csv(self):
+        import csv
+        import io
+
+        rows = list(csv.DictReader(io.StringIO(self.export('bookings'))))
+        self.assertEqual([int(row['id']) for row in rows], sorted(Booking.objects.values_list('id', flat=True)))
+        # Formula-looking cells are quoted so spreadsheets don't evaluate them
+        self.assertEqual(rows[-1]['pickup_location'], "'=HYPERLINK(\"http://example.com\")")
+
+    def test_formula_prefixes_are_quoted(self):
+        from .exports import _csv_cell
+
+        for value in ("-2+3+cmd|' /C calc'!A0", '+1-800-123-4567', '@SUM(A1)', '=1+1', '\t=1'):
+            self.assertEqual(_csv_cell(value), "'" + value)
+        # Plain text and numbers (negative amounts included) are written as they are
+        self.assertEqual(_csv_cell('Mumbai'), 'Mumbai')
+        self.assertEqual(_csv_cell(Decimal('-150.00')), Decimal('-150.00'))
+        self.assertEqual(_csv_cell(-3), -3)
+
+    def test_users_ndjson_with_filter(self):
+        lines = self.export('users', output='ndjson', role='customer').splitlines()
+        self.assertEqual([json.loads(line)['role'] for line in lines], ['customer'])
+
+    def test_unknown_format_is_400(self):
+        response = self.client.get('/api/manager/admin/exports/bookings/', {'output': 'xlsx'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_only_admins_can_export(self):
+        self.authenticate(self.create_user('manager'))
+        response = self.client.get('/api/manager/admin/exports/bookings/')
+        self.assertEqual(response.status_code, 403)
+
+
+class BulkReviewTests(BookingFixtures, TestCase):
+    """POST /api/manager/bookings/bulk/ approves or rejects pending bookings"""
+
+    URL = '/api/manager/bookings/bulk/'
+
+    def setUp(self):
+        super().setUp()
+        self.manager = self.create_user('manager')
+        customer = self.create_user('customer')
+        self.pending = [self.create_booking(customer) for _ in range(3)]
+        self.confirmed = self.create_booking(customer, status='confirmed')
+        self.authenticate(self.manager)
+
+    def test_approve_ids(self):
+        ids = [self.pending[0].id, self.pending[1].id, self.confirmed.id, 999999]
+        response = self.client.post(self.URL, {'action': 'approve', 'ids': ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['results'], [
+            {'id': self.pending[0].id, 'result': 'approved'},
+            {'id': self.pending[1].id, 'result': 'approved'},
+            {'id': self.confirmed.id, 'result': 'not_pending', 'status': 'confirmed'},
+            {'id': 999999, 'result': 'not_found'},
+        ])
+        statuses = dict(Booking.objects.values_list('id', 'status'))
+        self.assertEqual(statuses[self.pending[0].id], 'confirmed')
+        self.assertEqual(statuses[self.pending[2].id], 'pending')
+
+    def test_reject_by_filter_in_batches(self):
+        with override_settings(BULK_REVIEW_MAX_BOOKINGS=2):
+            first = self.client.post(self.URL, {'action': 'reject', 'filter': {}}, format='json').json()['data']
+            second = self.client.post(self.URL, {'action': 'reject', 'filter': {}}, format='json').json()['data']
+        self.assertEqual((first['counts'], first['has_more']), ({'rejected': 2}, True))
+        self.assertEqual((second['counts'], second['has_more']), ({'rejected': 1}, False))
+        self.assertFalse(Booking.objects.filter(status='pending').exists())
+
+    def test_only_managers_can_review(self):
+        self.authenticate(self.create_user('customer'))
+        response = self.client.post(self.URL, {'action': 'approve', 'ids': [self.pending[0].id]}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Booking.objects.filter(status='pending').count(), 3)
+
+
+@override_settings(DRIVER_IMPORT_HASH_WORKERS=1)
+class DriverImportTests(BookingFixtures, TestCase):
+    """POST /api/manager/drivers/import/ creates valid rows and reports the rest"""
+
+    URL = '/api/manager/drivers/import/'
+
+    def setUp(self):
+        super().setUp()
+        self.manager = self.create_user('manager')
+        self.authenticate(self.manager)
+
+    def row(self, number, **fields):
+        values = {
+            'email': f'import{number}@example.com',
+            'firstName': f'Driver{number}',
+            'licenseNumber': f'IMP{number:04d}',
+            'licenseExpiry': '2030-01-31',
+            'experienceYears': '3',
+        }
+        values.update(fields)
+        return values
+
+    def test_json_rows(self):
+        rows = [
+            self.row(1, password='Initial-Pass-1'),
+            self.row(2),
+            self.row(3, email=self.manager.email),
+            self.row(4, licenseNumber='IMP0001'),
+            self.row(5, licenseExpiry='31/01/2030'),
+        ]
+        response = self.client.post(self.URL, {'drivers': rows}, format='json')
+        self.assertEqual(response.status_code, 201)
+        data = response.json()['data']
+        self.assertEqual((data['created'], data['failed']), (2, 3))
+        results = {row['row']: row for row in data['results']}
+        self.assertEqual(results[3]['errors'], {'email': 'Email already exists'})
+        self.assertEqual(results[4]['errors'], {'licenseNumber': 'Duplicate of row 1'})
+        self.assertIn('licenseExpiry', results[5]['errors'])
+        self.assertNotIn('temporaryPassword', results[1])
+
+        driver = Driver.objects.select_related('user').get(license_number='IMP0002')
+        self.assertTrue(driver.is_verified)
+        self.assertEqual(driver.user.role, 'driver')
+        self.assertTrue(driver.user.check_password(results[2]['temporaryPassword']))
+        self.assertTrue(User.objects.get(email='import1@example.com').check_password('Initial-Pass-1'))
+
+    def test_csv_dry_run_creates_nothing(self):
+        csv_file = SimpleUploadedFile(
+            'drivers.csv',
+            b'email,firstName,licenseNumber,licenseExpiry\nimport1@example.com,Asha,IMP0001,2030-01-31\n',
+            content_type='text/csv',
+        )
+        response = self.client.post(self.URL + '?dry_run=true', {'file': csv_file}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['results'], [
+            {'row': 1, 'email': 'import1@example.com', 'status': 'valid'},
+        ])
+        self.assertFalse(Driver.objects.exists())
+
+    def test_missing_columns_is_400(self):
+        csv_file = SimpleUploadedFile('drivers.csv', b'email\nimport1@example.com\n', content_type='text/csv')
+        response = self.client.post(self.URL, {'file': csv_file}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+
+    def test_existing_email_and_license_match_case_insensitively(self):
+        self.create_user('customer', email='Import1@Example.com')
+        self.create_driver(license_number='IMP0002')
+        response = self.client.post(self.URL, {'drivers': [
+            self.row(1), self.row(2, email='import2@example.com', licenseNumber='imp0002'),
+        ]}, format='json')
+        results = {row['row']: row for row in response.json()['data']['results']}
+        self.assertEqual(results[1]['errors'], {'email': 'Email already exists'})
+        self.assertEqual(results[2]['errors'], {'licenseNumber': 'License number already registered'})
+        self.assertFalse(User.objects.filter(email='import1@example.com').exists())
+
+    def test_passwords_hashed_on_threads_match_inline(self):
+        from .driver_import import hash_passwords
+
+        passwords = [f'Pass-{number}' for number in range(5)]
+        with override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']):
+            hashed = hash_passwords(passwords, workers=3)
+            self.assertEqual(len(hashed), 5)
+            for password, encoded in zip(passwords, hashed):
+                self.assertTrue(check_password(password, encoded))
+
+
+
+class ExpirySweeperTests(BookingFixtures, TestCase):
+    """Unpaid pending bookings are cancelled once their payment status's timeout has passed"""
+
+    def setUp(self):
+        super().setUp()
+        self.customer = self.create_user('customer')
+        self.now = timezone.now()
+
+    def booking_aged(self, seconds, **fields):
+        booking = self.create_booking(self.customer, **fields)
+        Booking.objects.filter(pk=booking.pk).update(created_at=self.now - timedelta(seconds=seconds))
+        return booking
+
+    def statuses(self, bookings):
+        return [Booking.objects.get(pk=booking.pk).status for booking in bookings]
+
+    def test_each_payment_status_has_its_own_cutoff(self):
+        from .expiry import sweep_expired_bookings
+
+        # Defaults: pending 3600s, failed 1800s, initiated (held for payment) 7200s
+        expired = [
+            self.booking_aged(3601, payment_status='pending'),
+            self.booking_aged(1801, payment_status='failed'),
+            self.booking_aged(7201, payment_status='initiated'),
+        ]
+        kept = [
+            self.booking_aged(3600, payment_status='pending'),  # exactly at the cutoff
+            self.booking_aged(3601, payment_status='initiated'),
+            self.booking_aged(90000, payment_status='completed'),
+            self.booking_aged(90000, payment_status='pending', status='confirmed'),
+        ]
+        result = sweep_expired_bookings(now=self.now)
+        self.assertEqual((result.scanned, result.cancelled), (3, 3))
+        self.assertEqual(self.statuses(expired), ['cancelled'] * 3)
+        self.assertEqual(self.statuses(kept), ['pending', 'pending', 'pending', 'confirmed'])
+
+    def test_batches_walk_every_expired_row_once(self):
+        from .expiry import sweep_expired_bookings
+
+        expired = [self.booking_aged(4000) for _ in range(5)]
+        # Two rows sharing created_at must be split by id, not skipped
+        Booking.objects.filter(pk__in=[expired[1].pk, expired[2].pk]).update(created_at=self.now - timedelta(hours=2))
+        result = sweep_expired_bookings(batch_size=2, now=self.now)
+        self.assertEqual((result.batches, result.scanned, result.cancelled), (3, 5, 5))
+        self.assertEqual(self.statuses(expired), ['cancelled'] * 5)
+
+    def test_dry_run_changes_nothing(self):
+        from .expiry import sweep_expired_bookings
+
+        booking = self.booking_aged(4000)
+        result = sweep_expired_bookings(dry_run=True, now=self.now)
+        self.assertEqual((result.scanned, result.cancelled), (1, 0))
+        self.assertEqual(self.statuses([booking]), ['pending'])
+
+    def test_payment_verified_meanwhile_is_not_cancelled(self):
+        from . import expiry
+
+        booking = self.booking_aged(8000, payment_status='initiated')
+        expired_bookings = expiry.expired_bookings
+
+        def paid_after_read(payment_status, now=None):
+            # The batch is read, then the customer's payment lands before the UPDATE
+            Booking.objects.filter(pk=booking.pk).update(status='confirmed', payment_status='completed')
+            return expired_bookings(payment_status, now)
+
+        with mock.patch.object(expiry, 'expired_bookings', paid_after_read):
+            result = expiry.sweep_expired_bookings(now=self.now)
+        self.assertEqual(result.cancelled, 0)
+        self.assertEqual(self.statuses([booking]), ['confirmed'])
+
+
+class AvailabilityTests(BookingFixtures, TestCase):
+    """Reservation overlap (pickup_date + number_of_days) is decided in SQL"""
+
+    def setUp(self):
+        super().setUp()
+        self.customer = self.create_user('customer')
+        self.today = date.today()
+        self.drivers = {name: self.create_driver() for name in ('same_days', 'ends_inside', 'ends_before', 'free')}
+        self.booking = self.reserve('same_days', 3, 2)
+        self.reserve('ends_inside', 2, 2)  # Days 2-3
+        self.reserve('ends_before', 1, 2)  # Days 1-2: free again on day 3
+
+    def reserve(self, name, offset, days):
+        return self.create_booking(
+            self.customer, assigned_driver=self.drivers[name], status='confirmed',
+            pickup_date=self.today + timedelta(days=offset), number_of_days=days,
+        )
+
+    def window(self):
+        return self.today + timedelta(days=3), self.today + timedelta(days=5)
+
+    def test_reserved_driver_ids_in_one_query(self):
+        from .availability import reserved_driver_ids
+
+        reserved_driver_ids(*self.window())  # Load the platform settings snapshot
+        with self.assertNumQueries(1):
+            reserved = reserved_driver_ids(*self.window())
+        self.assertEqual(reserved, {self.drivers['same_days'].id, self.drivers['ends_inside'].id})
+
+    def test_exclude_booking_frees_its_driver(self):
+        from .availability import available_drivers
+
+        free = set(available_drivers(*self.window(), exclude_booking_id=self.booking.id).values_list('id', flat=True))
+        self.assertEqual(free, {self.drivers[name].id for name in ('same_days', 'ends_before', 'free')})
+
+    def test_view_with_booking_id(self):
+        url = '/api/bookings/available_drivers/'
+        self.authenticate(self.create_user('manager'))
+        body = self.client.get(url, {'booking_id': self.booking.id}).json()
+        self.assertEqual(body['pickup_date'], self.booking.pickup_date.isoformat())
+        self.assertIn(self.drivers['same_days'].id, [driver['id'] for driver in body['data']])
+
+        body = self.client.get(url, {'pickup_date': self.booking.pickup_date.isoformat(), 'number_of_days': 2}).json()
+        self.assertNotIn(self.drivers['same_days'].id, [driver['id'] for driver in body['data']])
+
+        self.authenticate(self.customer)
+        self.assertEqual(self.client.get(url, {'booking_id': self.booking.id}).status_code, 403)
+
+
+class PlatformSettingsValidationTests(BookingFixtures, TestCase):
+    """validate_platform_settings enforces types, finiteness and per-key ranges"""
+
+    def assertRejected(self, data, api_name):
+        from .platform_settings import validate_platform_settings
+
+        cleaned, errors = validate_platform_settings(data)
+        self.assertIn(api_name, errors, data)
+        self.assertEqual(cleaned, {})
+
+    def test_valid_values_are_coerced(self):
+        from .platform_settings import validate_platform_settings
+
+        cleaned, errors = validate_platform_settings({
+            'maxBookingDays': '30', 'commissionRate': '12.5', 'pendingPaymentTimeout': 900.0,
+            'platformFee': 0, 'maintenanceMode': 'false',
+        })
+        self.assertEqual(errors, {})
+        self.assertEqual(cleaned, {
+            'max_booking_days': 30, 'commission_rate': 12.5, 'pending_payment_timeout': 900,
+            'platform_fee': 0.0, 'maintenance_mode': False,
+        })
+
+    def test_non_finite_numbers_are_rejected(self):
+        for value in ('NaN', 'Infinity', '-inf', '1e400', float('nan')):
+            self.assertRejected({'commissionRate': value}, 'commissionRate')
+            self.assertRejected({'maxBookingDays': value}, 'maxBookingDays')
+
+    def test_zero_and_negative_values_are_rejected(self):
+        for api_name in ('maxBookingDays', 'pendingBookingTimeout', 'pendingPaymentTimeout',
+                         'pendingBookingHoldTime', 'commissionRate', 'maxConcurrentBookings'):
+            for value in (0, -5):
+                self.assertRejected({api_name: value}, api_name)
+
+    def test_out_of_range_values_are_rejected(self):
+        self.assertRejected({'commissionRate': 100.5}, 'commissionRate')
+        self.assertRejected({'maxBookingDays': 10 ** 9}, 'maxBookingDays')
+        self.assertRejected({'maxBookingDays': 2.5}, 'maxBookingDays')
+        self.assertRejected({'pendingPaymentTimeout': 5}, 'pendingPaymentTimeout')
+
+    def test_api_rejects_invalid_settings_without_saving(self):
+        from .models import PlatformSetting
+
+        self.authenticate(self.create_user('admin'))
+        response = self.client.post(
+            '/api/manager/admin/settings/', {'maxBookingDays': 0, 'platformName': 'Renamed'}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()['errors']), ['maxBookingDays'])
+        self.assertFalse(PlatformSetting.objects.exists())
+
+
+class PlatformSettingsReloadTests(TestCase):
+    """Snapshots are reloaded from the database, so changes reach processes that didn't make them"""
+
+    def test_change_from_another_process_is_picked_up_after_the_interval(self):
+        from .models import PlatformSetting
+        from .platform_settings import _snapshot, expire_snapshot, get_platform_setting
+
+        expire_snapshot()
+        self.assertEqual(get_platform_setting('max_booking_days'), 365)
+        # A row written elsewhere: no signal or cache entry reaches this process
+        PlatformSetting.objects.bulk_create([PlatformSetting(key='max_booking_days', value=30)])
+        cache.clear()
+        self.assertEqual(get_platform_setting('max_booking_days'), 365)
+
+        with mock.patch('bookings.platform_settings.time.monotonic', return_value=_snapshot.loaded_at + 2):
+            self.assertEqual(get_platform_setting('max_booking_days'), 30)
+
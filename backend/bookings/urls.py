@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import BookingViewSet
+from .views import BookingViewSet, razorpay_webhook
 from .manager_admin_views import (
     ManagerBookingViewSet,
     ManagerStatsViewSet,
@@ -8,6 +8,8 @@ from .manager_admin_views import (
     AdminUserViewSet,
     AdminPaymentViewSet,
     AdminSettingsViewSet,
+    AdminMetricsViewSet,
+    AdminExportViewSet,
     ManagerCarManagementViewSet,
     AdminCarManagementViewSet,
     ManagerDriverViewSet,
@@ -30,9 +32,13 @@ router.register(r'admin/stats', AdminStatsViewSet, basename='admin-stats')
 router.register(r'admin/users', AdminUserViewSet, basename='admin-users')
 router.register(r'admin/payments', AdminPaymentViewSet, basename='admin-payments')
 router.register(r'admin/settings', AdminSettingsViewSet, basename='admin-settings')
+router.register(r'admin/metrics', AdminMetricsViewSet, basename='admin-metrics')
+router.register(r'admin/exports', AdminExportViewSet, basename='admin-exports')
 router.register(r'admin/car-management', AdminCarManagementViewSet, basename='admin-cars')
 router.register(r'admin/drivers', AdminDriverViewSet, basename='admin-drivers')
 
 urlpatterns = [
+    # Razorpay webhooks (signature-authenticated, no token)
+    path('payments/webhook/', razorpay_webhook, name='razorpay-webhook'),
     path('', include(router.urls)),
 ]
@@ -1,17 +1,25 @@
 from rest_framework import viewsets, status
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, authentication_classes, permission_classes
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.conf import settings
+from django.db import transaction
 from .models import Booking
 from .serializers import BookingSerializer, BookingCreateSerializer
+from .filters import BookingFilterBackend
+from .ledger import apply_captured_payment, record_payments
+from .signatures import verify_payment_signature
+from config.cache import cache_response, idempotent
+from config.conditional import conditional_get
+from .platform_settings import get_platform_setting
+from .payment_gateway import (
+    GatewayUnavailable, get_payment_gateway, release_order_creation, remember_order, reserve_order_creation,
+    reusable_order,
+)
 import logging
 from decimal import Decimal
 import json
-import razorpay
 from razorpay.errors import BadRequestError, GatewayError, ServerError
-import hmac
-import hashlib
 
 
 logger = logging.getLogger(__name__)
@@ -22,27 +30,73 @@ def is_valid_razorpay_key(key_id):
     if not key_id or not isinstance(key_id, str):
         return False
     return key_id.startswith('rzp_test_') or key_id.startswith('rzp_live_')
+
+
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def razorpay_webhook(request):
+    """
+    Razorpay webhook receiver
+    POST /api/bookings/payments/webhook/
+
+    Verifies X-Razorpay-Signature over the raw body and queues the event for
+    the process_payment_webhooks worker; nothing else happens in the request,
+    so Razorpay gets its 200 right away.
+    """
+    from .signatures import verify_webhook_signature
+    from .webhooks import enqueue_event
+
+    if not settings.RAZORPAY_WEBHOOK_SECRET:
+        logger.error('Razorpay webhook received but RAZORPAY_WEBHOOK_SECRET is not set')
+        return Response(
+            {'status': 'error', 'message': 'Webhooks are not configured'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+    body = request.body
+    if not verify_webhook_signature(body, request.META.get('HTTP_X_RAZORPAY_SIGNATURE')):
+        logger.warning('Rejected Razorpay webhook with an invalid signature')
+        return Response(
+            {'status': 'error', 'message': 'Invalid webhook signature'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        event, created = enqueue_event(body, request.META.get('HTTP_X_RAZORPAY_EVENT_ID'))
+    except (ValueError, AttributeError):
+        return Response(
+            {'status': 'error', 'message': 'Malformed webhook payload'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    return Response(
+        {'status': 'success', 'message': 'Event queued' if created else 'Duplicate event'},
+        status=status.HTTP_200_OK
+    )
+
+
 class BookingViewSet(viewsets.ModelViewSet):
     """ViewSet for managing bookings"""
     serializer_class = BookingSerializer
     permission_classes = [IsAuthenticated]
+    filter_backends = [BookingFilterBackend]
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        # Initialize Razorpay client
-        self.razorpay_client = razorpay.Client(
-            auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
-        )
-    
     def get_queryset(self):
         """Return bookings for the current user or all bookings if admin"""
         user = self.request.user
         if user.role == 'admin' or user.role == 'manager':
-            return Booking.objects.all()
-        return Booking.objects.filter(user=user)
+            return BookingSerializer.optimized_queryset()
+        return BookingSerializer.optimized_queryset(Booking.objects.filter(user=user))
     
     def create(self, request, *args, **kwargs):
         """Create a new booking"""
+        if get_platform_setting('maintenance_mode'):
+            return Response(
+                {'status': 'error', 'message': 'Bookings are temporarily disabled for maintenance'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        
         serializer = BookingCreateSerializer(data=request.data)
         if serializer.is_valid():
             booking = serializer.save(user=request.user)
@@ -71,7 +125,13 @@ class BookingViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def my_bookings(self, request):
         """Get current user's bookings"""
-        bookings = Booking.objects.filter(user=request.user)
+        bookings = self.filter_queryset(
+            BookingSerializer.optimized_queryset(Booking.objects.filter(user=request.user))
+        )
+        page = self.paginate_queryset(bookings)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = self.get_serializer(bookings, many=True)
         return Response(
             {
@@ -82,6 +142,12 @@ class BookingViewSet(viewsets.ModelViewSet):
         )
     
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    @conditional_get(
+        'all-bookings',
+        lambda view, request: view.filter_queryset(Booking.objects.all()),
+        namespaces=['users', 'drivers'],
+        roles=('admin', 'manager'),
+    )
     def all_bookings(self, request):
         """Get all bookings (admin/manager only)"""
         if request.user.role not in ['admin', 'manager']:
@@ -90,7 +156,11 @@ class BookingViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        bookings = Booking.objects.all()
+        bookings = self.filter_queryset(BookingSerializer.optimized_queryset())
+        page = self.paginate_queryset(bookings)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = self.get_serializer(bookings, many=True)
         return Response(
             {
@@ -130,6 +200,7 @@ class BookingViewSet(viewsets.ModelViewSet):
         )
     
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    @idempotent('create-payment-order')
     def create_payment_order(self, request, pk=None):
         """Create a Razorpay order for booking payment"""
         booking = self.get_object()
@@ -141,6 +212,31 @@ class BookingViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
+        if get_platform_setting('maintenance_mode'):
+            return Response(
+                {'status': 'error', 'message': 'Payments are temporarily disabled for maintenance'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        
+        try:
+            return self._payment_order_response(booking)
+        except Exception as e:
+            logger.exception('Unexpected error in create_payment_order for booking %s', booking.id)
+            return Response(
+                {'status': 'error', 'message': f'Unexpected error: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
+    def _payment_order_response(self, booking):
+        """
+        Reuse the booking's open gateway order or create one.
+
+        No row lock is held across gateway calls: concurrent checkouts of the
+        same booking (double clicks, retries, other workers) are serialized by
+        a claim column on the booking, and the row is only locked to store
+        the new order.
+        """
+        booking = Booking.objects.select_related('user').get(pk=booking.pk)
         # Check if booking already has a payment initiated
         if booking.payment_status == 'completed':
             return Response(
@@ -148,101 +244,128 @@ class BookingViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        # Ensure amount is converted safely to paise
         try:
-            # Ensure amount is converted safely to paise
-            try:
-                amount_decimal = Decimal(str(booking.total_amount))
-            except Exception:
-                amount_decimal = Decimal(0)
+            amount_decimal = Decimal(str(booking.total_amount))
+        except Exception:
+            amount_decimal = Decimal(0)
 
-            amount_in_paise = int(amount_decimal * Decimal('100'))
-            
-            if amount_in_paise <= 0:
-                logger.error('Invalid amount for booking %s: %s', booking.id, booking.total_amount)
+        amount_in_paise = int(amount_decimal * Decimal('100'))
+        
+        if amount_in_paise <= 0:
+            logger.error('Invalid amount for booking %s: %s', booking.id, booking.total_amount)
+            return Response(
+                {'status': 'error', 'message': 'Invalid booking amount'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        order = reusable_order(booking, amount_in_paise)
+        if order is not None:
+            logger.info('Reusing payment order: booking_id=%s order_id=%s', booking.id, order['id'])
+        else:
+            claim = reserve_order_creation(booking.id)
+            if claim is None:
                 return Response(
-                    {'status': 'error', 'message': 'Invalid booking amount'},
-                    status=status.HTTP_400_BAD_REQUEST
+                    {'status': 'error', 'message': 'A payment order is already being created for this booking, please retry'},
+                    status=status.HTTP_409_CONFLICT
                 )
-            
-            logger.debug('Creating payment order: booking_id=%s amount_paise=%s', booking.id, amount_in_paise)
-            
-            # Create Razorpay order
-            # Amount should be in paise (1 INR = 100 paise)
-            order_data = {
-                'amount': amount_in_paise,
-                'currency': 'INR',
-                'receipt': f'booking_{booking.id}',
-                'notes': {
-                    'booking_id': booking.id,
-                    'user_email': booking.user.email,
-                    'booking_type': booking.booking_type
-                }
-            }
-            
             try:
-                # Always use real Razorpay API
-                order = self.razorpay_client.order.create(data=order_data)
-                logger.info('Payment order created: order_id=%s', order['id'])
-            except (BadRequestError, GatewayError, ServerError) as rp_e:
-                logger.exception('Razorpay API error for booking %s: %s', booking.id, str(rp_e))
-                error_msg = str(rp_e).lower()
-                
-                if 'auth' in error_msg or 'invalid' in error_msg:
-                    logger.error('Razorpay credentials validation failed for booking %s', booking.id)
-                    return Response(
-                        {
-                            'status': 'error',
-                            'message': 'Razorpay API Error: Invalid or expired credentials',
-                            'details': 'Please verify your Razorpay API keys at https://dashboard.razorpay.com/'
-                        },
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                else:
-                    return Response(
-                        {'status': 'error', 'message': f'Payment service unavailable: {error_msg}'},
-                        status=status.HTTP_502_BAD_GATEWAY
-                    )
-            except Exception as e:
-                logger.exception('Order creation failed for booking %s: %s', booking.id, str(e))
-                error_msg = str(e) if str(e) else 'Unknown error'
-                return Response(
-                    {'status': 'error', 'message': f'Order creation error: {error_msg}'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Save order ID to booking
-            booking.razorpay_order_id = order['id']
-            booking.payment_status = 'initiated'
-            booking.save()
-            
-            # Response data for real Razorpay
-            resp_data = {
-                'order_id': order['id'],
-                'amount': amount_in_paise,
-                'currency': 'INR',
+                # Another checkout may have stored an order just before the claim was taken
+                booking.refresh_from_db(fields=['razorpay_order_id', 'payment_status'])
+                order = reusable_order(booking, amount_in_paise) or self._create_payment_order(booking, amount_in_paise)
+            finally:
+                release_order_creation(booking.id, claim)
+            if isinstance(order, Response):
+                return order
+
+        # Response data for real Razorpay
+        resp_data = {
+            'order_id': order['id'],
+            'amount': amount_in_paise,
+            'currency': 'INR',
+            'booking_id': booking.id,
+            'user_email': booking.user.email,
+        }
+
+        # Expose the key_id for Razorpay checkout
+        if is_valid_razorpay_key(settings.RAZORPAY_KEY_ID):
+            resp_data['key_id'] = settings.RAZORPAY_KEY_ID
+
+        return Response(
+            {
+                'status': 'success',
+                'message': 'Payment order created',
+                'data': resp_data
+            },
+            status=status.HTTP_200_OK
+        )
+    
+    def _create_payment_order(self, booking, amount_in_paise):
+        """Create a gateway order and store it on the booking; returns the order or an error Response"""
+        # Create Razorpay order
+        # Amount should be in paise (1 INR = 100 paise)
+        order_data = {
+            'amount': amount_in_paise,
+            'currency': 'INR',
+            'receipt': f'booking_{booking.id}',
+            'notes': {
                 'booking_id': booking.id,
                 'user_email': booking.user.email,
+                'booking_type': booking.booking_type
             }
+        }
 
-            # Expose the key_id for Razorpay checkout
-            if is_valid_razorpay_key(settings.RAZORPAY_KEY_ID):
-                resp_data['key_id'] = settings.RAZORPAY_KEY_ID
-
+        try:
+            order = get_payment_gateway().create_order(order_data)
+            logger.info('Payment order created: order_id=%s', order['id'])
+        except GatewayUnavailable as e:
+            logger.warning('Payment gateway circuit open, booking %s: %s', booking.id, e)
             return Response(
-                {
-                    'status': 'success',
-                    'message': 'Payment order created',
-                    'data': resp_data
-                },
-                status=status.HTTP_200_OK
+                {'status': 'error', 'message': str(e)},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
             )
+        except (BadRequestError, GatewayError, ServerError) as rp_e:
+            logger.exception('Razorpay API error for booking %s: %s', booking.id, str(rp_e))
+            error_msg = str(rp_e).lower()
+
+            if 'auth' in error_msg or 'invalid' in error_msg:
+                logger.error('Razorpay credentials validation failed for booking %s', booking.id)
+                return Response(
+                    {
+                        'status': 'error',
+                        'message': 'Razorpay API Error: Invalid or expired credentials',
+                        'details': 'Please verify your Razorpay API keys at https://dashboard.razorpay.com/'
+                    },
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            else:
+                return Response(
+                    {'status': 'error', 'message': f'Payment service unavailable: {error_msg}'},
+                    status=status.HTTP_502_BAD_GATEWAY
+                )
         except Exception as e:
-            logger.exception('Unexpected error in create_payment_order for booking %s', booking.id)
+            logger.exception('Order creation failed for booking %s: %s', booking.id, str(e))
+            error_msg = str(e) if str(e) else 'Unknown error'
             return Response(
-                {'status': 'error', 'message': f'Unexpected error: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {'status': 'error', 'message': f'Order creation error: {error_msg}'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-    
+
+        # Save order ID to booking; a payment may have completed while the gateway was called
+        with transaction.atomic():
+            locked = Booking.objects.select_for_update().get(pk=booking.pk)
+            if locked.payment_status == 'completed':
+                return Response(
+                    {'status': 'error', 'message': 'Payment already completed'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            locked.razorpay_order_id = order['id']
+            locked.payment_status = 'initiated'
+            locked.order_claimed_at = None
+            locked.save()
+        remember_order(booking.id, order)
+        return order
+
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def verify_payment(self, request, pk=None):
         """Verify Razorpay payment signature"""
@@ -267,31 +390,39 @@ class BookingViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Always verify signature using HMAC-SHA256
-            verify_data = f"{order_id}|{payment_id}"
-            generated_signature = hmac.new(
-                settings.RAZORPAY_KEY_SECRET.encode(),
-                verify_data.encode(),
-                hashlib.sha256
-            ).hexdigest()
-            
-            signature_valid = (signature == generated_signature)
-            if not signature_valid:
-                logger.warning('Invalid payment signature for booking %s - Expected: %s, Got: %s', 
-                             booking.id, generated_signature, signature)
+            # The signature only proves the payment belongs to order_id, so the order must be this booking's
+            if not booking.razorpay_order_id or order_id != booking.razorpay_order_id:
+                logger.warning('Payment order %s does not match booking %s', order_id, booking.id)
+                return Response(
+                    {'status': 'error', 'message': 'Payment does not belong to this booking'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             
-            if not signature_valid:
+            if not verify_payment_signature(order_id, payment_id, signature):
+                logger.warning('Invalid payment signature for booking %s (order %s)', booking.id, order_id)
                 return Response(
                     {'status': 'error', 'message': 'Invalid payment signature'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Update booking with payment details
-            booking.razorpay_payment_id = payment_id
-            booking.razorpay_signature = signature
-            booking.payment_status = 'completed'
-            booking.status = 'confirmed'
-            booking.save()
+            # Update booking and write the ledger rows together
+            with transaction.atomic():
+                booking = Booking.objects.select_for_update().get(pk=booking.pk)
+                _, refund_required = apply_captured_payment(booking, payment_id)
+                booking.razorpay_signature = signature
+                booking.save()
+                record_payments([(booking, booking.razorpay_payment_id, signature)])
+            
+            if refund_required:
+                # Paid after the expiry sweeper cancelled it: same outcome as the webhook
+                return Response(
+                    {
+                        'status': 'error',
+                        'message': 'This booking expired before the payment completed; the payment will be refunded',
+                        'data': BookingSerializer(booking).data
+                    },
+                    status=status.HTTP_409_CONFLICT
+                )
             
             logger.info('Payment verified and booking confirmed: booking_id=%s payment_id=%s', booking.id, payment_id)
             
@@ -311,14 +442,41 @@ class BookingViewSet(viewsets.ModelViewSet):
             )
     
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    @cache_response('available-drivers', namespaces=['drivers', 'users', 'bookings', 'trips'], ttl=30,
+                    vary_on=['role'])
     def available_drivers(self, request):
-        """Get available drivers for a specific date"""
-        from .models import Driver, Trip
-        from datetime import datetime, timedelta
+        """
+        Get available drivers for a specific date
+        ?pickup_date=YYYY-MM-DD&number_of_days=N, or (managers/admins)
+        ?booking_id=<id> for the booking's own window; that booking's
+        current driver is then not counted as busy.
+        """
+        from .models import Driver
+        from .serializers import DriverSerializer
+        from .availability import available_drivers, booking_window
+        from datetime import datetime
         
         pickup_date_str = request.query_params.get('pickup_date')
         number_of_days = request.query_params.get('number_of_days', 1)
         
+        booking_id = request.query_params.get('booking_id')
+        if booking_id:
+            if request.user.role not in ('admin', 'manager'):
+                return Response(
+                    {'status': 'error', 'message': 'Only managers can check drivers for a booking'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            try:
+                booking = Booking.objects.only('id', 'pickup_date', 'number_of_days').get(pk=int(booking_id))
+            except (ValueError, Booking.DoesNotExist):
+                return Response(
+                    {'status': 'error', 'message': 'Booking not found'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            booking_id = booking.id
+            pickup_date_str = pickup_date_str or booking.pickup_date.isoformat()
+            number_of_days = request.query_params.get('number_of_days', booking.number_of_days)
+        
         if not pickup_date_str:
             return Response(
                 {'status': 'error', 'message': 'pickup_date is required'},
@@ -328,7 +486,7 @@ class BookingViewSet(viewsets.ModelViewSet):
         try:
             pickup_date = datetime.strptime(pickup_date_str, '%Y-%m-%d').date()
             number_of_days = int(number_of_days)
-            dropoff_date = pickup_date + timedelta(days=number_of_days)
+            pickup_date, dropoff_date = booking_window(pickup_date, number_of_days)
         except ValueError:
             return Response(
                 {'status': 'error', 'message': 'Invalid date format. Use YYYY-MM-DD'},
@@ -339,31 +497,22 @@ class BookingViewSet(viewsets.ModelViewSet):
         all_drivers = Driver.objects.filter(
             is_verified=True,
             status__in=['available', 'assigned']
-        ).select_related('user')
+        )
         
         # If no verified drivers found, get ALL drivers (to show manager-added drivers)
         if not all_drivers.exists():
-            all_drivers = Driver.objects.filter(is_verified=True).select_related('user')
+            all_drivers = Driver.objects.filter(is_verified=True)
         
         # If still no drivers, get unverified drivers too (for testing)
         if not all_drivers.exists():
-            all_drivers = Driver.objects.all().select_related('user')
-        
-        # Filter out drivers who have trips during the booking period
-        available_drivers_list = []
-        for driver in all_drivers:
-            # Check if driver has any trips overlapping with booking period
-            overlapping_trips = Trip.objects.filter(
-                driver=driver,
-                status__in=['pending', 'started']
-            ).filter(
-                start_time__date__lt=dropoff_date,
-                end_time__date__gte=pickup_date
-            )
-            
-            if not overlapping_trips.exists():
-                from .serializers import DriverSerializer
-                available_drivers_list.append(DriverSerializer(driver).data)
+            all_drivers = Driver.objects.all()
+        
+        # Filter out drivers with overlapping trips or booking reservations
+        free_drivers = available_drivers(
+            pickup_date, dropoff_date, drivers=all_drivers, exclude_booking_id=booking_id or None
+        )
+        free_drivers = DriverSerializer.optimized_queryset(free_drivers)
+        available_drivers_list = DriverSerializer(free_drivers, many=True).data
         
         return Response(
             {
@@ -438,6 +587,7 @@ class BookingViewSet(viewsets.ModelViewSet):
         )
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    @cache_response('booking-admin-drivers', namespaces=['drivers', 'users'], vary_on=['role'])
     def admin_drivers(self, request):
         """Get all drivers in system (admin only)"""
         if request.user.role != 'admin':
@@ -451,7 +601,7 @@ class BookingViewSet(viewsets.ModelViewSet):
             from .serializers import DriverSerializer
             
             # Get all drivers with related user data
-            drivers = Driver.objects.select_related('user').order_by('-created_at')
+            drivers = DriverSerializer.optimized_queryset().order_by('-created_at')
             serializer = DriverSerializer(drivers, many=True)
             
             return Response({
@@ -460,7 +610,7 @@ class BookingViewSet(viewsets.ModelViewSet):
                 'count': drivers.count()
             }, status=status.HTTP_200_OK)
         except Exception as e:
-            logger.exception(f'Error fetching drivers for admin: {str(e)}')
+            logger.exception('Error fetching drivers for admin: %s', e)
             return Response(
                 {'status': 'error', 'message': f'Failed to fetch drivers: {str(e)}'},
                 status=status.HTTP_400_BAD_REQUEST
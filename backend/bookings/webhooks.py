@@ -0,0 +1,283 @@
+"""
+Razorpay webhook ingestion
+The webhook endpoint only verifies the signature and queues the delivery in
+payment_webhook_events, so it can answer Razorpay immediately and absorb
+bursts. process_pending_events() then applies queued events to Booking and
+the payment ledger in batches; it is idempotent, so redeliveries and the browser's own
+verify_payment call can race it safely. An event that can't be applied is
+retried up to PAYMENT_WEBHOOK_MAX_ATTEMPTS times and then marked failed,
+without holding up the rest of its batch.
+"""
+import hashlib
+import json
+import logging
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from config.cache import bump_namespace
+from .ledger import apply_captured_payment, record_payments
+from .models import Booking, PaymentWebhookEvent
+
+logger = logging.getLogger(__name__)
+
+# Razorpay event -> what it means for the booking; other events are stored and ignored
+HANDLED_EVENTS = {
+    'payment.captured': 'captured',
+    'order.paid': 'captured',
+    'payment.failed': 'failed',
+}
+
+
+class WebhookBatchResult:
+    """Counters for one run of the webhook worker"""
+
+    def __init__(self):
+        self.processed = 0
+        self.ignored = 0
+        self.failed = 0
+        self.retried = 0
+        self.batches = 0
+        self.elapsed = 0.0
+
+    @property
+    def events(self):
+        return self.processed + self.ignored + self.failed + self.retried
+
+    def __str__(self):
+        return (
+            f'applied {self.processed} webhook event(s), ignored {self.ignored}, failed {self.failed}, '
+            f'to retry {self.retried} in {self.batches} batch(es), {self.elapsed:.2f}s'
+        )
+
+
+def enqueue_event(body, event_id=None):
+    """
+    Store a verified delivery; returns (event, created).
+
+    Redeliveries carry the same X-Razorpay-Event-Id and are not queued twice.
+    Without the header the body hash stands in for it.
+    """
+    payload = json.loads(body)
+    event_id = event_id or hashlib.sha256(body).hexdigest()
+    try:
+        with transaction.atomic():
+            event = PaymentWebhookEvent.objects.create(
+                event_id=event_id,
+                event_type=str(payload.get('event', ''))[:100],
+                payload=payload,
+            )
+        return event, True
+    except IntegrityError:
+        return PaymentWebhookEvent.objects.get(event_id=event_id), False
+
+
+def _payment_entity(payload):
+    try:
+        entity = payload['payload']['payment']['entity']
+    except (KeyError, TypeError):
+        return {}
+    return entity if isinstance(entity, dict) else {}
+
+
+def _entity_amount(entity):
+    """Amount in paise from a payment entity, or None; ValueError unless it is a whole number"""
+    value = entity.get('amount')
+    if value is None:
+        return None
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    raise ValueError(f'Invalid amount {value!r}')
+
+
+def max_attempts():
+    return getattr(settings, 'PAYMENT_WEBHOOK_MAX_ATTEMPTS', 5)
+
+
+def _event_failed(event, error, counts):
+    """
+    Record why an event couldn't be applied. ValueError means the event
+    itself is wrong and fails at once; anything else is retried by later
+    runs until the event has used up its attempts.
+    """
+    permanent = isinstance(error, ValueError)
+    event.last_error = str(error) if permanent else f'{type(error).__name__}: {error}'
+    if permanent or event.attempts >= max_attempts():
+        event.status = 'failed'
+        counts['failed'] += 1
+        logger.warning('Webhook event %s (%s) failed: %s', event.event_id, event.event_type, event.last_error)
+    else:
+        event.status = 'pending'
+        counts['retried'] += 1
+        logger.warning(
+            'Webhook event %s (%s) attempt %s failed, will retry: %s',
+            event.event_id, event.event_type, event.attempts, event.last_error,
+        )
+
+
+# Booking fields an event may change; restored when applying it fails halfway
+BOOKING_FIELDS = ['status', 'payment_status', 'razorpay_payment_id', 'updated_at']
+
+
+def _apply_event(event, booking):
+    """
+    Apply one event to its (locked) booking in memory.
+
+    Returns (booking changed, gateway payment id to record in the ledger or
+    None); raises ValueError for events that can't be applied.
+    """
+    kind = HANDLED_EVENTS[event.event_type]
+    entity = _payment_entity(event.payload)
+    if booking is None:
+        raise ValueError(f'No booking for order {entity.get("order_id")!r}')
+
+    if kind == 'failed':
+        if booking.payment_status in ('completed', 'failed'):
+            return False, None
+        booking.payment_status = 'failed'
+        return True, None
+
+    amount = int(Decimal(booking.total_amount) * 100)
+    paid_amount = _entity_amount(entity)
+    if paid_amount is not None and paid_amount != amount:
+        raise ValueError(f'Amount {paid_amount} does not match booking amount {amount} (paise)')
+
+    payment_id = entity.get('id')
+    if payment_id is not None and not isinstance(payment_id, str):
+        raise ValueError(f'Invalid payment id {payment_id!r}')
+    changed, refund_required = apply_captured_payment(booking, payment_id)
+    if refund_required:
+        # Captured after the booking expired: keep the money on record for a refund
+        event.last_error = 'Payment captured for a cancelled booking; refund required'
+    return changed, booking.razorpay_payment_id
+
+
+def _write(changed, paid):
+    if changed:
+        Booking.objects.bulk_update(list(changed.values()), BOOKING_FIELDS)
+    record_payments(paid)
+
+
+def process_batch(batch_size=100, skip_ids=()):
+    """
+    Apply up to `batch_size` pending events in one transaction.
+
+    Events are claimed with SKIP LOCKED so several workers can run side by
+    side; their bookings are locked too, so verify_payment can't interleave.
+    An event that raises is recorded on its own row (attempts, last_error)
+    and the rest of the batch is still applied: if the batched writes fail,
+    they are repeated one event at a time, each in its own savepoint.
+    Events in `skip_ids` are left for a later run.
+    Returns ({processed, ignored, failed, retried} counts, created_at days of
+    changed bookings, ids of the events to retry).
+    """
+    now = timezone.now()
+    counts = {'processed': 0, 'ignored': 0, 'failed': 0, 'retried': 0}
+    touched_days = set()
+    with transaction.atomic():
+        events = list(
+            PaymentWebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(status='pending')
+            .exclude(id__in=skip_ids)
+            .order_by('id')[:batch_size]
+        )
+        if not events:
+            return counts, touched_days, set()
+
+        order_ids = {
+            _payment_entity(event.payload).get('order_id')
+            for event in events if event.event_type in HANDLED_EVENTS
+        } - {None}
+        bookings = {
+            booking.razorpay_order_id: booking
+            for booking in Booking.objects.select_for_update().filter(razorpay_order_id__in=order_ids)
+        }
+
+        changed, paid, applied = {}, [], []
+        for event in events:
+            event.attempts += 1
+            event.processed_at = now
+            if event.event_type not in HANDLED_EVENTS:
+                event.status = 'ignored'
+                counts['ignored'] += 1
+                continue
+            booking = bookings.get(_payment_entity(event.payload).get('order_id'))
+            before = {field: getattr(booking, field) for field in BOOKING_FIELDS} if booking else {}
+            try:
+                booking_changed, payment_id = _apply_event(event, booking)
+            except Exception as e:
+                for field, value in before.items():
+                    setattr(booking, field, value)
+                _event_failed(event, e, counts)
+                continue
+            if booking_changed:
+                booking.updated_at = now
+                changed[booking.pk] = booking
+            if payment_id:
+                paid.append((booking, payment_id, None))
+            applied.append((event, booking, booking_changed, payment_id))
+            event.status = 'processed'
+            counts['processed'] += 1
+
+        try:
+            with transaction.atomic():
+                _write(changed, paid)
+        except Exception:
+            logger.exception('Batched webhook writes failed; applying %s event(s) one at a time', len(applied))
+            changed = {}
+            for event, booking, booking_changed, payment_id in applied:
+                try:
+                    with transaction.atomic():
+                        _write(
+                            {booking.pk: booking} if booking_changed else {},
+                            [(booking, payment_id, None)] if payment_id else [],
+                        )
+                except Exception as e:
+                    counts['processed'] -= 1
+                    _event_failed(event, e, counts)
+                    continue
+                if booking_changed:
+                    changed[booking.pk] = booking
+
+        if changed:
+            touched_days.update(timezone.localtime(booking.created_at).date() for booking in changed.values())
+        PaymentWebhookEvent.objects.bulk_update(events, ['status', 'attempts', 'last_error', 'processed_at'])
+    return counts, touched_days, {event.id for event in events if event.status == 'pending'}
+
+
+def process_pending_events(batch_size=100, max_batches=None):
+    """Apply queued webhook events batch by batch until the queue is empty"""
+    result = WebhookBatchResult()
+    started = time.monotonic()
+    touched_days = set()
+    # Events that failed this run are retried by the next one, not in a tight loop
+    retry_later = set()
+    while max_batches is None or result.batches < max_batches:
+        counts, days, retry_ids = process_batch(batch_size, skip_ids=retry_later)
+        total = sum(counts.values())
+        if not total:
+            break
+        result.batches += 1
+        result.processed += counts['processed']
+        result.ignored += counts['ignored']
+        result.failed += counts['failed']
+        result.retried += counts['retried']
+        touched_days.update(days)
+        retry_later.update(retry_ids)
+        if total < batch_size:
+            break
+
+    # bulk_update() skips model signals, so refresh the derived data here
+    if touched_days:
+        bump_namespace('bookings')
+        if getattr(settings, 'BOOKING_STATS_ROLLUP', False):
+            from .stats import refresh_daily_stats
+            refresh_daily_stats(touched_days)
+
+    result.elapsed = time.monotonic() - started
+    return result
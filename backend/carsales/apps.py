@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CarsalesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'carsales'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from config.cache import invalidate_on_change
+
+        invalidate_on_change(self.get_model('Car'), 'cars')
@@ -0,0 +1,204 @@
+"""
+Car photo variants
+After a listing's photo is uploaded, a small worker pool renders resized
+copies (thumbnail, card, full) in WebP off the request path and stores them
+under content-hash names, so they can be served with far-future caching.
+CarSerializer exposes their URLs and falls back to the original upload until
+they exist; the process_car_images command builds anything missed. Variant
+files nobody references any more (photo replaced, car deleted) are removed;
+identical renders share one file, so a file is only removed once no car
+points at it.
+"""
+import functools
+import hashlib
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from config.cache import bump_namespace
+from .models import Car
+
+logger = logging.getLogger(__name__)
+
+# Variant name -> bounding box (width, height); images are never upscaled
+VARIANTS = {
+    'thumbnail': (160, 120),
+    'card': (480, 360),
+    'full': (1600, 1200),
+}
+
+# Pillow format name and file extension per CAR_IMAGE_FORMAT
+FORMATS = {
+    'webp': ('WEBP', 'webp'),
+    'avif': ('AVIF', 'avif'),
+    'jpeg': ('JPEG', 'jpg'),
+}
+
+VARIANT_DIR = 'car_images/variants'
+
+
+@functools.lru_cache(maxsize=None)
+def _encodable_format(fmt):
+    """`fmt` if this Pillow build can encode it (AVIF needs Pillow 11.2+ with libavif), else WebP or JPEG"""
+    from PIL import Image
+
+    Image.init()
+    for candidate in (fmt, 'webp', 'jpeg'):
+        if FORMATS[candidate][0] in Image.SAVE:
+            if candidate != fmt:
+                logger.warning('Pillow %s cannot encode %s; car photo variants use %s', Image.__version__, fmt, candidate)
+            return candidate
+    raise RuntimeError('Pillow cannot encode any car photo variant format')
+
+
+def variant_names(variants):
+    """Storage names of the rendered files in an image_variants value"""
+    return {variants[name]['name'] for name in VARIANTS if isinstance(variants.get(name), dict)}
+
+
+def delete_unused_variants(names):
+    """Delete variant files that no car's image_variants refer to any more"""
+    names = set(names)
+    if not names:
+        return
+    lookup = Q()
+    for variant in VARIANTS:
+        lookup |= Q(**{f'image_variants__{variant}__name__in': list(names)})
+    for row in Car.objects.filter(lookup).values_list('image_variants', flat=True):
+        names -= variant_names(row)
+    for name in names:
+        default_storage.delete(name)
+
+
+def variants_current(car):
+    """Whether car.image_variants were rendered from the car's current photo"""
+    return bool(car.image) and car.image_variants.get('source') == car.image.name
+
+
+def _encode(image, box, fmt, quality):
+    from PIL import Image
+
+    variant = image.copy()
+    variant.thumbnail(box, Image.LANCZOS)
+    pil_format, _ = FORMATS[fmt]
+    if pil_format == 'JPEG' and variant.mode != 'RGB':
+        variant = variant.convert('RGB')
+    options = {'quality': quality}
+    if pil_format == 'WEBP':
+        options['method'] = 4  # Encoder effort: 4 of 6 is near-best size at a fraction of the time
+    elif pil_format == 'JPEG':
+        options.update(optimize=True, progressive=True)
+    buffer = io.BytesIO()
+    variant.save(buffer, pil_format, **options)
+    return buffer.getvalue(), variant.size
+
+
+def render_variants(source):
+    """
+    Render every variant of an image file object and store it.
+
+    Returns {variant: {'name', 'width', 'height'}}. File names are the
+    SHA-256 of the encoded bytes, so identical renders are stored once and a
+    name never points at different content.
+    """
+    from PIL import Image, ImageOps
+
+    fmt = _encodable_format(getattr(settings, 'CAR_IMAGE_FORMAT', 'webp'))
+    quality = getattr(settings, 'CAR_IMAGE_QUALITY', 80)
+    _, extension = FORMATS[fmt]
+
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+        image.load()
+
+    rendered = {}
+    for name, box in VARIANTS.items():
+        data, (width, height) = _encode(image, box, fmt, quality)
+        path = f'{VARIANT_DIR}/{hashlib.sha256(data).hexdigest()[:32]}.{extension}'
+        if not default_storage.exists(path):
+            path = default_storage.save(path, ContentFile(data))
+        rendered[name] = {'name': path, 'width': width, 'height': height}
+    return rendered
+
+
+def process_car_image(car_id, force=False):
+    """
+    Build the variants for one car if its photo changed since the last run
+    (or always, with `force`).
+
+    The result is written with a conditional UPDATE on the photo it was
+    rendered from, so a photo replaced meanwhile is never paired with stale
+    variants; files only the previous variants used are then deleted.
+    Returns True if variants were stored.
+    """
+    car = Car.objects.filter(pk=car_id).only('id', 'image', 'image_variants').first()
+    if car is None or not car.image or (variants_current(car) and not force):
+        return False
+
+    source_name = car.image.name
+    previous = variant_names(car.image_variants)
+    with car.image.open('rb') as source:
+        rendered = render_variants(source)
+    rendered['source'] = source_name
+    stored = Car.objects.filter(pk=car_id, image=source_name).update(
+        image_variants=rendered,
+        updated_at=timezone.now(),
+    )
+    # update() skips model signals, so refresh the cached catalog here
+    if stored:
+        bump_namespace('cars')
+        delete_unused_variants(previous - variant_names(rendered))
+    return bool(stored)
+
+
+def _run(car_id):
+    close_old_connections()
+    try:
+        process_car_image(car_id)
+    except Exception:
+        logger.exception('Rendering image variants for car %s failed', car_id)
+    finally:
+        close_old_connections()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'CAR_IMAGE_WORKERS', 2),
+                thread_name_prefix='car-images',
+            )
+        return _pool
+
+
+def schedule_car_image(car_id):
+    """
+    Queue variant rendering for a car once the current transaction commits.
+
+    Pillow releases the GIL while resizing and encoding, so a thread pool
+    keeps the work off the request without blocking other requests. With
+    CAR_IMAGE_WORKERS = 0 nothing runs in-process; use process_car_images.
+    """
+    if getattr(settings, 'CAR_IMAGE_WORKERS', 2) <= 0:
+        return
+    transaction.on_commit(lambda: _get_pool().submit(_run, car_id))
+
+
+def cars_with_images():
+    """Cars that have an uploaded photo, in id order"""
+    return Car.objects.exclude(image='').exclude(image__isnull=True).order_by('id')
@@ -0,0 +1,55 @@
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from carsales.images import cars_with_images, process_car_image, variants_current
+
+
+def _process(car_id, force):
+    close_old_connections()
+    try:
+        return process_car_image(car_id, force=force), None
+    except Exception as e:
+        return False, e
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = (
+        'Render the thumbnail/card/full variants of car photos that have none or '
+        'whose photo changed (backfill, or catch-up after a restart)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Rendering threads (default CAR_IMAGE_WORKERS, at least 1)',
+        )
+        parser.add_argument('--force', action='store_true', help='Re-render variants that are already current')
+
+    def handle(self, *args, **options):
+        workers = max(options['workers'] or getattr(settings, 'CAR_IMAGE_WORKERS', 2), 1)
+        started = time.monotonic()
+
+        pending = [car.id for car in cars_with_images().only('id', 'image', 'image_variants')
+                   if options['force'] or not variants_current(car)]
+
+        process = functools.partial(_process, force=options['force'])
+        rendered, failed = 0, 0
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='car-images') as pool:
+            for car_id, (stored, error) in zip(pending, pool.map(process, pending)):
+                if error is not None:
+                    failed += 1
+                    self.stderr.write(f'Car {car_id}: {error}')
+                elif stored:
+                    rendered += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered image variants for {rendered} of {len(pending)} car(s), {failed} failed, '
+            f'in {time.monotonic() - started:.2f}s'
+        ))
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carsales', '0002_car_car_category_car_image'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['created_at', 'id'], name='carsales_ca_created_49e7d9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['status', 'created_at'], name='carsales_ca_status_b2d91b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['seller', 'created_at'], name='carsales_ca_seller__0a6fcf_idx'),
+        ),
+    ]
@@ -23,6 +23,8 @@ class Car(models.Model):
     description = models.TextField(blank=True)
     image_url = models.URLField(blank=True, null=True)
     image = models.ImageField(upload_to='car_images/', blank=True, null=True)
+    # Resized copies of `image` by variant name, plus the 'source' they were rendered from (carsales/images.py)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     car_category = models.CharField(max_length=20, default='affordable', choices=[('affordable', 'Affordable'), ('premium', 'Premium')])
     
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='available')
@@ -31,6 +33,11 @@ class Car(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['seller', 'created_at']),
+        ]
 
     def __str__(self):
         return f"{self.year} {self.make} {self.model} - ${self.price}"
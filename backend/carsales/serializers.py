@@ -7,17 +7,43 @@ from django.conf import settings
 class CarSerializer(serializers.ModelSerializer):
     seller_details = UserDetailSerializer(source='seller', read_only=True)
     image_url_full = serializers.SerializerMethodField()
+    image_urls = serializers.SerializerMethodField()
+
+    @classmethod
+    def optimized_queryset(cls, queryset=None):
+        """Join the seller read by seller_details so lists cost a fixed number of queries"""
+        if queryset is None:
+            queryset = Car.objects.all()
+        return queryset.select_related('seller')
+
+    def _absolute(self, url):
+        request = self.context.get('request')
+        if request:
+            return request.build_absolute_uri(url)
+        return url
 
     def get_image_url_full(self, obj):
         """Return full URL for uploaded image or the image_url if provided"""
         if obj.image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.image.url)
-            return obj.image.url
+            return self._absolute(obj.image.url)
         return obj.image_url
 
+    def get_image_urls(self, obj):
+        """
+        URLs of the resized variants (thumbnail, card, full); each falls back
+        to the original photo until the variants have been rendered
+        """
+        from .images import VARIANTS, variants_current
+
+        if not obj.image:
+            return {name: obj.image_url for name in VARIANTS} if obj.image_url else None
+        if not variants_current(obj):
+            original = self._absolute(obj.image.url)
+            return {name: original for name in VARIANTS}
+        storage = obj.image.storage
+        return {name: self._absolute(storage.url(obj.image_variants[name]['name'])) for name in VARIANTS}
+
     class Meta:
         model = Car
-        fields = '__all__'
-        read_only_fields = ('seller', 'created_at', 'updated_at', 'image_url_full')
+        exclude = ('image_variants',)
+        read_only_fields = ('seller', 'created_at', 'updated_at', 'image_url_full', 'image_urls')
@@ -0,0 +1,27 @@
+"""
+Model signal handlers for the carsales app
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Car
+
+
+@receiver(post_save, sender=Car)
+def render_car_image_variants(sender, instance, **kwargs):
+    """Queue variant rendering when a car's photo is new or replaced"""
+    from .images import schedule_car_image, variants_current
+
+    if instance.image and not variants_current(instance):
+        schedule_car_image(instance.pk)
+
+
+@receiver(post_delete, sender=Car)
+def delete_car_image_variants(sender, instance, **kwargs):
+    """Drop the deleted car's variant files unless another car shares them"""
+    from .images import delete_unused_variants, variant_names
+
+    names = variant_names(instance.image_variants)
+    if names:
+        transaction.on_commit(lambda: delete_unused_variants(names))
@@ -1,3 +1,136 @@
-from django.test import TestCase
+import hashlib
+import io
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from PIL import Image
+
+from config.cache import get_versions
+from users.models import User
+from .images import _encodable_format, process_car_image
+from .models import Car
+from .serializers import CarSerializer
+
+
+def photo(color='red', size=(2000, 1000), name='car.jpg'):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class CarImageFixtures:
+    """A throwaway MEDIA_ROOT and a seller; variants are rendered explicitly (CAR_IMAGE_WORKERS=0)"""
+
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.seller = User.objects.create_user(
+            username='seller', email='seller@example.com', password='Passw0rd!', role='manager'
+        )
+
+    def create_car(self, **fields):
+        values = {'seller': self.seller, 'make': 'Tata', 'model': 'Nexon', 'year': 2022, 'price': 900000, 'mileage': 10}
+        values.update(fields)
+        return Car.objects.create(**values)
+
+
+@override_settings(CAR_IMAGE_WORKERS=0, CAR_IMAGE_FORMAT='webp')
+class CarImageTests(CarImageFixtures, TestCase):
+    """Photo variants are resized, content-addressed and cleaned up once unused"""
+
+    def test_variants_fit_their_boxes_under_content_hash_names(self):
+        car = self.create_car(image=photo())
+        self.assertTrue(process_car_image(car.id))
+        car.refresh_from_db()
+        self.assertEqual(car.image_variants['source'], car.image.name)
+        sizes = {name: (variant['width'], variant['height']) for name, variant in car.image_variants.items()
+                 if name != 'source'}
+        self.assertEqual(sizes, {'thumbnail': (160, 80), 'card': (480, 240), 'full': (1600, 800)})
+        for name in sizes:
+            path = car.image_variants[name]['name']
+            self.assertTrue(path.endswith('.webp'))
+            with default_storage.open(path) as stored:
+                digest = hashlib.sha256(stored.read()).hexdigest()[:32]
+            self.assertEqual(path, f'car_images/variants/{digest}.webp')
+        # Already current: nothing to do
+        self.assertFalse(process_car_image(car.id))
+
+    def test_image_urls_fall_back_until_rendered(self):
+        self.assertIsNone(CarSerializer(self.create_car()).data['image_urls'])
+        linked = self.create_car(image_url='https://example.com/car.jpg')
+        self.assertEqual(set(CarSerializer(linked).data['image_urls'].values()), {'https://example.com/car.jpg'})
+
+        car = self.create_car(image=photo())
+        self.assertEqual(set(CarSerializer(car).data['image_urls'].values()), {car.image.url})
+        process_car_image(car.id)
+        car.refresh_from_db()
+        urls = CarSerializer(car).data['image_urls']
+        self.assertEqual(urls['card'], default_storage.url(car.image_variants['card']['name']))
+
+    def test_replaced_photo_deletes_variants_no_other_car_uses(self):
+        first, second = self.create_car(image=photo()), self.create_car(image=photo())
+        process_car_image(first.id)
+        process_car_image(second.id)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        shared = first.image_variants['card']['name']
+        # Identical photos render to the same files
+        self.assertEqual(second.image_variants['card']['name'], shared)
+
+        first.image = photo('blue')
+        first.save()
+        process_car_image(first.id)
+        self.assertTrue(default_storage.exists(shared))  # Still used by the second car
+
+        second.image = photo('green')
+        second.save()
+        process_car_image(second.id)
+        self.assertFalse(default_storage.exists(shared))
+
+    def test_deleted_car_drops_its_variants(self):
+        car = self.create_car(image=photo())
+        process_car_image(car.id)
+        car.refresh_from_db()
+        path = car.image_variants['full']['name']
+        with self.captureOnCommitCallbacks(execute=True):
+            car.delete()
+        self.assertFalse(default_storage.exists(path))
+
+    def test_unsupported_format_falls_back_to_webp(self):
+        _encodable_format.cache_clear()
+        self.addCleanup(_encodable_format.cache_clear)
+        with mock.patch.dict(Image.SAVE, clear=False) as save:
+            save.pop('AVIF', None)
+            self.assertEqual(_encodable_format('avif'), 'webp')
+
+
+@override_settings(CAR_IMAGE_WORKERS=0, CAR_IMAGE_FORMAT='webp')
+class ProcessCarImagesCommandTests(CarImageFixtures, TransactionTestCase):
+    """process_car_images renders on its own threads, so it needs committed rows"""
+
+    def test_command_renders_missing_and_forced_variants(self):
+        car = self.create_car(image=photo())
+        out = io.StringIO()
+        call_command('process_car_images', stdout=out)
+        self.assertIn('Rendered image variants for 1 of 1 car(s), 0 failed', out.getvalue())
+        car.refresh_from_db()
+        rendered_at, version = car.updated_at, get_versions(['cars'])[0]
+
+        call_command('process_car_images', stdout=out)
+        self.assertIn('for 0 of 0 car(s)', out.getvalue())
+
+        call_command('process_car_images', '--force', stdout=out)
+        self.assertIn('for 1 of 1 car(s)', out.getvalue())
+        car.refresh_from_db()
+        self.assertGreater(car.updated_at, rendered_at)
+        self.assertGreater(get_versions(['cars'])[0], version)
+        self.assertTrue(default_storage.exists(car.image_variants['thumbnail']['name']))
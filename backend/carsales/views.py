@@ -2,9 +2,18 @@ from rest_framework import viewsets, permissions, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
+from config.cache import cache_response
+from config.conditional import conditional_get
 from .models import Car
 from .serializers import CarSerializer
 
+
+def _car_row(view):
+    """The car a detail request is for, as a queryset (empty for a malformed pk)"""
+    pk = str(view.kwargs.get('pk', ''))
+    return view.get_queryset().filter(pk=pk) if pk.isdigit() else Car.objects.none()
+
+
 class CarViewSet(viewsets.ModelViewSet):
     queryset = Car.objects.all()
     serializer_class = CarSerializer
@@ -20,13 +29,27 @@ class CarViewSet(viewsets.ModelViewSet):
         
         if user.is_authenticated and user.is_staff:
             # Admins see all cars (filtered by status)
-            return Car.objects.filter(status='available').order_by('-created_at')
+            return CarSerializer.optimized_queryset(Car.objects.filter(status='available')).order_by('-created_at')
         elif user.is_authenticated and user.role == 'manager':
             # Managers see all available cars (for reference)
-            return Car.objects.filter(status='available').order_by('-created_at')
+            return CarSerializer.optimized_queryset(Car.objects.filter(status='available')).order_by('-created_at')
         else:
             # Non-authenticated users and customers see only available cars
-            return Car.objects.filter(status='available').order_by('-created_at')
+            return CarSerializer.optimized_queryset(Car.objects.filter(status='available')).order_by('-created_at')
+
+    @conditional_get(
+        'cars-list',
+        lambda view, request: view.filter_queryset(view.get_queryset()),
+        namespaces=['users'],
+    )
+    @cache_response('cars-list', namespaces=['cars', 'users'])
+    def list(self, request, *args, **kwargs):
+        """Public car catalog, served from cache until a car changes"""
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get('cars-detail', lambda view, request: _car_row(view), namespaces=['users'])
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         """Create a car listing tied to the current user (manager/admin only)"""
@@ -63,7 +86,7 @@ class CarViewSet(viewsets.ModelViewSet):
     def my_listings(self, request):
         """Get cars listed by the current user (manager/admin)"""
         if request.user.role == 'manager' or request.user.is_staff:
-            cars = Car.objects.filter(seller=request.user).order_by('-created_at')
+            cars = CarSerializer.optimized_queryset(Car.objects.filter(seller=request.user)).order_by('-created_at')
             serializer = self.get_serializer(cars, many=True)
             return Response(serializer.data)
         else:
@@ -9,3 +9,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_asgi_application()
+
+# Optional in-process expiry sweeper (PENDING_SWEEPER_INTERVAL > 0)
+from bookings.expiry import start_sweeper_thread  # noqa: E402
+
+start_sweeper_thread()
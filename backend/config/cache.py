@@ -0,0 +1,157 @@
+"""
+Response caching for read-heavy API endpoints.
+
+Cached responses are keyed on a version number per namespace ('cars',
+'drivers', 'bookings', ...). Model signals bump the namespace version on
+save/delete, which orphans every key built on the old version, so nothing has
+to be deleted by pattern. With the local-memory backend versions are per
+process, so a write in one worker would not invalidate another worker's
+copy; settings refuse to start several workers (WEB_CONCURRENCY) without
+REDIS_URL or CACHE_BACKEND=file.
+"""
+import functools
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_KEY_PREFIX = 'apiver'
+RESPONSE_KEY_PREFIX = 'apiresp'
+
+
+def cache_is_shared():
+    """True when the default cache is seen by every worker process (not local memory)"""
+    return not settings.CACHES['default']['BACKEND'].endswith('LocMemCache')
+
+
+def _version_key(namespace):
+    return f'{VERSION_KEY_PREFIX}:{namespace}'
+
+
+def get_versions(namespaces):
+    """Current version of each namespace, fetched in one cache round trip"""
+    keys = [_version_key(ns) for ns in namespaces]
+    found = cache.get_many(keys)
+    return [found.get(key, 1) for key in keys]
+
+
+def bump_namespace(*namespaces):
+    """Invalidate every cached response built on these namespaces"""
+    for namespace in namespaces:
+        key = _version_key(namespace)
+        if cache.add(key, 2, timeout=None):
+            continue
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr()
+            cache.set(key, 2, timeout=None)
+
+
+def invalidate_on_change(model, *namespaces, ignore_fields=()):
+    """
+    Bump `namespaces` whenever `model` is saved or deleted.
+
+    Saves that only touch `ignore_fields` (e.g. last_login) are skipped.
+    """
+    ignore_fields = frozenset(ignore_fields)
+
+    def on_save(sender, instance, update_fields=None, **kwargs):
+        if update_fields and ignore_fields and set(update_fields) <= ignore_fields:
+            return
+        bump_namespace(*namespaces)
+
+    def on_delete(sender, instance, **kwargs):
+        bump_namespace(*namespaces)
+
+    uid = f'api-cache:{model._meta.label}:{":".join(namespaces)}'
+    post_save.connect(on_save, sender=model, weak=False, dispatch_uid=f'{uid}:save')
+    post_delete.connect(on_delete, sender=model, weak=False, dispatch_uid=f'{uid}:delete')
+
+
+def build_cache_key(request, name, namespaces, vary_on):
+    versions = get_versions(namespaces)
+    parts = [name]
+    parts += [f'{ns}.{version}' for ns, version in zip(namespaces, versions)]
+
+    user = request.user
+    if 'role' in vary_on:
+        parts.append(f'role={getattr(user, "role", None) if user.is_authenticated else "anon"}')
+    if 'user' in vary_on:
+        parts.append(f'user={user.pk if user.is_authenticated else "anon"}')
+
+    digest = hashlib.md5(f'{request.get_host()}{request.get_full_path()}'.encode()).hexdigest()
+    return f'{RESPONSE_KEY_PREFIX}:{":".join(parts)}:{digest}'
+
+
+def cache_response(name, namespaces, ttl=None, vary_on=()):
+    """
+    Cache successful GET responses of a viewset method.
+
+    name       - unique name for the endpoint
+    namespaces - namespaces whose version bump invalidates this endpoint
+    ttl        - seconds to keep a response (defaults to API_CACHE_DEFAULT_TTL)
+    vary_on    - any of 'role', 'user'; the path and query string are always part of the key
+    """
+    namespaces = tuple(namespaces)
+    vary_on = tuple(vary_on)
+
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method != 'GET' or not getattr(settings, 'API_CACHE_ENABLED', True):
+                return view_method(self, request, *args, **kwargs)
+
+            key = build_cache_key(request, name, namespaces, vary_on)
+            data = cache.get(key)
+            if data is not None:
+                response = Response(data, status=status.HTTP_200_OK)
+                response['X-Cache'] = 'HIT'
+                return response
+
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                timeout = ttl if ttl is not None else getattr(settings, 'API_CACHE_DEFAULT_TTL', 60)
+                cache.set(key, response.data, timeout)
+                response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+IDEMPOTENCY_KEY_PREFIX = 'idem'
+
+
+def idempotent(name, ttl=86400):
+    """
+    Replay the stored response when a POST is retried with the same
+    Idempotency-Key header.
+
+    Successful (2xx) responses are stored per user and key for `ttl` seconds;
+    requests without the header run normally.
+    """
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            idempotency_key = request.headers.get('Idempotency-Key')
+            if not idempotency_key:
+                return view_method(self, request, *args, **kwargs)
+
+            user = request.user.pk if request.user.is_authenticated else 'anon'
+            digest = hashlib.md5(f'{request.get_full_path()}|{idempotency_key}'.encode()).hexdigest()
+            key = f'{IDEMPOTENCY_KEY_PREFIX}:{name}:{user}:{digest}'
+            stored = cache.get(key)
+            if stored is not None:
+                response = Response(stored['data'], status=stored['status'])
+                response['Idempotent-Replayed'] = 'true'
+                return response
+
+            response = view_method(self, request, *args, **kwargs)
+            if 200 <= response.status_code < 300:
+                cache.set(key, {'data': response.data, 'status': response.status_code}, ttl)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,235 @@
+"""
+Per-request instrumentation.
+
+RequestMetricsMiddleware times every request, counts its SQL queries (and
+how many of them repeat an earlier query's SQL, the N+1 signature), records
+DB time and response size, and tags the sample with the resolved
+viewset/action. Samples are aggregated in a per-process MetricsRegistry
+that admins can read at /api/manager/admin/metrics/; with
+SERVER_TIMING_ENABLED they are also summarised in a Server-Timing header
+on responses to admins.
+"""
+import bisect
+import logging
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class QueryCollector:
+    """connection.execute_wrapper hook counting queries, DB time and repeated SQL"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.duplicates = 0
+        self.seen = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            if sql in self.seen:
+                self.duplicates += 1
+            else:
+                self.seen.add(sql)
+
+
+class EndpointStats:
+    """Running totals for one viewset/action"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.db_ms = 0.0
+        self.queries = 0
+        self.max_queries = 0
+        self.duplicate_queries = 0
+        self.bytes = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def add(self, sample):
+        self.requests += 1
+        if sample['status'] >= 500:
+            self.errors += 1
+        self.total_ms += sample['total_ms']
+        self.max_ms = max(self.max_ms, sample['total_ms'])
+        self.db_ms += sample['db_ms']
+        self.queries += sample['queries']
+        self.max_queries = max(self.max_queries, sample['queries'])
+        self.duplicate_queries += sample['duplicate_queries']
+        self.bytes += sample['bytes']
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, sample['total_ms'])] += 1
+
+    def percentile(self, pct):
+        """Upper bound of the bucket holding the pct-th percentile"""
+        rank = pct / 100 * self.requests
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS + (None,), self.buckets):
+            seen += count
+            if seen >= rank and count:
+                return bound if bound is not None else round(self.max_ms, 2)
+        return 0
+
+    def as_dict(self):
+        requests = self.requests or 1
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'avg_ms': round(self.total_ms / requests, 2),
+            'max_ms': round(self.max_ms, 2),
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'avg_db_ms': round(self.db_ms / requests, 2),
+            'avg_queries': round(self.queries / requests, 2),
+            'max_queries': self.max_queries,
+            'avg_duplicate_queries': round(self.duplicate_queries / requests, 2),
+            'avg_bytes': round(self.bytes / requests),
+            'total_ms': round(self.total_ms, 2),
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe, per-process aggregation of request samples by endpoint tag"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        self.started_at = time.time()
+
+    def record(self, tag, sample):
+        with self.lock:
+            stats = self.endpoints.get(tag)
+            if stats is None:
+                stats = self.endpoints[tag] = EndpointStats()
+            stats.add(sample)
+
+    def snapshot(self):
+        """Endpoint stats, most total time first"""
+        with self.lock:
+            rows = [dict(endpoint=tag, **stats.as_dict()) for tag, stats in self.endpoints.items()]
+        rows.sort(key=lambda row: row['total_ms'], reverse=True)
+        return {'since': self.started_at, 'endpoints': rows}
+
+    def prometheus(self):
+        """Snapshot in the Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            items = sorted(self.endpoints.items())
+            for name, help_text in (
+                ('http_requests_total', 'Requests handled'),
+                ('http_request_duration_ms_sum', 'Total request time in ms'),
+                ('http_request_db_ms_sum', 'Total database time in ms'),
+                ('http_request_queries_sum', 'Total SQL queries'),
+                ('http_request_duplicate_queries_sum', 'Total SQL queries repeating earlier SQL'),
+                ('http_response_bytes_sum', 'Total response bytes'),
+            ):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} counter')
+                for tag, stats in items:
+                    value = {
+                        'http_requests_total': stats.requests,
+                        'http_request_duration_ms_sum': round(stats.total_ms, 3),
+                        'http_request_db_ms_sum': round(stats.db_ms, 3),
+                        'http_request_queries_sum': stats.queries,
+                        'http_request_duplicate_queries_sum': stats.duplicate_queries,
+                        'http_response_bytes_sum': stats.bytes,
+                    }[name]
+                    lines.append(f'{name}{{endpoint="{tag}"}} {value}')
+            lines.append('# HELP http_request_duration_ms Request latency histogram in ms')
+            lines.append('# TYPE http_request_duration_ms histogram')
+            for tag, stats in items:
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS_MS + ('+Inf',), stats.buckets):
+                    cumulative += count
+                    lines.append(f'http_request_duration_ms_bucket{{endpoint="{tag}",le="{bound}"}} {cumulative}')
+                lines.append(f'http_request_duration_ms_count{{endpoint="{tag}"}} {stats.requests}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self.lock:
+            self.endpoints = {}
+            self.started_at = time.time()
+
+
+registry = MetricsRegistry()
+
+
+def endpoint_tag(request, view_func):
+    """'BookingViewSet.list'-style name for the view handling the request"""
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is not None:
+        actions = getattr(view_func, 'actions', None) or {}
+        action = actions.get(request.method.lower(), request.method.lower())
+        return f'{view_class.__name__}.{action}'
+    match = getattr(request, 'resolver_match', None)
+    if match is not None and match.view_name:
+        return match.view_name
+    return getattr(view_func, '__name__', 'unknown')
+
+
+class RequestMetricsMiddleware:
+    """Measure every request and feed the metrics registry"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            return self.get_response(request)
+
+        collector = QueryCollector()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(collector))
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - started) * 1000
+        db_ms = collector.duration * 1000
+
+        tag = getattr(request, '_metrics_tag', None) or 'unresolved'
+        size = 0 if response.streaming else len(response.content)
+        sample = {
+            'status': response.status_code,
+            'total_ms': total_ms,
+            'db_ms': db_ms,
+            'queries': collector.count,
+            'duplicate_queries': collector.duplicates,
+            'bytes': size,
+        }
+        registry.record(tag, sample)
+
+        # Timings and query counts help an attacker probe for slow paths; only admins see them
+        user = getattr(request, 'user', None)
+        if getattr(settings, 'SERVER_TIMING_ENABLED', False) and getattr(user, 'role', None) == 'admin':
+            response['Server-Timing'] = (
+                f'app;dur={total_ms - db_ms:.1f}, '
+                f'db;dur={db_ms:.1f};desc="{collector.count} queries, {collector.duplicates} repeated"'
+            )
+
+        slow_ms = getattr(settings, 'REQUEST_METRICS_SLOW_MS', 1000)
+        if slow_ms and total_ms >= slow_ms:
+            logger.warning(
+                'Slow request %s %s -> %s: endpoint=%s total_ms=%.1f db_ms=%.1f queries=%d repeated=%d bytes=%d',
+                request.method, request.path, response.status_code, tag,
+                total_ms, db_ms, collector.count, collector.duplicates, size,
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_tag = endpoint_tag(request, view_func)
+        return None
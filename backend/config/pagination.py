@@ -0,0 +1,147 @@
+"""
+Keyset (cursor) pagination shared by the bookings, carsales and users APIs.
+
+Pages are addressed by the (created_at, id) of the last row served, so page
+500 costs the same index range scan as page 1. Pagination is opt-in: it is
+only applied when the client sends `page_size` or `cursor`, so existing
+callers that expect the full list keep working.
+"""
+import base64
+import json
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+
+def approximate_count(queryset):
+    """
+    Row count that avoids a full COUNT(*) on large unfiltered tables.
+
+    Uses the storage engine's table statistics when the queryset has no
+    WHERE clause; falls back to an exact count otherwise.
+    Returns (count, is_approximate).
+    """
+    if queryset.query.where:
+        return queryset.count(), False
+
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    sql = None
+    if connection.vendor == 'mysql':
+        sql = (
+            'SELECT TABLE_ROWS FROM information_schema.TABLES '
+            'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s'
+        )
+    elif connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE relname = %s'
+
+    if sql:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            row = cursor.fetchone()
+        if row and row[0] is not None and row[0] >= 0:
+            return int(row[0]), True
+    return queryset.count(), False
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over (created_at, id), newest first.
+
+    Query params:
+        page_size - rows per page (capped at max_page_size)
+        cursor    - opaque cursor returned as `next_cursor` by the previous page
+        count     - 'approx', 'exact' or 'none' (defaults to 'approx' on the
+                    first page and 'none' once a cursor is supplied)
+    """
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    max_page_size = 500
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        self.page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE') or 50
+        self.page = None
+        self.next_cursor = None
+        self.count = None
+        self.count_is_approximate = False
+
+    def is_requested(self, request):
+        """Pagination is applied only when the client asks for it"""
+        params = request.query_params
+        return self.page_size_query_param in params or self.cursor_query_param in params
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, obj):
+        payload = json.dumps({'c': obj.created_at.isoformat(), 'i': obj.pk})
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            created_at = parse_datetime(payload['c'])
+            pk = int(payload['i'])
+        except (TypeError, ValueError, KeyError, OverflowError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        # Later pages skip the count unless asked, so deep pages stay cheap
+        count_mode = request.query_params.get(
+            self.count_query_param, 'none' if cursor else 'approx'
+        )
+        if count_mode == 'exact':
+            self.count, self.count_is_approximate = queryset.count(), False
+        elif count_mode == 'approx':
+            self.count, self.count_is_approximate = approximate_count(queryset)
+
+        queryset = queryset.order_by(*self.ordering)
+        if cursor:
+            created_at, pk = cursor
+            # created_at <= c keeps the scan a bounded index range; the OR
+            # only breaks ties between rows sharing the same timestamp
+            queryset = queryset.filter(created_at__lte=created_at).filter(
+                Q(created_at__lt=created_at) | Q(id__lt=pk)
+            )
+
+        rows = list(queryset[:page_size + 1])
+        self.page = rows[:page_size]
+        if len(rows) > page_size:
+            self.next_cursor = self.encode_cursor(self.page[-1])
+        if self.count is None:
+            self.count = len(self.page)
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'status': 'success',
+            'data': data,
+            'count': self.count,
+            'count_is_approximate': self.count_is_approximate,
+            'next_cursor': self.next_cursor,
+            'has_more': self.next_cursor is not None,
+        })
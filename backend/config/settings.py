@@ -5,6 +5,7 @@ Django settings for config project.
 from pathlib import Path
 import os
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
 
 try:
     import pymysql  # type: ignore
@@ -41,6 +42,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'config.instrumentation.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -88,6 +90,70 @@ DATABASES = {
 
 
 
+# Cache configuration
+# Local memory by default (single process only); CACHE_BACKEND=file for a cache shared by local
+# processes, or REDIS_URL (any Redis-compatible server, needs the redis package) for production
+REDIS_URL = config('REDIS_URL', default='')
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'autonexus',
+        }
+    }
+elif CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': BASE_DIR / '.cache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'autonexus',
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+
+# Worker processes serving the API (gunicorn/uwsgi). Cached responses, idempotency
+# keys and token lookups are only invalidated correctly when every worker shares the cache.
+WEB_CONCURRENCY = config('WEB_CONCURRENCY', default=1, cast=int)
+if WEB_CONCURRENCY > 1 and CACHES['default']['BACKEND'].endswith('LocMemCache'):
+    raise ImproperlyConfigured('WEB_CONCURRENCY > 1 needs a shared cache: set REDIS_URL or CACHE_BACKEND=file')
+
+API_CACHE_ENABLED = config('API_CACHE_ENABLED', default=True, cast=bool)
+API_CACHE_DEFAULT_TTL = config('API_CACHE_DEFAULT_TTL', default=60, cast=int)  # seconds
+CONDITIONAL_GET_ENABLED = config('CONDITIONAL_GET_ENABLED', default=True, cast=bool)  # ETag/304 on dashboard lists (config/conditional.py)
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)  # Rows per query/write in admin exports
+
+# Token -> user lookups (users.authentication.CachedTokenAuthentication)
+AUTH_TOKEN_CACHE_TTL = config('AUTH_TOKEN_CACHE_TTL', default=300, cast=int)  # seconds in the shared cache, used only with REDIS_URL or CACHE_BACKEND=file (0 = no caching)
+AUTH_TOKEN_LRU_SIZE = config('AUTH_TOKEN_LRU_SIZE', default=1024, cast=int)  # tokens kept per process
+AUTH_TOKEN_LOCAL_TTL = config('AUTH_TOKEN_LOCAL_TTL', default=10, cast=int)  # seconds; bounds how long other processes see a revoked token
+
+
+# Password hashing policy (users/hashers.py): algorithm for new and rehashed
+# passwords; hashes made under an older policy are upgraded on next login
+PASSWORD_HASHER = config('PASSWORD_HASHER', default='pbkdf2_sha256')  # pbkdf2_sha256 | argon2 | scrypt | bcrypt_sha256
+PASSWORD_PBKDF2_ITERATIONS = config('PASSWORD_PBKDF2_ITERATIONS', default=600000, cast=int)  # Django 4.2 default, also the floor
+_PASSWORD_HASHER_CLASSES = {
+    'pbkdf2_sha256': 'users.hashers.ConfigurablePBKDF2PasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',  # needs argon2-cffi
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'bcrypt_sha256': 'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',  # needs bcrypt
+}
+if PASSWORD_HASHER not in _PASSWORD_HASHER_CLASSES:
+    raise ImproperlyConfigured(f'PASSWORD_HASHER must be one of {", ".join(_PASSWORD_HASHER_CLASSES)}')
+# Preferred hasher first; the rest stay so existing hashes still verify
+PASSWORD_HASHERS = [_PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    path for name, path in _PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER
+]
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -126,8 +192,31 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        # TokenAuthentication with token -> user lookups cached (see users/authentication.py)
+        'users.authentication.CachedTokenAuthentication',
     ],
+    # Opt-in keyset pagination: only applied when ?page_size= or ?cursor= is sent
+    'DEFAULT_PAGINATION_CLASS': 'config.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
+    # Reverse proxies in front of the app that append to X-Forwarded-For. Throttles
+    # key on the client address: with 0 that is REMOTE_ADDR and X-Forwarded-For is
+    # ignored; behind N trusted proxies it is the address the outermost one saw.
+    # Never set it higher than the real proxy count, or clients can spoof their IP.
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
+    # Login throttles (users/throttling.py), counted in the default cache
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': config('LOGIN_THROTTLE_IP_RATE', default='30/min'),
+        'login_email': config('LOGIN_THROTTLE_EMAIL_RATE', default='10/min'),
+    },
+}
+
+# Login pipeline
+LOGIN_THROTTLE_ENABLED = config('LOGIN_THROTTLE_ENABLED', default=True, cast=bool)
+# Fraction of login attempts logged (logger 'users.login'), per outcome
+LOGIN_LOG_SAMPLE_RATES = {
+    'success': config('LOGIN_LOG_SUCCESS_SAMPLE_RATE', default=0.05, cast=float),
+    'failure': config('LOGIN_LOG_FAILURE_SAMPLE_RATE', default=1.0, cast=float),
+    'throttled': config('LOGIN_LOG_THROTTLED_SAMPLE_RATE', default=0.1, cast=float),
 }
 
 # CORS Configuration
@@ -143,6 +232,7 @@ CORS_ALLOW_METHODS = [
 CORS_ALLOW_HEADERS = [
     "authorization",
     "content-type",
+    "idempotency-key",
 ]
 # Allow all localhost ports
 CORS_ALLOWED_ORIGIN_REGEXES = [
@@ -168,6 +258,16 @@ AUTH_USER_MODEL = 'users.User'
 # Test keys automatically open Razorpay in sandbox mode
 RAZORPAY_KEY_ID = config('RAZORPAY_KEY_ID', default='rzp_test_S9zIjNpZG23rXQ')
 RAZORPAY_KEY_SECRET = config('RAZORPAY_KEY_SECRET', default='IhY1ymgzzid92MUqL4lNkgxv')
+RAZORPAY_WEBHOOK_SECRET = config('RAZORPAY_WEBHOOK_SECRET', default='')  # Dashboard > Webhooks secret; the endpoint returns 503 until set
+PAYMENT_WEBHOOK_MAX_ATTEMPTS = config('PAYMENT_WEBHOOK_MAX_ATTEMPTS', default=5, cast=int)  # Runs that may retry an event that raised before it is marked failed
+
+# Payment Gateway Client
+PAYMENT_GATEWAY_BACKEND = config('PAYMENT_GATEWAY_BACKEND', default='bookings.payment_gateway.RazorpayGatewayBackend')  # bookings.payment_gateway.FakeGatewayBackend for local runs
+PAYMENT_GATEWAY_CONNECT_TIMEOUT = config('PAYMENT_GATEWAY_CONNECT_TIMEOUT', default=3.05, cast=float)  # Seconds
+PAYMENT_GATEWAY_READ_TIMEOUT = config('PAYMENT_GATEWAY_READ_TIMEOUT', default=10, cast=float)  # Seconds
+PAYMENT_GATEWAY_MAX_RETRIES = config('PAYMENT_GATEWAY_MAX_RETRIES', default=2, cast=int)  # Retries for gateway/server errors and timeouts (order creation: connect errors only, else looked up by receipt)
+PAYMENT_GATEWAY_BREAKER_THRESHOLD = config('PAYMENT_GATEWAY_BREAKER_THRESHOLD', default=5, cast=int)  # Consecutive failures before failing fast
+PAYMENT_GATEWAY_BREAKER_RESET = config('PAYMENT_GATEWAY_BREAKER_RESET', default=30, cast=int)  # Seconds before a trial call after opening
 
 # Pending Bookings Configuration
 PENDING_BOOKING_TIMEOUT = config('PENDING_BOOKING_TIMEOUT', default=3600, cast=int)  # 1 hour in seconds
@@ -175,3 +275,27 @@ PENDING_PAYMENT_TIMEOUT = config('PENDING_PAYMENT_TIMEOUT', default=1800, cast=i
 AUTO_APPROVE_BOOKINGS = config('AUTO_APPROVE_BOOKINGS', default=False, cast=bool)  # Auto-approve bookings
 AUTO_CANCEL_EXPIRED_PENDING = config('AUTO_CANCEL_EXPIRED_PENDING', default=True, cast=bool)  # Auto-cancel expired pending bookings
 PENDING_BOOKING_HOLD_TIME = config('PENDING_BOOKING_HOLD_TIME', default=7200, cast=int)  # 2 hours in seconds before cancelling unpaid
+PENDING_SWEEPER_INTERVAL = config('PENDING_SWEEPER_INTERVAL', default=0, cast=int)  # Seconds between in-process expiry sweeps (0 = off, use the expire_pending_bookings command)
+BULK_REVIEW_MAX_BOOKINGS = config('BULK_REVIEW_MAX_BOOKINGS', default=500, cast=int)  # Bookings per manager bulk approve/reject request
+
+# Driver Bulk Import
+DRIVER_IMPORT_MAX_ROWS = config('DRIVER_IMPORT_MAX_ROWS', default=5000, cast=int)  # Rows per import request
+DRIVER_IMPORT_BATCH_SIZE = config('DRIVER_IMPORT_BATCH_SIZE', default=500, cast=int)  # Rows per bulk_create transaction
+DRIVER_IMPORT_HASH_WORKERS = config('DRIVER_IMPORT_HASH_WORKERS', default=0, cast=int)  # Password hashing threads (0 = one per CPU, 1 = inline)
+
+# Car Photo Variants
+CAR_IMAGE_WORKERS = config('CAR_IMAGE_WORKERS', default=2, cast=int)  # Threads rendering photo variants after upload (0 = off, use the process_car_images command)
+CAR_IMAGE_FORMAT = config('CAR_IMAGE_FORMAT', default='webp')  # webp, avif (Pillow 11.2+, falls back to webp) or jpeg
+CAR_IMAGE_QUALITY = config('CAR_IMAGE_QUALITY', default=80, cast=int)  # Encoder quality for photo variants
+MAX_BOOKING_DAYS = config('MAX_BOOKING_DAYS', default=365, cast=int)  # Default for the maxBookingDays platform setting
+
+# Dashboard Stats
+BOOKING_STATS_ROLLUP = config('BOOKING_STATS_ROLLUP', default=False, cast=bool)  # Serve dashboard stats from the DailyBookingStats rollup
+
+# Platform Settings
+PLATFORM_SETTINGS_CHECK_INTERVAL = config('PLATFORM_SETTINGS_CHECK_INTERVAL', default=1.0, cast=float)  # Seconds each process serves its snapshot of the admin-editable settings before reloading it
+
+# Request Instrumentation
+REQUEST_METRICS_ENABLED = config('REQUEST_METRICS_ENABLED', default=True, cast=bool)  # Per-request timing/query metrics (RequestMetricsMiddleware)
+SERVER_TIMING_ENABLED = config('SERVER_TIMING_ENABLED', default=False, cast=bool)  # Add the Server-Timing header to responses for admins
+REQUEST_METRICS_SLOW_MS = config('REQUEST_METRICS_SLOW_MS', default=1000, cast=int)  # Log requests slower than this (0 = off)
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from config.cache import invalidate_on_change
+
+        invalidate_on_change(self.get_model('User'), 'users', ignore_fields=['last_login'])
+        invalidate_on_change(self.get_model('Document'), 'documents')
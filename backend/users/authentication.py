@@ -0,0 +1,136 @@
+"""
+Cached token authentication
+Resolves API tokens to users without the authtoken_token JOIN users query
+on every request: a bounded per-process LRU, then the shared cache when one
+is configured (REDIS_URL or CACHE_BACKEND=file), then the database.
+
+Under the default local-memory cache the second tier is skipped: it would
+be private to each worker, so a token revoked in one worker would keep
+working in the others for up to AUTH_TOKEN_CACHE_TTL. Without it a revoked
+token stops working everywhere within AUTH_TOKEN_LOCAL_TTL.
+"""
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from config.cache import cache_is_shared
+
+
+def _token_cache_key(key):
+    # Hashed so raw tokens never end up in the cache backend
+    return 'authtoken:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def _user_cache_key(user_id):
+    return f'authtoken:user:{user_id}'
+
+
+class _LocalTokenCache:
+    """Thread-safe LRU of token -> (user, expires_at), bounded by AUTH_TOKEN_LRU_SIZE"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return user
+
+    def set(self, key, user):
+        size = getattr(settings, 'AUTH_TOKEN_LRU_SIZE', 1024)
+        if size <= 0:
+            return
+        expires_at = time.monotonic() + getattr(settings, 'AUTH_TOKEN_LOCAL_TTL', 10)
+        with self.lock:
+            self.entries[key] = (user, expires_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > size:
+                self.entries.popitem(last=False)
+
+    def discard_user(self, user_id):
+        with self.lock:
+            for key in [key for key, (user, _) in self.entries.items() if user.pk == user_id]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+_local = _LocalTokenCache()
+
+
+def invalidate_user_tokens(user_id):
+    """
+    Forget cached token lookups for a user (logout, block/unblock, deletion).
+
+    Clears this process's LRU and the shared cache; other processes drop
+    their LRU entry within AUTH_TOKEN_LOCAL_TTL seconds.
+    """
+    _local.discard_user(user_id)
+    cache_keys = cache.get(_user_cache_key(user_id)) or []
+    cache.delete_many(list(cache_keys) + [_user_cache_key(user_id)])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in replacement for TokenAuthentication
+
+    Authorization: Token <key>
+    Lookups hit the per-process LRU, then the shared cache (for
+    AUTH_TOKEN_CACHE_TTL seconds, only if the cache is shared), and only
+    then the database.
+    """
+
+    def authenticate_credentials(self, key):
+        if getattr(settings, 'AUTH_TOKEN_CACHE_TTL', 300) <= 0:
+            return super().authenticate_credentials(key)
+
+        cache_key = _token_cache_key(key)
+        user = _local.get(cache_key)
+        if user is None:
+            shared = cache_is_shared()
+            user = cache.get(cache_key) if shared else None
+            if user is None:
+                user = self._load_user(key, cache_key, shared)
+            _local.set(cache_key, user)
+
+        if not user.is_active:
+            raise AuthenticationFailed('User inactive or deleted.')
+        # Copy so one request's changes to request.user don't leak into the next
+        user = copy.copy(user)
+        return user, Token(key=key, user=user)
+
+    def _load_user(self, key, cache_key, shared):
+        try:
+            token = Token.objects.select_related('user').get(key=key)
+        except Token.DoesNotExist:
+            raise AuthenticationFailed('Invalid token.')
+
+        user = token.user
+        if not shared:
+            return user
+        ttl = getattr(settings, 'AUTH_TOKEN_CACHE_TTL', 300)
+        cache.set(cache_key, user, ttl)
+        # Index of the user's cached tokens, so invalidation needs no query
+        user_key = _user_cache_key(user.pk)
+        cache_keys = set(cache.get(user_key) or [])
+        cache_keys.add(cache_key)
+        cache.set(user_key, sorted(cache_keys), ttl)
+        return user
@@ -0,0 +1,29 @@
+"""
+Password hashers
+PASSWORD_HASHER in settings picks the algorithm for new and rehashed
+passwords. Django's check_password re-encodes a password whenever its hash
+was made by another hasher or at another cost, so a policy change is
+applied transparently as users log in.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with the work factor taken from PASSWORD_PBKDF2_ITERATIONS
+
+    Same algorithm name as Django's hasher, so existing hashes verify as-is
+    and are re-encoded at the configured cost on the next login. The setting
+    can only raise the cost: it is floored at Django's default, and hashes
+    made at a higher cost are never re-encoded downward.
+    """
+
+    @property
+    def iterations(self):
+        configured = getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', PBKDF2PasswordHasher.iterations)
+        return max(configured, PBKDF2PasswordHasher.iterations)
+
+    def must_update(self, encoded):
+        decoded = self.decode(encoded)
+        return decoded['iterations'] < self.iterations
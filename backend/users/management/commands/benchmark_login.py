@@ -0,0 +1,104 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils.module_loading import import_string
+from rest_framework.test import APIClient
+
+from bookings.management.commands.benchmark_api import percentile
+from users.models import User
+
+BENCH_EMAIL = 'login-benchmark@example.com'
+BENCH_PASSWORD = 'login-benchmark-password'
+
+
+class _Rollback(Exception):
+    pass
+
+
+def parse_policy(value):
+    """'pbkdf2_sha256:260000' -> ('pbkdf2_sha256', 260000); 'scrypt' -> ('scrypt', None)"""
+    name, _, iterations = value.partition(':')
+    try:
+        return name, int(iterations) if iterations else None
+    except ValueError:
+        raise CommandError(f'Invalid policy {value!r}: use HASHER or HASHER:ITERATIONS')
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure logins/sec of POST /api/users/login/ in this process for one or '
+        'more password hasher policies, e.g. --policy pbkdf2_sha256:600000 --policy scrypt. '
+        'Throttles are off and the benchmark user is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=50, help='Timed logins per policy (default 50)')
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed logins per policy first (default 3)')
+        parser.add_argument(
+            '--policy',
+            action='append',
+            metavar='HASHER[:ITERATIONS]',
+            help='Hasher policy to measure; repeatable. Default: the configured PASSWORD_HASHER',
+        )
+
+    def handle(self, *args, **options):
+        policies = [parse_policy(value) for value in options['policy'] or [settings.PASSWORD_HASHER]]
+        self.stdout.write(f'{"policy":<28} {"logins/s":>9} {"mean ms":>9} {"p95 ms":>9} {"queries":>8}')
+        for name, iterations in policies:
+            self._measure(name, iterations, options['logins'], options['warmup'])
+
+    def _measure(self, name, iterations, logins, warmup):
+        hashers = [path for path in settings.PASSWORD_HASHERS if import_string(path).algorithm == name]
+        if not hashers:
+            raise CommandError(f'Unknown hasher {name!r}')
+        overrides = {
+            'PASSWORD_HASHERS': hashers + [path for path in settings.PASSWORD_HASHERS if path not in hashers],
+            'LOGIN_THROTTLE_ENABLED': False,
+        }
+        if iterations:
+            overrides['PASSWORD_PBKDF2_ITERATIONS'] = iterations
+        label = f'{name}:{iterations}' if iterations else name
+
+        with override_settings(**overrides):
+            try:
+                get_hasher(name).encode('probe', get_hasher(name).salt())
+            except (ValueError, ImportError) as e:
+                self.stdout.write(self.style.WARNING(f'{label:<28} skipped: {e}'))
+                return
+
+            try:
+                with transaction.atomic():
+                    User.objects.create_user(
+                        username=BENCH_EMAIL, email=BENCH_EMAIL, password=BENCH_PASSWORD, role='customer'
+                    )
+                    client = APIClient()
+                    url = reverse('users-login')
+                    payload = {'email': BENCH_EMAIL, 'password': BENCH_PASSWORD}
+                    for _ in range(warmup):
+                        client.post(url, payload, format='json')
+
+                    timings, query_counts = [], []
+                    for _ in range(logins):
+                        with CaptureQueriesContext(connection) as queries:
+                            started = time.perf_counter()
+                            response = client.post(url, payload, format='json')
+                            timings.append((time.perf_counter() - started) * 1000)
+                        if response.status_code != 200:
+                            raise CommandError(f'Login failed under {label}: {response.status_code}')
+                        query_counts.append(len(queries))
+                    raise _Rollback()
+            except _Rollback:
+                pass
+
+        timings.sort()
+        total_s = sum(timings) / 1000
+        self.stdout.write(
+            f'{label:<28} {logins / total_s:9.1f} {statistics.fmean(timings):9.2f} '
+            f'{percentile(timings, 95):9.2f} {max(query_counts):8}'
+        )
@@ -38,6 +38,12 @@ class User(AbstractUser):
         db_table = 'users'
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['role', 'created_at']),
+            # Conditional GET fingerprint: MAX(updated_at)
+            models.Index(fields=['updated_at']),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}" or self.username    
@@ -52,22 +52,16 @@ class UserLoginSerializer(serializers.Serializer):
         email = data.get('email')
         password = data.get('password')
 
-        print(f"[LoginSerializer] Attempting login with email: {email}")
-        print(f"[LoginSerializer] Password length: {len(password) if password else 0}")
-
         try:
-            user = User.objects.get(email=email)
-            print(f"[LoginSerializer] User found: {user.email}, has_usable_password: {user.has_usable_password()}")
-            
-            if not user.check_password(password):
-                print(f"[LoginSerializer] Password check FAILED for {email}")
-                raise serializers.ValidationError({"password": "Invalid credentials."})
-            
-            print(f"[LoginSerializer] Password check PASSED for {email}")
+            # auth_token joined in so the login view needn't query it separately
+            user = User.objects.select_related('auth_token').get(email=email)
         except User.DoesNotExist:
-            print(f"[LoginSerializer] User NOT found with email: {email}")
             raise serializers.ValidationError({"email": "User with this email does not exist."})
 
+        # Rehashes and saves the password if the hasher policy changed (users/hashers.py)
+        if not user.check_password(password):
+            raise serializers.ValidationError({"password": "Invalid credentials."})
+
         data['user'] = user
         return data
 
@@ -81,6 +75,16 @@ class UserDetailSerializer(serializers.ModelSerializer):
         fields = ['id', 'firstName', 'lastName', 'email', 'phone_number', 'role', 'is_active', 'created_at']
         read_only_fields = ['id', 'email', 'created_at']
 
+
+class AdminUserSerializer(UserDetailSerializer):
+    """User directory row; expects booking_count, document_count and has_driver_profile annotations"""
+    bookingCount = serializers.IntegerField(source='booking_count', read_only=True)
+    documentCount = serializers.IntegerField(source='document_count', read_only=True)
+    hasDriverProfile = serializers.BooleanField(source='has_driver_profile', read_only=True)
+
+    class Meta(UserDetailSerializer.Meta):
+        fields = UserDetailSerializer.Meta.fields + ['bookingCount', 'documentCount', 'hasDriverProfile']
+
 # ============================================================================
 # DOCUMENT SERIALIZERS
 # ============================================================================
@@ -1,3 +1,133 @@
-from django.test import TestCase
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from .authentication import _local, _token_cache_key
+from .hashers import ConfigurablePBKDF2PasswordHasher
+from .models import User
+
+LOGIN_URL = '/api/users/login/'
+ME_URL = '/api/users/me/'
+
+
+class AuthTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        _local.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='asha', email='asha@example.com', password='Passw0rd!', role='customer'
+        )
+
+    def login(self, email='asha@example.com', password='Passw0rd!', **extra):
+        return self.client.post(LOGIN_URL, {'email': email, 'password': password}, format='json', **extra)
+
+
+class TokenAuthenticationTests(AuthTestCase):
+    """Login issues a token; cached token lookups stop working as soon as the token or user does"""
+
+    def test_login_returns_a_working_token(self):
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        token = response.json()['data']['token']
+        self.assertEqual(token, Token.objects.get(user=self.user).key)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token)
+        self.assertEqual(self.client.get(ME_URL).status_code, 200)
+        # Served from the token cache the second time
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(ME_URL).status_code, 200)
+
+    def test_wrong_password_is_401(self):
+        response = self.login(password='wrong')
+        self.assertEqual(response.status_code, 401)
+        self.assertNotIn('data', response.json())
+
+    def test_logout_revokes_cached_token(self):
+        token = self.login().json()['data']['token']
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token)
+        self.client.get(ME_URL)
+
+        self.assertEqual(self.client.post('/api/users/logout/').status_code, 200)
+        self.assertEqual(self.client.get(ME_URL).status_code, 401)
+
+    def test_blocked_user_is_rejected(self):
+        token = self.login().json()['data']['token']
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token)
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(ME_URL).status_code, 401)
+
+    def test_unknown_token_is_401(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + '0' * 40)
+        self.assertEqual(self.client.get(ME_URL).status_code, 401)
+
+    def test_token_revoked_elsewhere_stops_working(self):
+        token = self.login().json()['data']['token']
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token)
+        self.assertEqual(self.client.get(ME_URL).status_code, 200)
+        # Nothing goes into a cache other workers can't see
+        self.assertIsNone(cache.get(_token_cache_key(token)))
+
+        # Deleted by another worker: no signal reaches this process, only the LRU expiry does
+        Token.objects.filter(key=token)._raw_delete(using='default')
+        _local.clear()
+        self.assertEqual(self.client.get(ME_URL).status_code, 401)
+
+
+
+class LoginThrottleTests(AuthTestCase):
+    """Login attempts are limited per email (10/min) and per client IP (30/min)"""
+
+    def test_attempts_per_email_are_limited(self):
+        for _ in range(10):
+            self.assertEqual(self.login(password='wrong').status_code, 401)
+        # Even the right password is turned away once the email is throttled
+        self.assertEqual(self.login().status_code, 429)
+        # Other accounts are unaffected
+        self.assertEqual(self.login(email='other@example.com', password='wrong').status_code, 401)
+
+    def test_attempts_per_ip_are_limited(self):
+        for number in range(30):
+            response = self.login(email=f'user{number}@example.com', password='wrong')
+            self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.login().status_code, 429)
+        # A different client address has its own budget
+        self.assertEqual(self.login(REMOTE_ADDR='10.0.0.2').status_code, 200)
+
+    def test_forwarded_for_is_ignored_without_proxies(self):
+        for number in range(30):
+            self.login(email=f'user{number}@example.com', password='wrong', HTTP_X_FORWARDED_FOR=f'10.1.0.{number}')
+        # A forged header doesn't buy a fresh budget
+        self.assertEqual(self.login(HTTP_X_FORWARDED_FOR='10.9.9.9').status_code, 429)
+
+    def test_behind_a_proxy_the_forwarded_client_is_throttled(self):
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}):
+            for number in range(30):
+                self.login(email=f'user{number}@example.com', password='wrong', HTTP_X_FORWARDED_FOR='203.0.113.7')
+            self.assertEqual(self.login(HTTP_X_FORWARDED_FOR='203.0.113.7').status_code, 429)
+            # Same proxy (REMOTE_ADDR), different client
+            self.assertEqual(self.login(HTTP_X_FORWARDED_FOR='203.0.113.8').status_code, 200)
+
+
+class PasswordHasherTests(TestCase):
+    """PASSWORD_PBKDF2_ITERATIONS can raise the PBKDF2 cost but never lower it"""
+
+    def test_iterations_are_floored_at_the_django_default(self):
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=1000):
+            self.assertEqual(ConfigurablePBKDF2PasswordHasher().iterations, PBKDF2PasswordHasher.iterations)
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=PBKDF2PasswordHasher.iterations + 1):
+            self.assertEqual(ConfigurablePBKDF2PasswordHasher().iterations, PBKDF2PasswordHasher.iterations + 1)
+
+    def test_stronger_hashes_are_not_rehashed_downward(self):
+        hasher = ConfigurablePBKDF2PasswordHasher()
+        stronger = hasher.encode('Passw0rd!', hasher.salt(), iterations=hasher.iterations + 1)
+        weaker = hasher.encode('Passw0rd!', hasher.salt(), iterations=hasher.iterations - 1)
+        self.assertFalse(hasher.must_update(stronger))
+        self.assertTrue(hasher.must_update(weaker))
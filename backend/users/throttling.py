@@ -0,0 +1,40 @@
+"""
+Login throttles
+Cache-backed limits on login attempts per client IP and per email address,
+so a credential-stuffing burst is turned away before any password hashing.
+
+The per-IP limit keys on DRF's get_ident(), which trusts X-Forwarded-For
+only as far as REST_FRAMEWORK['NUM_PROXIES'] says. It defaults to 0 (use
+REMOTE_ADDR) for an app reached directly; deployments behind a load
+balancer or reverse proxy must set NUM_PROXIES to the number of proxies,
+or every client shares the proxy's address and budget.
+"""
+import hashlib
+
+from django.conf import settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LoginRateThrottle(SimpleRateThrottle):
+    """Login attempts per client IP (rate: DEFAULT_THROTTLE_RATES['login_ip'])"""
+    scope = 'login_ip'
+
+    def allow_request(self, request, view):
+        if not getattr(settings, 'LOGIN_THROTTLE_ENABLED', True):
+            return True
+        return super().allow_request(request, view)
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginEmailRateThrottle(LoginRateThrottle):
+    """Login attempts per email address, whatever IP they come from (rate: 'login_email')"""
+    scope = 'login_email'
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        ident = hashlib.sha256(email.strip().lower().encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
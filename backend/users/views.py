@@ -3,13 +3,47 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.authtoken.models import Token
+from django.conf import settings
 from .models import User
+from .throttling import LoginRateThrottle, LoginEmailRateThrottle
+import hashlib
+import logging
+import random
+import time
 from .serializers import (
     UserRegistrationSerializer, 
     UserLoginSerializer, 
     UserDetailSerializer
 )
 
+logger = logging.getLogger(__name__)
+login_logger = logging.getLogger('users.login')
+
+
+def _log_login(request, outcome, started, user=None, fields=None):
+    """
+    One key=value line per login attempt, sampled by outcome
+    (LOGIN_LOG_SAMPLE_RATES) so a login storm doesn't turn into a log storm.
+    Emails are logged as a short hash, never in clear; passwords never.
+    """
+    rate = getattr(settings, 'LOGIN_LOG_SAMPLE_RATES', {}).get(outcome, 1.0)
+    if rate <= 0 or (rate < 1 and random.random() >= rate):
+        return
+    email = request.data.get('email') if hasattr(request.data, 'get') else None
+    email_hash = hashlib.sha256(str(email).strip().lower().encode()).hexdigest()[:12] if email else '-'
+    login_logger.info(
+        'login outcome=%s user_id=%s role=%s email_hash=%s ip=%s duration_ms=%s errors=%s sample_rate=%s',
+        outcome,
+        user.id if user else '-',
+        user.role if user else '-',
+        email_hash,
+        request.META.get('REMOTE_ADDR', '-'),
+        f'{(time.perf_counter() - started) * 1000:.1f}' if started else '-',
+        ','.join(fields) if fields else '-',
+        rate,
+    )
+
+
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserDetailSerializer
@@ -21,12 +55,10 @@ class UserViewSet(viewsets.ModelViewSet):
         Handle user registration/signup
         Expected data: {firstName, lastName, email, password, confirmPassword, role}
         """
-        print(f"[signup] Received data: {request.data}")
-        
         serializer = UserRegistrationSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            print(f"[signup] User created: {user.email} with role: {user.role}")
+            logger.info('User signed up: id=%s role=%s', user.id, user.role)
             
             # Create token for the user
             token, created = Token.objects.get_or_create(user=user)
@@ -44,31 +76,32 @@ class UserViewSet(viewsets.ModelViewSet):
                 }
             }, status=status.HTTP_201_CREATED)
         
-        print(f"[signup] Validation errors: {serializer.errors}")
+        logger.info('Signup rejected: fields=%s', sorted(serializer.errors))
         return Response({
             'status': 'error',
             'message': 'Signup failed',
             'errors': serializer.errors
         }, status=status.HTTP_400_BAD_REQUEST)
 
-    @action(detail=False, methods=['post'], permission_classes=[AllowAny])
+    @action(detail=False, methods=['post'], permission_classes=[AllowAny],
+            throttle_classes=[LoginRateThrottle, LoginEmailRateThrottle])
     def login(self, request):
         """
         Handle user login
         Expected data: {email, password}
         """
-        print(f"[LoginView] Received request data: {request.data}")
-        print(f"[LoginView] Email: {request.data.get('email')}")
-        print(f"[LoginView] Password length: {len(request.data.get('password', ''))}")
-        
+        started = time.perf_counter()
         serializer = UserLoginSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.validated_data['user']
             
-            # Get or create token
-            token, created = Token.objects.get_or_create(user=user)
+            # Reuse the token joined in by the serializer; create one on first login
+            try:
+                token = user.auth_token
+            except Token.DoesNotExist:
+                token, created = Token.objects.get_or_create(user=user)
             
-            print(f"[LoginView] Login successful for {user.email}")
+            _log_login(request, 'success', started, user=user)
             
             return Response({
                 'status': 'success',
@@ -83,13 +116,18 @@ class UserViewSet(viewsets.ModelViewSet):
                 }
             }, status=status.HTTP_200_OK)
         
-        print(f"[LoginView] Login failed. Errors: {serializer.errors}")
+        _log_login(request, 'failure', started, fields=sorted(serializer.errors))
         return Response({
             'status': 'error',
             'message': 'Login failed',
             'errors': serializer.errors
         }, status=status.HTTP_401_UNAUTHORIZED)
 
+    def throttled(self, request, wait):
+        if self.action == 'login':
+            _log_login(request, 'throttled', None)
+        super().throttled(request, wait)
+
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
     def logout(self, request):
         """Handle user logout by deleting token"""
@@ -136,7 +136,7 @@ const DriverAllocation = ({ onAllocationUpdate }) => {
       const token = getToken() || localStorage.getItem('authToken');
       
       const response = await fetch(
-        `http://localhost:8000/api/bookings/${bookingId}/available_drivers/`,
+        `http://localhost:8000/api/bookings/available_drivers/?booking_id=${bookingId}`,
         {
           method: 'GET',
           headers: {
@@ -301,7 +301,7 @@ const UsedCarListings = () => {
               <div key={listing.id} className="listing-card">
                 {(listing.image_url_full || listing.image_url || listing.image) && (
                   <div className="listing-image">
-                    <img src={listing.image_url_full || listing.image_url || listing.image} alt={`${listing.make} ${listing.model}`} />
+                    <img src={listing.image_urls?.card || listing.image_url_full || listing.image_url || listing.image} alt={`${listing.make} ${listing.model}`} loading="lazy" />
                   </div>
                 )}
                 {!(listing.image_url_full || listing.image_url || listing.image) && (
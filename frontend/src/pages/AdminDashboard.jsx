@@ -176,28 +176,29 @@ const AdminDashboard = ({ user, onLogout }) => {
     }
   };
 
-  const handleDeleteBooking = async (bookingId) => {
-    if (!window.confirm('Are you sure you want to delete this booking? This action cannot be undone.')) {
+  const handleVoidPayment = async (paymentId) => {
+    if (!window.confirm('Are you sure you want to void this payment? A full refund will be recorded against it.')) {
       return;
     }
     try {
       const token = getToken();
-      const response = await fetch(`http://localhost:8000/api/bookings/admin/payments/${bookingId}/delete_payment/`, {
-        method: 'DELETE',
+      // Payment ids as listed by /admin/payments/, not booking ids
+      const response = await fetch(`http://localhost:8000/api/bookings/admin/payments/${paymentId}/void_payment/`, {
+        method: 'POST',
         headers: {
           'Authorization': `Token ${token}`,
           'Content-Type': 'application/json',
         },
       });
       if (response.ok) {
-        alert('Booking deleted successfully');
+        alert('Payment voided successfully');
         fetchAdminData();
       } else {
-        alert('Failed to delete booking');
+        alert('Failed to void payment');
       }
     } catch (error) {
-      console.error('Error deleting booking:', error);
-      alert('Error deleting booking');
+      console.error('Error voiding payment:', error);
+      alert('Error voiding payment');
     }
   };
 
@@ -235,7 +235,7 @@ const UsedCarsPage = ({ defaultShowSellForm = false }) => {
                             }}>
                                 <div style={{ height: '200px', backgroundColor: '#ecf0f1', display: 'flex', alignItems: 'center', justifyContent: 'center' }}>
                                     {car.image_url_full || car.image_url || car.image ? (
-                                        <img src={car.image_url_full || car.image_url || car.image} alt={`${car.make} ${car.model}`} style={{ width: '100%', height: '100%', objectFit: 'cover' }} />
+                                        <img src={car.image_urls?.card || car.image_url_full || car.image_url || car.image} alt={`${car.make} ${car.model}`} loading="lazy" style={{ width: '100%', height: '100%', objectFit: 'cover' }} />
                                     ) : (
                                         <span style={{ fontSize: '3rem' }}>🚗</span>
                                     )}